@@ -14,7 +14,9 @@ from datetime import datetime, timedelta
 # Import modul custom - FIXED IMPORTS
 from modules.data_handler import (
     get_product_by_barcode, 
+    get_product_cached,
     add_transaction, 
+    add_transactions_batch,
     save_products_data, 
     load_products_data
 )
@@ -22,7 +24,26 @@ from modules.barcode_handler import (
     scan_barcode_realtime,  # ← FIXED: dari barcode_handler, bukan barcode_handler_realtime
     check_scanner_availability
 )
-from modules.utils import format_currency, calculate_profit_margin
+from modules.utils import format_currency, calculate_profit_margin, parse_qr_payload
+from modules.basket_handler import get_association_pairs, get_basket_summary
+from modules.forecast_handler import calculate_reorder_suggestions, get_reorder_list
+from modules.query_handler import aggregate, compare_periods
+from modules.anomaly_handler import observe_checkout, get_recent_alerts, check_missing_sales, clear_alerts
+from modules.label_handler import create_label_sheet_pdf, LABEL_LAYOUTS, DEFAULT_LAYOUT
+from modules.decode_handler import decode_image, OPENCV_AVAILABLE
+from modules.report_handler import export_sales_report
+from modules.backup_handler import (
+    list_snapshots, verify_snapshot, restore_snapshot, get_backup_store_stats,
+    preview_point_in_time_restore, apply_point_in_time_restore, discard_restore_plan
+)
+from modules.job_handler import (
+    submit_job, list_jobs, cancel_job, clear_finished_jobs, has_active_jobs,
+    JOB_ACTIVE_STATUSES, JOB_POLL_SECONDS
+)
+from modules.stocktake_handler import (
+    collect_stocktake_images, decode_stocktake_images,
+    build_variance_report, summarize_variance, apply_stocktake
+)
 from modules.data_handler import *
 from modules.chart_handler import *
 from modules.utils import *
@@ -36,10 +57,29 @@ except Exception as e:
     print(f"⚠️ Warning: Barcode scanner tidak tersedia - {e}")
     
     # Define dummy functions
-    def generate_barcode(barcode_id, product_name):
+    def generate_barcode(barcode_id, product_name, force=False, image_format=None):
         return None
     
-    def generate_batch_barcodes(products_df):
+    def render_barcode_bytes(barcode_id, image_format='png'):
+        return None
+    
+    def get_barcode_image_index(output_folder=None):
+        return {}
+    
+    def validate_barcodes(barcode_ids):
+        codes = pd.Series(barcode_ids, dtype='object').fillna('').astype(str)
+        return pd.DataFrame({'barcode_id': codes, 'jenis': 'CODE128', 'valid': True,
+                             'error': '', 'mirip_dengan': ''})
+    
+    def get_barcode_thumbnails(barcode_ids, output_folder=None):
+        return {}
+    
+    def plan_barcode_render(barcode_ids, output_folder=None, force=False, image_format=None):
+        return {'to_render': list(barcode_ids), 'unchanged': [], 'orphans': [],
+                'stale_files': [], 'manifest': {}}
+    
+    def generate_batch_barcodes(products_df, progress_callback=None, max_workers=None,
+                                force=False, prune=False, image_format=None):
         return {
             'success': False,
             'message': 'Fitur generate barcode tidak tersedia. Install ZBar untuk mengaktifkan.'
@@ -210,8 +250,13 @@ def add_to_cart(product, quantity):
             existing_index = idx
             break
     
-    # Get current stock
-    current_product = get_product_by_barcode(product['barcode_id'])
+    # Get current stock (index di memori, dibaca ulang hanya jika file produk berubah)
+    current_product = get_product_cached(product['barcode_id'])
+    if current_product is None:
+        return {
+            'success': False,
+            'message': f"❌ Produk {product['barcode_id']} tidak ditemukan!"
+        }
     available_stock = int(current_product['stok'])
     
     # Calculate total quantity in cart
@@ -327,45 +372,50 @@ def process_checkout():
                 'message': f"❌ Stok {item['nama_produk']} tidak cukup! Tersedia: {current_stock}, diminta: {item['quantity']}"
             }
     
-    # Process each item
-    transactions_created = []
-    
+    # Update stock untuk semua item
     for item in st.session_state.cart:
-        # Update stock
         products_df.loc[products_df['barcode_id'] == item['barcode_id'], 'stok'] -= item['quantity']
-        
-        # Create transaction
-        trans_result = add_transaction(
-            item['barcode_id'],
-            item['nama_produk'],
-            item['quantity'],
-            item['harga_satuan'],
-            item['harga_modal']
-        )
-        
-        if trans_result['success']:
-            transactions_created.append(trans_result)
-        else:
-            return {
-                'success': False,
-                'message': f"❌ Gagal create transaksi untuk {item['nama_produk']}"
-            }
+    
+    # Catat semua item sebagai satu struk
+    checkout_items = [
+        {
+            'barcode_id': item['barcode_id'],
+            'nama_produk': item['nama_produk'],
+            'kategori': item['kategori'],
+            'jumlah': item['quantity'],
+            'harga_satuan': item['harga_satuan'],
+            'harga_modal': item['harga_modal']
+        }
+        for item in st.session_state.cart
+    ]
+    trans_result = add_transactions_batch(checkout_items)
+    
+    if not trans_result['success']:
+        return {
+            'success': False,
+            'message': f"❌ Gagal create transaksi: {trans_result['message']}"
+        }
     
     # Save updated products data
     if save_products_data(products_df):
         totals = calculate_cart_totals()
         
+        # Deteksi anomali (jumlah, harga, nilai struk) secara streaming
+        anomalies = observe_checkout(checkout_items, products_df)
+        
         # Clear cart after success
         clear_cart()
         
         return {
             'success': True,
-            'transactions_count': len(transactions_created),
+            'struk_id': trans_result['struk_id'],
+            'transactions_count': len(trans_result['transaksi_ids']),
             'total_items': totals['total_items'],
             'total_quantity': totals['total_quantity'],
             'total_price': totals['total_price'],
             'total_profit': totals['total_profit'],
-            'message': f"✅ Checkout berhasil! {totals['total_items']} produk, {totals['total_quantity']} pcs terjual"
+            'anomalies': anomalies,
+            'message': f"✅ Checkout berhasil! Struk {trans_result['struk_id']}: {totals['total_items']} produk, {totals['total_quantity']} pcs terjual"
         }
     else:
         return {
@@ -373,6 +423,89 @@ def process_checkout():
             'message': "❌ Gagal menyimpan data produk!"
         }
 
+# ==================== JOB BACKGROUND ====================
+
+JOB_STATUS_ICONS = {
+    'antri': '⏳',
+    'berjalan': '🔄',
+    'selesai': '✅',
+    'gagal': '❌',
+    'dibatalkan': '🚫'
+}
+
+# Kunci hasil job yang berisi file untuk di-download, dan tipe MIME per ekstensi
+JOB_FILE_KEYS = ('zip_path', 'pdf_path', 'path')
+JOB_FILE_MIMES = {
+    '.zip': 'application/zip',
+    '.pdf': 'application/pdf',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+def _job_result_file(result):
+    """Ambil path file hasil job (jika ada dan masih tersedia)"""
+    if isinstance(result, str):
+        path = result
+    elif isinstance(result, dict):
+        path = next((result[key] for key in JOB_FILE_KEYS if result.get(key)), None)
+    else:
+        path = None
+    return path if path and os.path.isfile(path) else None
+
+def _job_panel_body(kind, live=False):
+    """Isi panel job; dalam mode live, rerun penuh saat semua job selesai agar polling berhenti"""
+    jobs = list_jobs(kind)
+    
+    if live and not any(job['status'] in JOB_ACTIVE_STATUSES for job in jobs):
+        st.rerun()
+    
+    if not jobs:
+        st.caption("Belum ada job background.")
+        return
+    
+    for job in jobs:
+        active = job['status'] in JOB_ACTIVE_STATUSES
+        c1, c2 = st.columns([5, 1])
+        c1.markdown(f"{JOB_STATUS_ICONS.get(job['status'], '•')} **{job['name']}** · {job['status']}")
+        
+        if active:
+            c1.progress(job['progress'], text=f"{job['done']}/{job['total']}" if job['total'] else None)
+            if c2.button("Batal", key=f"job_cancel_{job['job_id']}", disabled=job['cancel_requested']):
+                cancel_job(job['job_id'])
+                st.rerun()
+        else:
+            if job['message']:
+                c1.caption(job['message'])
+            file_path = _job_result_file(job['result']) if job['status'] == 'selesai' else None
+            if file_path:
+                with open(file_path, "rb") as fp:
+                    c1.download_button(
+                        f"📥 {os.path.basename(file_path)}", fp, os.path.basename(file_path),
+                        JOB_FILE_MIMES.get(os.path.splitext(file_path)[1].lower(), "application/octet-stream"),
+                        key=f"job_download_{job['job_id']}"
+                    )
+            errors = job['result'].get('errors') if isinstance(job['result'], dict) else None
+            if errors:
+                with c1.expander(f"{len(errors)} item gagal"):
+                    for item in errors:
+                        st.write(f"❌ {item['barcode_id']}: {item['error']}")
+    
+    if not live and any(job['status'] not in JOB_ACTIVE_STATUSES for job in jobs):
+        if st.button("🧹 Bersihkan riwayat job", key=f"job_clear_{kind}"):
+            clear_finished_jobs(kind)
+            st.rerun()
+
+def render_job_panel(kind, title="🧵 Job Background"):
+    """
+    Tampilkan daftar job background untuk satu kelompok
+    Selama ada job aktif, panel di-refresh sendiri (fragment) tanpa rerun halaman
+    """
+    st.markdown(f"### {title}")
+    fragment = getattr(st, 'fragment', None)
+    if fragment is not None and has_active_jobs(kind):
+        fragment(run_every=JOB_POLL_SECONDS)(_job_panel_body)(kind, live=True)
+    else:
+        _job_panel_body(kind)
+
 # ==================== LOGIN PAGE ====================
 
 def login_page():
@@ -453,6 +586,24 @@ def dashboard_page():
             with st.expander("Lihat Detail"):
                 for idx, row in low_stock.iterrows():
                     st.write(f"- **{row['nama_produk']}**: Stok tersisa {row['stok']}")
+        
+        # Forecast stok habis & saran reorder
+        reorder_df = get_reorder_list(products_df)
+        if not reorder_df.empty:
+            st.error(f"🔮 **FORECAST:** {len(reorder_df)} produk perlu segera di-order berdasarkan tren penjualan")
+        
+        with st.expander("📦 Saran Reorder (Forecast Permintaan)"):
+            col_lt, col_rv = st.columns(2)
+            with col_lt:
+                lead_time = st.number_input("Lead time supplier (hari)", min_value=1, value=3, key="reorder_lead_time")
+            with col_rv:
+                review_days = st.number_input("Interval belanja (hari)", min_value=1, value=7, key="reorder_review_days")
+            
+            suggestions = calculate_reorder_suggestions(
+                products_df, lead_time_days=lead_time, review_days=review_days
+            )
+            st.dataframe(suggestions, use_container_width=True, hide_index=True)
+            st.caption("Demand harian diestimasi dengan exponential smoothing dari rollup penjualan harian")
     
     # Charts
     col1, col2 = st.columns(2)
@@ -491,9 +642,9 @@ def data_master_page():
     """Halaman Data Master - FIXED Clean Version"""
     st.markdown("<h1 class='main-header'>📦 Data Master Produk</h1>", unsafe_allow_html=True)
     
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
         "➕ Tambah", "📋 Lihat Data", "✏️ Edit", 
-        "➕📦 Tambah Stok", "🗑️ Hapus", "🏷️ Generate Barcode"
+        "➕📦 Tambah Stok", "🗑️ Hapus", "🏷️ Generate Barcode", "📋 Stock Opname"
     ])
     
     # TAB 1: TAMBAH PRODUK
@@ -511,11 +662,21 @@ def data_master_page():
             
             if st.form_submit_button("Simpan Produk", use_container_width=True):
                 if barcode_id and nama_produk:
-                    if harga_jual > harga_modal:
+                    # Validasi barcode baru bersama katalog (duplikat / hampir sama)
+                    catalog_ids = load_products_data().get('barcode_id', pd.Series(dtype='object'))
+                    check = validate_barcodes(
+                        pd.concat([catalog_ids, pd.Series([barcode_id])], ignore_index=True)
+                    ).iloc[-1]
+                    
+                    if not check['valid']:
+                        st.error(f"Barcode tidak valid: {check['error']}")
+                    elif harga_jual > harga_modal:
                         res = add_product(barcode_id, nama_produk, kategori, stok, harga_modal, harga_jual)
                         if res['success']:
                             st.success(res['message'])
                             generate_barcode(barcode_id, nama_produk)
+                            if check['mirip_dengan']:
+                                st.warning(f"⚠️ Barcode {barcode_id} mirip dengan {check['mirip_dengan']}")
                         else:
                             st.error(res['message'])
                     else:
@@ -590,56 +751,227 @@ def data_master_page():
         df = load_products_data()
         
         if not df.empty:
-            # 1. Hitung Barcode
-            existing = 0
-            missing_ids = []
-            for idx, row in df.iterrows():
-                if os.path.exists(f"barcodes/{row['barcode_id']}.png"):
-                    existing += 1
-                else:
-                    missing_ids.append(row['barcode_id'])
+            # Format file: SVG lebih cepat dibuat dan tajam saat dicetak di ukuran apa pun
+            image_format = st.radio(
+                "Format File:", ["png", "svg"], horizontal=True, key="barcode_format",
+                format_func=lambda x: "PNG (gambar)" if x == "png" else "SVG (vektor, lebih cepat)"
+            )
             
-            c1, c2, c3 = st.columns(3)
+            # Validasi seluruh katalog sekaligus; barcode tidak valid tidak akan dirender
+            validation = validate_barcodes(df['barcode_id'])
+            invalid_df = validation[~validation['valid']]
+            near_df = validation[validation['valid'] & (validation['mirip_dengan'] != '')]
+            
+            # 1. Hitung Barcode (satu kali scan folder + manifest render)
+            plan = plan_barcode_render(
+                validation['barcode_id'].tolist(), image_format=image_format,
+                exclude=set(invalid_df['barcode_id']) - set(validation.loc[validation['valid'], 'barcode_id'])
+            )
+            missing_ids = plan['to_render']
+            
+            c1, c2, c3, c4 = st.columns(4)
             c1.metric("Total Produk", len(df))
-            c2.metric("Barcode Ada", existing)
-            c3.metric("Belum Ada", len(missing_ids))
+            c2.metric("Barcode Terbaru", len(plan['unchanged']))
+            c3.metric("Belum Ada / Berubah", len(missing_ids))
+            c4.metric("Gambar Yatim", len(plan['orphans']))
+            
+            if not invalid_df.empty or not near_df.empty:
+                with st.expander(f"⚠️ {len(invalid_df)} barcode tidak valid, {len(near_df)} hampir sama"):
+                    st.dataframe(
+                        pd.concat([invalid_df, near_df])[['barcode_id', 'jenis', 'error', 'mirip_dengan']],
+                        use_container_width=True, hide_index=True
+                    )
             
             st.markdown("---")
             
             # 2. Pilihan Mode (DILUAR LOOP - AMAN)
             mode = st.radio("Mode Generate:", ["Semua Produk", "Hanya yang Belum Ada"], key="barcode_mode_unique")
+            if mode == "Semua Produk":
+                st.caption("Hanya label baru/berubah yang dirender, gambar produk yang sudah dihapus ikut dibersihkan.")
+            force_render = st.checkbox("Render ulang semua barcode", value=False, key="barcode_force_render")
             
             # 3. Tombol Action
             if st.button("🚀 Generate Barcode", type="primary"):
-                with st.spinner("Memproses..."):
-                    target_df = df if mode == "Semua Produk" else df[df['barcode_id'].isin(missing_ids)]
-                    if not target_df.empty:
-                        res = generate_batch_barcodes(target_df)
-                        if res['success']:
-                            st.success(res['message'])
-                            time.sleep(1)
-                            st.rerun()
-                        else:
-                            st.error(res['message'])
-                    else:
-                        st.info("Tidak ada data yang perlu diproses.")
+                full_sync = mode == "Semua Produk"
+                target_df = df if full_sync or force_render else df[df['barcode_id'].isin(missing_ids)]
+                if not target_df.empty or plan['orphans']:
+                    # Dijalankan di background agar kasir tetap bisa transaksi
+                    submit_job(
+                        f"Generate {len(target_df)} barcode",
+                        generate_batch_barcodes,
+                        args=(target_df,),
+                        kwargs={'force': force_render, 'prune': full_sync, 'image_format': image_format},
+                        kind='barcode'
+                    )
+                    st.toast("🚀 Generate barcode berjalan di background")
+                else:
+                    st.info("Tidak ada data yang perlu diproses.")
+            
+            render_job_panel('barcode')
 
-            # 4. Gallery Barcode
+            # 4. Gallery Barcode (index folder di-cache, thumbnail kecil di disk)
             st.markdown("### 📂 Galeri Barcode")
-            if os.path.exists("barcodes"):
-                files = [f for f in os.listdir("barcodes") if f.endswith(".png")]
-                if files:
-                    # Tampilkan max 8 barcode terbaru agar tidak berat
-                    cols = st.columns(4)
-                    for i, f in enumerate(files[:8]): 
+            image_index = get_barcode_image_index()
+            
+            gc1, gc2 = st.columns([3, 1])
+            gallery_search = gc1.text_input(
+                "Cari", placeholder="Cari barcode / nama produk...",
+                key="gallery_search", label_visibility="collapsed"
+            )
+            page_size = gc2.selectbox(
+                "Per halaman", [12, 24, 48], key="gallery_page_size", label_visibility="collapsed",
+                format_func=lambda n: f"{n} per halaman"
+            )
+            
+            gallery_df = df[df['barcode_id'].astype(str).isin(image_index.keys())]
+            if gallery_search.strip():
+                keyword = gallery_search.strip()
+                gallery_df = gallery_df[
+                    gallery_df['barcode_id'].astype(str).str.contains(keyword, case=False, regex=False)
+                    | gallery_df['nama_produk'].astype(str).str.contains(keyword, case=False, regex=False)
+                ]
+            
+            if gallery_df.empty:
+                st.info("Belum ada gambar barcode" if not gallery_search.strip() else "Tidak ada barcode yang cocok")
+            else:
+                total_pages = (len(gallery_df) - 1) // page_size + 1
+                page = st.number_input(
+                    f"Halaman (dari {total_pages})", min_value=1, max_value=total_pages,
+                    value=1, key=f"gallery_page_{gallery_search}_{page_size}"
+                ) if total_pages > 1 else 1
+                st.caption(f"{len(gallery_df)} barcode | halaman {page}/{total_pages}")
+                
+                page_df = gallery_df.iloc[(page - 1) * page_size:page * page_size]
+                thumbnails = get_barcode_thumbnails(page_df['barcode_id'].tolist())
+                
+                cols = st.columns(4)
+                for i, product in enumerate(page_df.to_dict('records')):
+                    thumb_path = thumbnails.get(str(product['barcode_id']))
+                    if thumb_path:
                         with cols[i % 4]:
-                            st.image(f"barcodes/{f}", caption=f.replace('.png',''))
-                    
-                    if st.button("📥 Download ZIP Semua Barcode"):
-                         res = export_barcodes_zip()
-                         if res['success']:
-                             with open(res['zip_path'], "rb") as fp:
-                                 st.download_button("Klik Download ZIP", fp, "barcodes.zip", "application/zip")
+                            st.image(thumb_path, caption=f"{product['barcode_id']} - {product['nama_produk']}")
+            
+            if st.button("📥 Download ZIP Semua Barcode"):
+                submit_job("ZIP semua barcode", export_barcodes_zip, args=(df.copy(),), kind='label')
+                st.toast("📥 ZIP barcode disiapkan di background")
+            
+            # 5. Cetak Lembar Label (PDF untuk kertas stiker)
+            st.markdown("### 🖨️ Cetak Lembar Label")
+            lc1, lc2, lc3 = st.columns(3)
+            layout_names = list(LABEL_LAYOUTS.keys())
+            label_layout = lc1.selectbox("Layout Kertas", layout_names, index=layout_names.index(DEFAULT_LAYOUT))
+            label_code = lc2.radio(
+                "Jenis Kode", ["barcode", "qrcode"], horizontal=True,
+                format_func=lambda x: "Barcode" if x == "barcode" else "QR Code"
+            )
+            label_copies_mode = lc3.radio("Jumlah Label", ["Per produk", "Sesuai stok"], horizontal=True)
+            label_copies = 1
+            if label_copies_mode == "Per produk":
+                label_copies = st.number_input("Label per produk", min_value=1, max_value=100, value=1)
+            
+            product_names = dict(zip(df['barcode_id'], df['nama_produk']))
+            label_products = st.multiselect(
+                "Produk (kosongkan untuk semua produk)",
+                df['barcode_id'].tolist(),
+                format_func=lambda x: f"{x} - {product_names.get(x, '')}"
+            )
+            
+            if st.button("🖨️ Buat PDF Label"):
+                label_df = df[df['barcode_id'].isin(label_products)] if label_products else df
+                submit_job(
+                    f"PDF label {len(label_df)} produk",
+                    create_label_sheet_pdf,
+                    args=(label_df.copy(),),
+                    kwargs={
+                        'layout': label_layout,
+                        'code_type': label_code,
+                        'copies': 'stok' if label_copies_mode == "Sesuai stok" else label_copies
+                    },
+                    kind='label'
+                )
+                st.toast("🖨️ PDF label disusun di background")
+            
+            render_job_panel('label', "🧵 Job ZIP & Label")
+
+    # TAB 7: STOCK OPNAME DARI FOTO
+    with tab7:
+        st.subheader("📋 Stock Opname dari Foto")
+        df = load_products_data()
+        st.caption("Upload foto label/rak atau ZIP berisi gambar. Setiap label yang terbaca dihitung 1 pcs, label sama di posisi berbeda dihitung terpisah.")
+        
+        opname_files = st.file_uploader(
+            "Foto / ZIP",
+            type=['png', 'jpg', 'jpeg', 'webp', 'bmp', 'zip'],
+            accept_multiple_files=True,
+            key="opname_files"
+        )
+        
+        if st.button("🔍 Proses Foto", disabled=not opname_files, key="btn_opname_decode"):
+            images = collect_stocktake_images(opname_files)
+            opname_progress = st.progress(0, text=f"Membaca {len(images)} gambar...")
+            res = decode_stocktake_images(
+                images,
+                progress_callback=lambda done, total: opname_progress.progress(
+                    done / total, text=f"Gambar {done}/{total}..."
+                )
+            )
+            opname_progress.empty()
+            st.session_state.opname_counts = res['counts']
+            st.session_state.opname_failed = res['failed_items']
+            st.session_state.opname_message = res['message']
+        
+        if st.session_state.get('opname_counts') is not None:
+            st.info(st.session_state.opname_message)
+            
+            if st.session_state.opname_failed:
+                with st.expander(f"⚠️ {len(st.session_state.opname_failed)} gambar tidak terbaca"):
+                    st.dataframe(pd.DataFrame(st.session_state.opname_failed), use_container_width=True)
+            
+            # Hasil hitung bisa dikoreksi/ditambah manual sebelum diterapkan
+            counts_df = pd.DataFrame(
+                list(st.session_state.opname_counts.items()), columns=['barcode_id', 'jumlah_hitung']
+            )
+            edited_counts = st.data_editor(
+                counts_df, num_rows="dynamic", use_container_width=True, key="opname_editor"
+            )
+            edited_counts = edited_counts.dropna(subset=['barcode_id'])
+            
+            full_count = st.checkbox(
+                "Opname penuh (produk yang tidak terfoto dianggap stok 0)", key="opname_full"
+            )
+            
+            report = build_variance_report(
+                dict(zip(edited_counts['barcode_id'].astype(str),
+                         edited_counts['jumlah_hitung'].fillna(0).astype(int))),
+                df, uncounted_as_zero=full_count
+            )
+            summary = summarize_variance(report)
+            
+            col_o1, col_o2, col_o3, col_o4 = st.columns(4)
+            col_o1.metric("Cocok", summary['cocok'])
+            col_o2.metric("Kurang", summary['kurang'], format_currency(summary['nilai_kurang']))
+            col_o3.metric("Lebih", summary['lebih'], format_currency(summary['nilai_lebih']))
+            col_o4.metric("Tidak di Katalog", summary['tidak_dikenal'])
+            
+            st.dataframe(report, use_container_width=True, hide_index=True)
+            
+            col_apply, col_reset = st.columns(2)
+            with col_apply:
+                if st.button("✅ Terapkan Penyesuaian Stok", type="primary",
+                             disabled=summary['kurang'] + summary['lebih'] == 0,
+                             key="btn_opname_apply"):
+                    res = apply_stocktake(report)
+                    if res['success']:
+                        st.success(res['message'])
+                        st.session_state.opname_counts = None
+                        time.sleep(1)
+                        st.rerun()
+                    else:
+                        st.error(res['message'])
+            with col_reset:
+                if st.button("🔄 Mulai Ulang", key="btn_opname_reset"):
+                    st.session_state.opname_counts = None
+                    st.rerun()
 
 def initialize_cart():
     """Initialize cart in session state if not exists"""
@@ -796,12 +1128,38 @@ def scan_page():
             
             st.markdown("### 📷 Barcode Scanner")
             
+            auto_add = st.toggle(
+                "⚡ Scan langsung masuk cart",
+                key="scan_auto_add",
+                help="Setiap scan menambah 1 pcs ke cart. Scan ulang item yang sama = tambah jumlah"
+            )
+            
             # FIXED: Get barcode data from scanner (no auto-rerun)
-            scanned_barcode = scan_barcode_realtime()
+            scanned_barcode = scan_barcode_realtime(repeat_same=auto_add)
             
-            # If barcode detected, set it to last_scan
+            # If barcode detected, set it to last_scan (QR code berisi payload, ambil barcode_id)
             if scanned_barcode:
-                st.session_state.last_scan = scanned_barcode
+                scan_started = time.perf_counter()
+                st.session_state.last_scan = parse_qr_payload(scanned_barcode)['barcode_id']
+                
+                if auto_add:
+                    product = get_product_cached(st.session_state.last_scan)
+                    if product is not None:
+                        result = add_to_cart(product, 1)
+                    else:
+                        result = {
+                            'success': False,
+                            'message': f"❌ Produk tidak ditemukan: {st.session_state.last_scan}"
+                        }
+                    st.session_state.last_scan_latency_ms = (time.perf_counter() - scan_started) * 1000
+                    st.toast(result['message'])
+                    if result['success']:
+                        st.session_state.last_scan = None
+                    # Rerun agar komponen kamera baru langsung siap untuk scan berikutnya
+                    st.rerun()
+            
+            if st.session_state.get('last_scan_latency_ms') is not None:
+                st.caption(f"⏱️ Scan → cart: {st.session_state.last_scan_latency_ms:.1f} ms")
             
             # Status legend
             st.markdown("""
@@ -871,11 +1229,11 @@ def scan_page():
                                                    use_container_width=True)
             
             if submit_search and barcode_input.strip():
-                st.session_state.last_scan = barcode_input.strip()
+                st.session_state.last_scan = parse_qr_payload(barcode_input)['barcode_id']
                 st.rerun()
             
             if submit_add and barcode_input.strip():
-                product = get_product_by_barcode(barcode_input.strip())
+                product = get_product_cached(parse_qr_payload(barcode_input)['barcode_id'])
                 if product is not None:
                     result = add_to_cart(product, 1)
                     if result['success']:
@@ -887,12 +1245,48 @@ def scan_page():
                 else:
                     st.error(f"❌ Produk tidak ditemukan: {barcode_input.strip()}")
     
+    # === SCAN DARI FOTO (decode di server) ===
+    with st.expander("📸 Scan dari Foto / Upload Gambar", expanded=not availability['available']):
+        st.caption(
+            "Barcode dibaca di server - tidak butuh HTTPS atau akses kamera live. "
+            + ("Code128 dan QR code didukung." if OPENCV_AVAILABLE
+               else "Code128 didukung (QR code butuh opencv-python-headless).")
+        )
+        
+        tab_camera, tab_upload = st.tabs(["📷 Kamera", "📁 Upload"])
+        
+        with tab_camera:
+            photo = st.camera_input("Foto barcode", key="photo_scan_camera", label_visibility="collapsed")
+        
+        with tab_upload:
+            uploaded = st.file_uploader(
+                "Gambar barcode",
+                type=['png', 'jpg', 'jpeg', 'webp', 'bmp'],
+                key="photo_scan_upload",
+                label_visibility="collapsed"
+            )
+        
+        # Widget foto mengembalikan file yang sama di setiap rerun, decode sekali saja
+        for image_file in (photo, uploaded):
+            if image_file is None or image_file.file_id == st.session_state.get('photo_scan_last_id'):
+                continue
+            st.session_state.photo_scan_last_id = image_file.file_id
+            
+            with st.spinner("🔍 Membaca barcode..."):
+                decoded = decode_image(image_file)
+            
+            if decoded['success']:
+                st.session_state.last_scan = parse_qr_payload(decoded['data'])['barcode_id']
+                st.success(f"{decoded['message']}: {decoded['data']}")
+            else:
+                st.error(decoded['message'])
+    
     # === PRODUCT PREVIEW & QUICK ADD ===
     if st.session_state.last_scan:
         st.markdown("---")
         st.markdown("## 📦 Detail Produk Terakhir Scan")
         
-        product = get_product_by_barcode(st.session_state.last_scan)
+        product = get_product_cached(st.session_state.last_scan)
         
         if product is not None:
             col_preview, col_action = st.columns([2, 1])
@@ -919,6 +1313,10 @@ def scan_page():
                         </p>
                     </div>
                 """, unsafe_allow_html=True)
+                
+                barcode_image = render_barcode_bytes(product['barcode_id'])
+                if barcode_image:
+                    st.image(barcode_image, width=250)
             
             with col_action:
                 max_stock = int(product['stok'])
@@ -1107,7 +1505,7 @@ def scan_page():
                     result = process_checkout()
                 
                 if result['success']:
-                    st.success("### ✅ CHECKOUT BERHASIL!")
+                    st.success(f"### ✅ CHECKOUT BERHASIL! (Struk {result['struk_id']})")
                     
                     col_s1, col_s2, col_s3, col_s4 = st.columns(4)
                     
@@ -1120,6 +1518,9 @@ def scan_page():
                     with col_s4:
                         st.metric("Profit", format_currency(result['total_profit']))
                     
+                    for anomaly in result['anomalies']:
+                        st.warning(f"🚨 {anomaly['pesan']}")
+                    
                     st.session_state.last_scan = None
                     st.session_state.last_detected_barcode = None
                     
@@ -1180,6 +1581,46 @@ def laporan_page():
         mask = (transactions_df['tanggal'] >= start_date) & (transactions_df['tanggal'] <= end_date)
         filtered_df = transactions_df[mask]
         
+        # Mode perbandingan periode (dihitung dari rollup harian)
+        if st.checkbox("🔁 Bandingkan dengan periode sebelumnya & tahun lalu", key="compare_mode"):
+            comparison = compare_periods(start_date, end_date)
+            periods = comparison['periods']
+            summary = comparison['summary']
+            
+            st.subheader("🔁 Perbandingan Periode")
+            st.caption(
+                f"Sebelumnya: {periods['sebelumnya'][0]:%d/%m/%Y} - {periods['sebelumnya'][1]:%d/%m/%Y} | "
+                f"Tahun lalu: {periods['tahun_lalu'][0]:%d/%m/%Y} - {periods['tahun_lalu'][1]:%d/%m/%Y}"
+            )
+            
+            metric_labels = [
+                ('pendapatan', "Pendapatan", True),
+                ('keuntungan', "Keuntungan", True),
+                ('jumlah_transaksi', "Transaksi", False),
+                ('jumlah', "Item Terjual", False)
+            ]
+            cols = st.columns(len(metric_labels))
+            for col, (key, label, is_money) in zip(cols, metric_labels):
+                row = summary.loc[key]
+                value = format_currency(row['sekarang']) if is_money else f"{row['sekarang']:,.0f}"
+                delta = f"{row['perubahan_%']:+.1f}%" if pd.notna(row['perubahan_%']) else None
+                with col:
+                    st.metric(label, value, delta=delta)
+                    yoy = f"{row['perubahan_yoy_%']:+.1f}%" if pd.notna(row['perubahan_yoy_%']) else "-"
+                    st.caption(f"vs tahun lalu: {yoy}")
+            
+            st.dataframe(summary, use_container_width=True)
+            
+            col_cmp1, col_cmp2 = st.columns(2)
+            with col_cmp1:
+                st.markdown("#### 🚀 Top Movers Produk")
+                st.dataframe(comparison['products'], use_container_width=True, hide_index=True)
+            with col_cmp2:
+                st.markdown("#### 🗂️ Top Movers Kategori")
+                st.dataframe(comparison['categories'], use_container_width=True, hide_index=True)
+            
+            st.markdown("---")
+        
         if not filtered_df.empty:
             # Summary Statistics
             st.subheader("📈 Ringkasan Periode")
@@ -1198,11 +1639,17 @@ def laporan_page():
             st.markdown("---")
             
             # Grafik
-            tab1, tab2, tab3, tab4 = st.tabs(["📊 Penjualan", "💰 Keuntungan", "🏆 Produk Terlaris", "📋 Detail Transaksi"])
+            tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+                "📊 Penjualan", "💰 Keuntungan", "🏆 Produk Terlaris",
+                "📋 Detail Transaksi", "🧺 Analisis Keranjang", "🔠 Analisis ABC"
+            ])
             
             with tab1:
                 fig = create_sales_chart(filtered_df)
                 st.plotly_chart(fig, use_container_width=True)
+                
+                fig = create_category_revenue_chart(filtered_df, products_df)
+                st.plotly_chart(fig, use_container_width=True)
             
             with tab2:
                 fig = create_profit_chart(filtered_df)
@@ -1216,14 +1663,69 @@ def laporan_page():
                 st.dataframe(filtered_df.sort_values('waktu', ascending=False), 
                            use_container_width=True, hide_index=True)
             
+            with tab5:
+                st.markdown("#### Produk yang Sering Dibeli Bersamaan")
+                st.caption("Dihitung dari seluruh riwayat struk (tidak mengikuti filter tanggal)")
+                
+                basket_summary = get_basket_summary(transactions_df)
+                col_b1, col_b2, col_b3 = st.columns(3)
+                with col_b1:
+                    st.metric("Total Struk", basket_summary['total_baskets'])
+                with col_b2:
+                    st.metric("Rata-rata Item/Struk", f"{basket_summary['avg_items_per_basket']:.2f}")
+                with col_b3:
+                    st.metric("Pasangan Unik", basket_summary['unique_pairs'])
+                
+                col_opt1, col_opt2 = st.columns(2)
+                with col_opt1:
+                    min_count = st.number_input("Minimal jumlah struk", min_value=1, value=2, key="basket_min_count")
+                with col_opt2:
+                    sort_by = st.selectbox("Urutkan berdasarkan", ["lift", "support", "confidence", "jumlah_struk"],
+                                           key="basket_sort_by")
+                
+                pairs_df = get_association_pairs(transactions_df, min_count=min_count, sort_by=sort_by)
+                if not pairs_df.empty:
+                    st.dataframe(pairs_df.round(3), use_container_width=True, hide_index=True)
+                else:
+                    st.info("Belum ada pasangan produk yang memenuhi syarat")
+            
+            with tab6:
+                col_abc1, col_abc2 = st.columns(2)
+                with col_abc1:
+                    abc_measure = st.radio("Berdasarkan", ["Pendapatan", "Keuntungan"],
+                                           horizontal=True, key="abc_measure")
+                with col_abc2:
+                    abc_period = st.selectbox("Periode", ["Keseluruhan", "Bulanan", "Mingguan"],
+                                              key="abc_period")
+                
+                measure = 'total_harga' if abc_measure == "Pendapatan" else 'keuntungan'
+                label = 'pendapatan' if measure == 'total_harga' else 'keuntungan'
+                period = {"Keseluruhan": None, "Bulanan": "M", "Mingguan": "W"}[abc_period]
+                
+                abc_df = calculate_abc_analysis(filtered_df, period=period)
+                
+                if not abc_df.empty:
+                    if period is None:
+                        fig = create_abc_chart(abc_df, measure)
+                        st.plotly_chart(fig, use_container_width=True)
+                    
+                    if period:
+                        class_counts = abc_df.groupby('periode')[f'kelas_{label}'].value_counts().unstack(fill_value=0)
+                    else:
+                        class_counts = abc_df[f'kelas_{label}'].value_counts().to_frame().T
+                    st.dataframe(class_counts, use_container_width=True)
+                    st.dataframe(abc_df, use_container_width=True, hide_index=True)
+                    st.caption("A = 80% kontribusi teratas, B = 15% berikutnya, C = 5% sisanya")
+            
             # Export
             st.markdown("---")
             col1, col2, col3 = st.columns([1, 1, 1])
             with col2:
                 if st.button("📥 Export ke Excel", use_container_width=True):
-                    path = export_to_excel(filtered_df, "laporan_transaksi")
-                    if path:
-                        st.success(f"✅ Export berhasil: {path}")
+                    submit_job("Export laporan (Excel)", export_sales_report,
+                               args=(start_date, end_date, "laporan_transaksi"), kind='laporan')
+                    st.toast("📥 Export laporan berjalan di background")
+            render_job_panel('laporan', "🧵 Job Export Laporan")
         else:
             st.warning("⚠️ Tidak ada transaksi pada periode yang dipilih")
     else:
@@ -1244,11 +1746,8 @@ def settings_page():
         with col1:
             st.markdown("### Backup Manual")
             if st.button("💾 Backup Sekarang", use_container_width=True):
-                result = auto_backup_all()
-                if result['success']:
-                    st.success(result['message'])
-                else:
-                    st.error(result['message'])
+                submit_job("Backup data", auto_backup_all, kind='pengaturan')
+                st.toast("💾 Backup berjalan di background")
         
         with col2:
             st.markdown("### Bersihkan Backup Lama")
@@ -1260,21 +1759,108 @@ def settings_page():
                 else:
                     st.error(result['message'])
         
-        # List backup files
+        # Daftar snapshot di store backup (chunk terdeduplikasi)
         st.markdown("---")
         st.subheader("Daftar Backup")
+        snapshots = list_snapshots()
+        if snapshots:
+            stats = get_backup_store_stats()
+            st.caption(
+                f"{stats['snapshots']} backup | isi {stats['logical_bytes'] / 1024 / 1024:.2f} MB, "
+                f"tersimpan {stats['stored_bytes'] / 1024 / 1024:.2f} MB ({stats['chunks']} chunk)"
+            )
+            st.dataframe(pd.DataFrame([
+                {
+                    'backup_id': snap['backup_id'],
+                    'waktu': pd.Timestamp(snap['created']).strftime('%Y-%m-%d %H:%M:%S'),
+                    'label': snap['label'],
+                    'produk': snap['files'].get(PRODUCTS_FILE, {}).get('rows'),
+                    'transaksi': snap['files'].get(TRANSACTIONS_FILE, {}).get('rows'),
+                    'ukuran_kb': round(snap['total_bytes'] / 1024, 1)
+                }
+                for snap in snapshots
+            ]), use_container_width=True, hide_index=True)
+            
+            backup_id = st.selectbox("Pilih backup", [snap['backup_id'] for snap in snapshots])
+            rc1, rc2 = st.columns(2)
+            if rc1.button("🔍 Verifikasi Backup", use_container_width=True):
+                result = verify_snapshot(backup_id)
+                if result['success']:
+                    st.success(result['message'])
+                else:
+                    st.error(result['message'])
+                    for error in result['errors']:
+                        st.caption(error)
+            confirm_restore = rc2.checkbox("Saya yakin ingin mengganti data saat ini")
+            if rc2.button("♻️ Restore Backup", use_container_width=True, disabled=not confirm_restore):
+                result = restore_snapshot(backup_id)
+                if result['success']:
+                    st.success(result['message'])
+                    if result.get('safety_backup_id'):
+                        st.caption(f"Data sebelum restore disimpan di backup {result['safety_backup_id']}")
+                else:
+                    st.error(result['message'])
+            
+            # Restore ke waktu tertentu: backup terdekat + replay journal perubahan
+            st.markdown("### ⏪ Restore ke Waktu Tertentu")
+            pc1, pc2, pc3 = st.columns([2, 2, 1])
+            with pc1:
+                pitr_date = st.date_input("Tanggal", value=datetime.now().date(), key="pitr_date")
+            with pc2:
+                pitr_time = st.time_input("Jam", value=datetime.now().time().replace(microsecond=0),
+                                          key="pitr_time", step=60)
+            with pc3:
+                st.write("")
+                st.write("")
+                if st.button("🔎 Preview", use_container_width=True):
+                    discard_restore_plan(st.session_state.get('pitr_plan'))
+                    plan = preview_point_in_time_restore(datetime.combine(pitr_date, pitr_time))
+                    st.session_state.pitr_plan = plan if plan['success'] else None
+                    if not plan['success']:
+                        st.error(plan['message'])
+            
+            plan = st.session_state.get('pitr_plan')
+            if plan:
+                st.info(f"📋 {plan['message']}")
+                st.dataframe(pd.DataFrame([
+                    {
+                        'file': path,
+                        'baris_sekarang': info['rows_now'],
+                        'baris_setelah_restore': info['rows_restored'],
+                        'selisih': info['rows_restored'] - info['rows_now']
+                    }
+                    for path, info in plan['files'].items()
+                ]), use_container_width=True, hide_index=True)
+                
+                ac1, ac2 = st.columns(2)
+                confirm_pitr = ac1.checkbox("Saya yakin ingin mengganti data dengan hasil preview")
+                if ac1.button("⏪ Terapkan Restore", use_container_width=True, disabled=not confirm_pitr):
+                    result = apply_point_in_time_restore(plan)
+                    if result['success']:
+                        st.session_state.pitr_plan = None
+                        st.success(result['message'])
+                        if result.get('safety_backup_id'):
+                            st.caption(f"Data sebelum restore disimpan di backup {result['safety_backup_id']}")
+                    else:
+                        st.error(result['message'])
+                if ac2.button("✖️ Batal", use_container_width=True):
+                    discard_restore_plan(plan)
+                    st.session_state.pitr_plan = None
+                    st.rerun()
+        else:
+            st.info("Belum ada backup")
+        
+        # Salinan penuh format lama (sebelum store backup dipakai)
         backup_folder = "data/backup"
-        if os.path.exists(backup_folder):
-            files = os.listdir(backup_folder)
-            if files:
-                for file in sorted(files, reverse=True):
+        legacy_files = [
+            f for f in os.listdir(backup_folder) if os.path.isfile(os.path.join(backup_folder, f))
+        ] if os.path.exists(backup_folder) else []
+        if legacy_files:
+            with st.expander(f"📄 Backup lama ({len(legacy_files)} file salinan penuh)"):
+                for file in sorted(legacy_files, reverse=True):
                     file_path = os.path.join(backup_folder, file)
                     file_time = datetime.fromtimestamp(os.path.getmtime(file_path))
                     st.text(f"📄 {file} - {file_time.strftime('%Y-%m-%d %H:%M:%S')}")
-            else:
-                st.info("Belum ada backup")
-        else:
-            st.info("Folder backup belum ada")
     
     # Tab Export
     with tab2:
@@ -1290,18 +1876,26 @@ def settings_page():
             if not products_df.empty:
                 st.write(f"Total: {len(products_df)} produk")
                 if st.button("📥 Export Produk (Excel)", use_container_width=True):
-                    path = export_to_excel(products_df, "products")
-                    if path:
-                        st.success(f"✅ Export berhasil: {path}")
+                    submit_job("Export produk (Excel)", export_to_excel, args=(products_df, "products"),
+                               kind='pengaturan')
+                    st.toast("📥 Export produk berjalan di background")
         
         with col2:
             st.markdown("### Data Transaksi")
             if not transactions_df.empty:
                 st.write(f"Total: {len(transactions_df)} transaksi")
                 if st.button("📥 Export Transaksi (Excel)", use_container_width=True):
-                    path = export_to_excel(transactions_df, "transactions")
-                    if path:
-                        st.success(f"✅ Export berhasil: {path}")
+                    submit_job("Export transaksi (Excel)", export_sales_report,
+                               kwargs={'filename_prefix': "transactions"}, kind='pengaturan')
+                    st.toast("📥 Export transaksi berjalan di background")
+                st.caption("Sheet: Ringkasan, Harian, Per Produk, Transaksi")
+        
+        st.markdown("### Barcode Package")
+        st.caption("Excel info produk + semua gambar barcode di data/barcode_exports")
+        if st.button("📦 Buat Barcode Package", use_container_width=True):
+            package_name = f"barcode_package_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            submit_job("Barcode package", create_barcode_package, args=(package_name,), kind='pengaturan')
+            st.toast("📦 Barcode package dibuat di background")
     
     # Tab Info
     with tab3:
@@ -1346,7 +1940,7 @@ def settings_page():
             st.metric("Total Transaksi", len(transactions_df))
             
             if not transactions_df.empty:
-                total_revenue = transactions_df['total_harga'].sum()
+                total_revenue = aggregate(['pendapatan'])['pendapatan'].iloc[0]
                 st.metric("Total Pendapatan All Time", format_currency(total_revenue))
         
         st.markdown("---")
@@ -1380,12 +1974,23 @@ def settings_page():
         ---
         *© 2024 Kantin Sekolah Manager - All Rights Reserved*
         """)
+    
+    # Job background (backup, export, package) tampil di bawah semua tab
+    st.markdown("---")
+    render_job_panel('pengaturan')
 
 # Main application
 def main():
     load_custom_css()
     init_session_state()
     
+    # Migrasi satu kali: lengkapi kategori & harga_modal transaksi lama
+    if 'transaction_migration_done' not in st.session_state:
+        result = migrate_transaction_attributes()
+        if not result['success']:
+            print(f"⚠️ Migrasi transaksi gagal: {result['message']}")
+        st.session_state.transaction_migration_done = True
+    
     if not st.session_state.logged_in:
         login_page()
         return
@@ -1404,6 +2009,25 @@ def main():
             low_stock = len(products_df[products_df['stok'] < 10])
             if low_stock > 0:
                 st.warning(f"⚠️ {low_stock} stok menipis")
+            
+            reorder_count = len(get_reorder_list(products_df))
+            if reorder_count > 0:
+                st.error(f"🔮 {reorder_count} produk perlu reorder")
+        
+        # Alert anomali penjualan (dibaca dari state detektor, bukan file transaksi)
+        recent_alerts = get_recent_alerts()
+        missing_sales = check_missing_sales()
+        if recent_alerts or missing_sales:
+            with st.expander(f"🚨 Anomali ({len(recent_alerts) + len(missing_sales)})"):
+                for alert in recent_alerts:
+                    st.caption(f"{alert['waktu']}")
+                    st.write(f"- {alert['pesan']}")
+                for item in missing_sales:
+                    st.write(f"- **{item['nama_produk']}** tidak terjual {item['jam_sejak_terjual']} jam "
+                             f"(normal: {item['interval_normal']} jam)")
+                if recent_alerts and st.button("✔️ Tandai sudah dicek", use_container_width=True):
+                    clear_alerts()
+                    st.rerun()
         
         st.markdown("---")
         
@@ -1424,11 +2048,8 @@ def main():
         st.markdown("### ⚡ Quick Actions")
         
         if st.button("💾 Backup Data", use_container_width=True):
-            result = auto_backup_all()
-            if result['success']:
-                st.success("✅ Backup berhasil!")
-            else:
-                st.error("❌ Backup gagal!")
+            submit_job("Backup data", auto_backup_all, kind='pengaturan')
+            st.toast("💾 Backup berjalan di background, status di menu Pengaturan")
         
         st.markdown("---")
         
@@ -1,189 +1,304 @@
 """
 Script untuk Generate Barcode Secara Batch dari CSV
-Jalankan: python generate_barcodes_from_csv.py
+Jalankan: python generate_barcodes_from_csv.py [csv_path] [--force] [--format png|svg]
+          [--workers N] [--no-prune] [--dry-run] [--json]
 
 Fitur:
 - Generate barcode dari products.csv
-- Skip barcode yang sudah ada
-- Progress bar
-- Summary report
+- Skip barcode yang labelnya tidak berubah (manifest render, satu kali scan folder)
+- Validasi barcode sebelum render (charset Code128, digit cek EAN-13/UPC-A, duplikat)
+- Hapus gambar barcode produk yang sudah tidak ada
+- Generate paralel (process pool) dengan progress bar
+- Output PNG atau SVG (vektor, tanpa rasterisasi)
+- Tanpa input() sehingga bisa dijalankan terjadwal (cron/Task Scheduler)
+- Summary report, atau JSON dengan --json
+
+Exit code:
+    0 = berhasil (termasuk jika tidak ada yang perlu di-generate)
+    1 = sebagian barcode ditolak validasi atau gagal di-generate
+    2 = argumen atau file CSV tidak valid
 """
 
-import pandas as pd
+import argparse
+import json
 import os
-import barcode
-from barcode.writer import ImageWriter
+import sys
+import time
+
+import pandas as pd
 from tqdm import tqdm
 
-def generate_single_barcode(barcode_id, product_name):
-    """
-    Generate single barcode
-    """
-    try:
-        # Buat folder barcodes jika belum ada
-        os.makedirs("barcodes", exist_ok=True)
-        
-        # Generate barcode Code128
-        code128 = barcode.get_barcode_class('code128')
-        barcode_instance = code128(barcode_id, writer=ImageWriter())
-        
-        # Simpan barcode
-        filename = f"barcodes/{barcode_id}"
-        full_path = barcode_instance.save(filename)
-        
-        return {
-            'success': True,
-            'path': full_path
-        }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e)
-        }
+from modules.barcode_handler import (
+    plan_barcode_render, sync_barcodes, validate_barcodes, BARCODE_IMAGE_FORMATS, BARCODES_FOLDER
+)
 
-def check_existing_barcode(barcode_id):
-    """
-    Check if barcode already exists
-    """
-    barcode_path = f"barcodes/{barcode_id}.png"
-    return os.path.exists(barcode_path)
+EXIT_OK = 0
+EXIT_FAILED_ITEMS = 1
+EXIT_INVALID_INPUT = 2
 
-def generate_barcodes_from_csv(csv_path="data/products.csv", skip_existing=True):
+DEFAULT_CSV_PATH = "data/products.csv"
+DEFAULT_OUTPUT_FOLDER = BARCODES_FOLDER
+
+def generate_barcodes_from_csv(csv_path=DEFAULT_CSV_PATH, skip_existing=True, prune=True,
+                               image_format="png", output_folder=DEFAULT_OUTPUT_FOLDER,
+                               max_workers=None, dry_run=False, verbose=True):
     """
     Generate barcodes from CSV file
     
     Args:
         csv_path: Path to products CSV
-        skip_existing: Skip if barcode already exists
+        skip_existing: Skip if barcode label is unchanged (False = render ulang semua)
+        prune: Remove barcode images of products not in the CSV
+        image_format: 'png' or 'svg'
+        output_folder: Folder output gambar barcode
+        max_workers: Jumlah process worker (default jumlah CPU)
+        dry_run: Hanya hitung rencana, tidak menulis/menghapus file
+        verbose: Cetak laporan dan progress bar
+    
+    Returns:
+        dict: Summary (success, exit_code, total, rendered, skipped, removed,
+              failed_items, elapsed_seconds, message, ...)
     """
-    print("=" * 60)
-    print("🏷️  BATCH BARCODE GENERATOR")
-    print("=" * 60)
-    print()
+    started = time.perf_counter()
+    log = print if verbose else (lambda *args, **kwargs: None)
+    
+    summary = {
+        'success': False,
+        'exit_code': EXIT_INVALID_INPUT,
+        'csv_path': csv_path,
+        'output_folder': os.path.abspath(output_folder),
+        'image_format': image_format,
+        'dry_run': dry_run,
+        'total': 0,
+        'to_render': 0,
+        'rendered': 0,
+        'skipped': 0,
+        'removed': [],
+        'rejected': [],
+        'warnings': [],
+        'failed_items': [],
+        'elapsed_seconds': 0.0,
+        'message': ''
+    }
+    
+    def finish(exit_code, message):
+        summary['exit_code'] = exit_code
+        summary['success'] = exit_code == EXIT_OK
+        summary['message'] = message
+        summary['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return summary
+    
+    log("=" * 60)
+    log("🏷️  BATCH BARCODE GENERATOR")
+    log("=" * 60)
+    log()
     
     # Check if CSV exists
     if not os.path.exists(csv_path):
-        print(f"❌ Error: File {csv_path} tidak ditemukan!")
-        print(f"💡 Pastikan file CSV ada di lokasi: {os.path.abspath(csv_path)}")
-        return
+        log(f"❌ Error: File {csv_path} tidak ditemukan!")
+        log(f"💡 Pastikan file CSV ada di lokasi: {os.path.abspath(csv_path)}")
+        return finish(EXIT_INVALID_INPUT, f"File {csv_path} tidak ditemukan")
     
     # Load CSV
-    print(f"📂 Membaca file: {csv_path}")
+    log(f"📂 Membaca file: {csv_path}")
     try:
         df = pd.read_csv(csv_path)
-        print(f"✅ Berhasil load {len(df)} produk\n")
+        log(f"✅ Berhasil load {len(df)} produk\n")
     except Exception as e:
-        print(f"❌ Error membaca CSV: {e}")
-        return
+        log(f"❌ Error membaca CSV: {e}")
+        return finish(EXIT_INVALID_INPUT, f"Error membaca CSV: {e}")
     
     # Validate columns
     required_columns = ['barcode_id', 'nama_produk']
     if not all(col in df.columns for col in required_columns):
-        print(f"❌ Error: CSV harus memiliki kolom: {required_columns}")
-        print(f"📋 Kolom yang ada: {df.columns.tolist()}")
-        return
-    
-    # Statistics
-    total_products = len(df)
-    existing_count = 0
-    to_generate = []
-    
-    print("🔍 Checking existing barcodes...")
-    for idx, row in df.iterrows():
-        if check_existing_barcode(row['barcode_id']):
-            existing_count += 1
-        else:
-            to_generate.append(row)
-    
-    print(f"\n📊 Status:")
-    print(f"   Total Produk: {total_products}")
-    print(f"   ✅ Sudah Ada: {existing_count}")
-    print(f"   🏷️  Perlu Generate: {len(to_generate)}")
-    print()
+        log(f"❌ Error: CSV harus memiliki kolom: {required_columns}")
+        log(f"📋 Kolom yang ada: {df.columns.tolist()}")
+        return finish(EXIT_INVALID_INPUT, f"CSV harus memiliki kolom: {required_columns}")
     
-    # Skip if all exist
-    if len(to_generate) == 0:
-        print("✅ Semua barcode sudah ada!")
-        print(f"📁 Lokasi: {os.path.abspath('barcodes/')}")
-        return
+    # Validasi semua barcode sekaligus, baris tidak valid tidak dirender
+    validation = validate_barcodes(df['barcode_id'])
+    rejected = validation[~validation['valid']]
+    near_duplicates = validation[validation['valid'] & (validation['mirip_dengan'] != '')]
+    summary['rejected'] = rejected[['barcode_id', 'error']].to_dict('records')
+    summary['warnings'] = [
+        f"{row['barcode_id']} mirip dengan {row['mirip_dengan']}"
+        for row in near_duplicates.to_dict('records')
+    ]
+    
+    if not rejected.empty:
+        log(f"⚠️  {len(rejected)} barcode tidak valid (dilewati):")
+        for row in summary['rejected']:
+            log(f"   - {row['barcode_id'] or '(kosong)'}: {row['error']}")
+        log()
+    for warning in summary['warnings']:
+        log(f"💡 Hampir sama: {warning}")
+    
+    # Statistics (satu kali scan folder, dibandingkan dengan manifest render)
+    # Orphan dihitung dari seluruh katalog, barcode yang ditolak hanya tidak dirender
+    barcode_ids = validation['barcode_id'].tolist()
+    excluded_ids = set(barcode_ids) - set(validation.loc[validation['valid'], 'barcode_id'])
+    force = not skip_existing
+    summary['total'] = len(df)
+    
+    log("🔍 Checking existing barcodes...")
+    plan = plan_barcode_render(barcode_ids, output_folder=output_folder, force=force,
+                               image_format=image_format, exclude=excluded_ids)
+    to_generate = plan['to_render']
+    orphans = (plan['orphans'] + plan['stale_files']) if prune else []
+    summary['to_render'] = len(to_generate)
     
-    # Ask confirmation if not skipping existing
-    if not skip_existing:
-        response = input(f"\n⚠️  Generate ulang {existing_count} barcode yang sudah ada? (y/n): ")
-        if response.lower() == 'y':
-            to_generate = df.to_dict('records')
+    log(f"\n📊 Status:")
+    log(f"   Total Produk: {len(df)}")
+    log(f"   ⛔ Tidak Valid: {len(rejected)}")
+    log(f"   ✅ Sudah Ada: {len(plan['unchanged'])}")
+    log(f"   🏷️  Perlu Generate: {len(to_generate)}")
+    log(f"   🗑️  Gambar Yatim: {len(orphans)}")
+    log()
+    
+    # Baris yang ditolak validasi membuat exit code 1 walau render berhasil
+    done_code = EXIT_FAILED_ITEMS if len(rejected) else EXIT_OK
+    rejected_note = f", {len(rejected)} barcode tidak valid" if len(rejected) else ""
+    
+    if dry_run:
+        summary['skipped'] = len(plan['unchanged'])
+        summary['removed'] = sorted(orphans)
+        log("🧪 Dry run: tidak ada file yang ditulis atau dihapus")
+        return finish(done_code, f"Dry run: {len(to_generate)} perlu generate, {len(orphans)} akan dihapus{rejected_note}")
+    
+    # Skip if all exist
+    if len(to_generate) == 0 and not orphans:
+        summary['skipped'] = len(plan['unchanged'])
+        log("✅ Semua barcode sudah ada!")
+        log(f"📁 Lokasi: {summary['output_folder']}")
+        return finish(done_code, f"Semua barcode sudah terbaru{rejected_note}")
     
     # Generate barcodes
-    print(f"\n🚀 Memulai generate {len(to_generate)} barcode...")
-    print()
-    
-    success_count = 0
-    failed_items = []
-    
-    # Progress bar
-    for item in tqdm(to_generate, desc="Generating", unit="barcode"):
-        result = generate_single_barcode(item['barcode_id'], item['nama_produk'])
-        
-        if result['success']:
-            success_count += 1
-        else:
-            failed_items.append({
-                'barcode_id': item['barcode_id'],
-                'error': result['error']
-            })
+    log(f"\n🚀 Memulai generate {len(to_generate)} barcode ({image_format.upper()})...")
+    log()
+    
+    # Progress bar (generate paralel dengan process pool)
+    with tqdm(total=len(to_generate), desc="Generating", unit="barcode", disable=not verbose) as pbar:
+        result = sync_barcodes(
+            barcode_ids,
+            output_folder=output_folder,
+            force=force,
+            prune=prune,
+            max_workers=max_workers,
+            progress_callback=lambda done, total: pbar.update(done - pbar.n),
+            image_format=image_format,
+            plan=plan
+        )
+    
+    success_count = result['rendered']
+    failed_items = result['failed_items']
+    summary['rendered'] = success_count
+    summary['skipped'] = result['skipped']
+    summary['removed'] = result['removed']
+    summary['failed_items'] = failed_items
     
     # Summary
-    print()
-    print("=" * 60)
-    print("📊 SUMMARY REPORT")
-    print("=" * 60)
-    print(f"✅ Berhasil: {success_count}")
-    print(f"❌ Gagal: {len(failed_items)}")
-    print(f"📁 Lokasi: {os.path.abspath('barcodes/')}")
-    print()
+    log()
+    log("=" * 60)
+    log("📊 SUMMARY REPORT")
+    log("=" * 60)
+    log(f"✅ Berhasil: {success_count}")
+    log(f"⏭️  Tidak Berubah: {result['skipped']}")
+    log(f"🗑️  Dihapus: {len(result['removed'])}")
+    log(f"⛔ Tidak Valid: {len(rejected)}")
+    log(f"❌ Gagal: {len(failed_items)}")
+    log(f"📁 Lokasi: {summary['output_folder']}")
+    log()
     
     # Show failed items
     if failed_items:
-        print("❌ Item yang Gagal:")
+        log("❌ Item yang Gagal:")
         for item in failed_items:
-            print(f"   - {item['barcode_id']}: {item['error']}")
-        print()
+            log(f"   - {item['barcode_id']}: {item['error']}")
+        log()
     
     # Success message
     if success_count > 0:
-        print("🎉 Generate barcode selesai!")
-        print()
-        print("📋 Langkah selanjutnya:")
-        print("   1. Cek folder 'barcodes/' untuk melihat hasil")
-        print("   2. Print barcode yang dibutuhkan")
-        print("   3. Tempelkan pada produk")
-        print("   4. Scan di aplikasi untuk transaksi")
-    
-    print()
-    print("=" * 60)
+        log("🎉 Generate barcode selesai!")
+        log()
+        log("📋 Langkah selanjutnya:")
+        log(f"   1. Cek folder '{output_folder}' untuk melihat hasil")
+        log("   2. Print barcode yang dibutuhkan")
+        log("   3. Tempelkan pada produk")
+        log("   4. Scan di aplikasi untuk transaksi")
+    
+    log()
+    log("=" * 60)
+    
+    if failed_items:
+        return finish(EXIT_FAILED_ITEMS, f"{len(failed_items)} barcode gagal di-generate{rejected_note}")
+    return finish(done_code, f"{success_count} barcode di-generate, {len(result['removed'])} dihapus{rejected_note}")
 
-def main():
+def build_parser():
     """
-    Main function
+    Argument parser CLI
+    
+    Returns:
+        ArgumentParser: Parser argumen
     """
-    import sys
+    parser = argparse.ArgumentParser(
+        description="Generate barcode produk dari CSV (incremental, paralel, tanpa input interaktif)"
+    )
+    parser.add_argument("csv_path", nargs="?", default=DEFAULT_CSV_PATH,
+                        help=f"Path CSV produk (default: {DEFAULT_CSV_PATH})")
+    # Kompatibilitas format lama: [csv_path] [force|skip] [png|svg]
+    parser.add_argument("legacy_mode", nargs="?", choices=["force", "skip"], help=argparse.SUPPRESS)
+    parser.add_argument("legacy_format", nargs="?", choices=BARCODE_IMAGE_FORMATS, help=argparse.SUPPRESS)
+    parser.add_argument("--force", action="store_true",
+                        help="Render ulang semua barcode walaupun label tidak berubah")
+    parser.add_argument("--format", dest="image_format", choices=BARCODE_IMAGE_FORMATS,
+                        help="Format gambar (default: png)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_FOLDER,
+                        help=f"Folder output (default: {DEFAULT_OUTPUT_FOLDER})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Jumlah process worker (default: jumlah CPU)")
+    parser.add_argument("--no-prune", action="store_true",
+                        help="Jangan hapus gambar barcode produk yang sudah tidak ada")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Tampilkan rencana tanpa menulis/menghapus file")
+    parser.add_argument("--json", action="store_true",
+                        help="Cetak summary JSON ke stdout (tanpa laporan dan progress bar)")
+    return parser
+
+def main(argv=None):
+    """
+    Main function
     
-    # Check arguments
-    csv_path = "data/products.csv"
-    skip_existing = True
+    Args:
+        argv: List argumen (default sys.argv)
+    
+    Returns:
+        int: Exit code
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
     
-    if len(sys.argv) > 1:
-        csv_path = sys.argv[1]
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers harus >= 1")
     
-    if len(sys.argv) > 2:
-        skip_existing = sys.argv[2].lower() != 'force'
+    force = args.force or args.legacy_mode == "force"
+    image_format = args.image_format or args.legacy_format or "png"
     
     # Run generator
-    generate_barcodes_from_csv(csv_path, skip_existing)
+    summary = generate_barcodes_from_csv(
+        args.csv_path,
+        skip_existing=not force,
+        prune=not args.no_prune,
+        image_format=image_format,
+        output_folder=args.output,
+        max_workers=args.workers,
+        dry_run=args.dry_run,
+        verbose=not args.json
+    )
+    
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
     
-    # Wait for enter
-    input("\nTekan Enter untuk keluar...")
+    return summary['exit_code']
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -1,97 +1,158 @@
 """
 Package modules untuk Aplikasi Kantin Sekolah
 Berisi fungsi-fungsi CRUD, Barcode, Chart, dan Utilities
+
+Submodule di-import saat fungsi pertama kali diakses (PEP 562), sehingga
+`import modules` tidak ikut memuat plotly, streamlit, barcode atau qrcode
 """
 
+import importlib
+
 __version__ = "1.0.0"
 __author__ = "Tim Proyek Kantin Sekolah"
 
-# Import fungsi utama untuk memudahkan akses
-from .data_handler import (
-    load_products_data,
-    save_products_data,
-    load_transactions_data,
-    save_transactions_data,
-    add_product,
-    update_product,
-    delete_product,
-    get_product_by_barcode,
-    search_product,
-    reduce_stock,
-    add_stock
-)
-
-# FIXED: Import barcode handler dengan error handling
-try:
-    from .barcode_handler import (
-        generate_barcode,
-        generate_batch_barcodes,
-        check_scanner_availability,
-        validate_barcode_format
-    )
-    BARCODE_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️ Warning: Barcode module not fully loaded - {e}")
-    BARCODE_AVAILABLE = False
+# Nama fungsi yang diekspor -> submodule asalnya
+_LAZY_EXPORTS = {
+    # Data Handler
+    'load_products_data': 'data_handler',
+    'save_products_data': 'data_handler',
+    'load_transactions_data': 'data_handler',
+    'save_transactions_data': 'data_handler',
+    'add_product': 'data_handler',
+    'update_product': 'data_handler',
+    'delete_product': 'data_handler',
+    'get_product_by_barcode': 'data_handler',
+    'search_product': 'data_handler',
+    'reduce_stock': 'data_handler',
+    'add_stock': 'data_handler',
+    'add_transactions_batch': 'data_handler',
+    'set_stock_bulk': 'data_handler',
+    'get_product_cached': 'data_handler',
     
-    # Define dummy functions jika import gagal
-    def generate_barcode(barcode_id, product_name):
-        return None
+    # Barcode Handler
+    'generate_barcode': 'barcode_handler',
+    'generate_batch_barcodes': 'barcode_handler',
+    'check_scanner_availability': 'barcode_handler',
+    'validate_barcode_format': 'barcode_handler',
+    'render_barcode_bytes': 'barcode_handler',
+    'validate_barcodes': 'barcode_handler',
     
-    def generate_batch_barcodes(products_df):
-        return {'success': False, 'message': 'Barcode module not available'}
+    # Chart Handler
+    'create_stock_chart': 'chart_handler',
+    'create_sales_chart': 'chart_handler',
+    'create_profit_chart': 'chart_handler',
+    'calculate_statistics': 'chart_handler',
+    'calculate_abc_analysis': 'chart_handler',
     
-    def check_scanner_availability():
-        return {'available': False, 'message': 'Scanner not available'}
+    # Basket Handler
+    'get_association_pairs': 'basket_handler',
+    'get_basket_summary': 'basket_handler',
     
-    def validate_barcode_format(barcode_id):
-        return True
-
-from .chart_handler import (
-    create_stock_chart,
-    create_sales_chart,
-    create_profit_chart,
-    calculate_statistics
-)
-
-from .utils import (
-    validate_number,
-    validate_not_empty,
-    format_currency,
-    create_backup,
-    export_to_excel
-)
-
-__all__ = [
-    # Data Handler
-    'load_products_data',
-    'save_products_data',
-    'load_transactions_data',
-    'save_transactions_data',
-    'add_product',
-    'update_product',
-    'delete_product',
-    'get_product_by_barcode',
-    'search_product',
-    'reduce_stock',
-    'add_stock',
+    # Forecast Handler
+    'calculate_reorder_suggestions': 'forecast_handler',
+    'get_reorder_list': 'forecast_handler',
     
-    # Barcode Handler
-    'generate_barcode',
-    'generate_batch_barcodes',
-    'check_scanner_availability',
-    'validate_barcode_format',
+    # Query Handler
+    'aggregate': 'query_handler',
     
-    # Chart Handler
-    'create_stock_chart',
-    'create_sales_chart',
-    'create_profit_chart',
-    'calculate_statistics',
+    # Label Handler
+    'create_label_sheet_pdf': 'label_handler',
+    
+    # Decode Handler
+    'decode_image': 'decode_handler',
+    
+    # Stocktake Handler
+    'decode_stocktake_images': 'stocktake_handler',
+    'build_variance_report': 'stocktake_handler',
+    'apply_stocktake': 'stocktake_handler',
+    
+    # Backup Handler
+    'create_snapshot': 'backup_handler',
+    'list_snapshots': 'backup_handler',
+    'verify_snapshot': 'backup_handler',
+    'restore_snapshot': 'backup_handler',
+    'preview_point_in_time_restore': 'backup_handler',
+    'apply_point_in_time_restore': 'backup_handler',
+    
+    # Report Handler
+    'export_sales_report': 'report_handler',
     
     # Utils
-    'validate_number',
-    'validate_not_empty',
-    'format_currency',
-    'create_backup',
-    'export_to_excel'
-]
\ No newline at end of file
+    'validate_number': 'utils',
+    'validate_not_empty': 'utils',
+    'format_currency': 'utils',
+    'create_backup': 'utils',
+    'export_to_excel': 'utils',
+    'render_qrcode_bytes': 'utils'
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+# ==================== FALLBACK BARCODE ====================
+
+# Dipakai jika barcode handler gagal di-import (library barcode belum terpasang)
+
+def _dummy_generate_barcode(barcode_id, product_name, force=False, image_format=None):
+    return None
+
+def _dummy_generate_batch_barcodes(products_df, progress_callback=None, max_workers=None,
+                                   force=False, prune=False, image_format=None):
+    return {'success': False, 'message': 'Barcode module not available'}
+
+def _dummy_check_scanner_availability():
+    return {'available': False, 'message': 'Scanner not available'}
+
+def _dummy_validate_barcode_format(barcode_id):
+    return True
+
+def _dummy_render_barcode_bytes(barcode_id, image_format='png'):
+    return None
+
+def _dummy_validate_barcodes(barcode_ids):
+    import pandas as pd
+    codes = pd.Series(barcode_ids, dtype='object').fillna('').astype(str)
+    return pd.DataFrame({'barcode_id': codes, 'jenis': 'CODE128', 'valid': True,
+                         'error': '', 'mirip_dengan': ''})
+
+_BARCODE_FALLBACKS = {
+    'generate_barcode': _dummy_generate_barcode,
+    'generate_batch_barcodes': _dummy_generate_batch_barcodes,
+    'check_scanner_availability': _dummy_check_scanner_availability,
+    'validate_barcode_format': _dummy_validate_barcode_format,
+    'render_barcode_bytes': _dummy_render_barcode_bytes,
+    'validate_barcodes': _dummy_validate_barcodes
+}
+
+# ==================== LAZY IMPORT ====================
+
+def _barcode_available():
+    """Cek apakah barcode handler bisa di-import"""
+    try:
+        importlib.import_module('.barcode_handler', __name__)
+        return True
+    except ImportError as e:
+        print(f"⚠️ Warning: Barcode module not fully loaded - {e}")
+        return False
+
+def __getattr__(name):
+    """Import submodule saat atribut pertama kali diakses, lalu simpan di namespace package"""
+    if name == 'BARCODE_AVAILABLE':
+        value = _barcode_available()
+    elif name in _LAZY_EXPORTS:
+        module_name = _LAZY_EXPORTS[name]
+        try:
+            module = importlib.import_module(f'.{module_name}', __name__)
+            value = getattr(module, name)
+        except ImportError:
+            if module_name != 'barcode_handler':
+                raise
+            print(f"⚠️ Warning: Barcode module not fully loaded - {name}")
+            value = _BARCODE_FALLBACKS[name]
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | {'BARCODE_AVAILABLE'})
@@ -0,0 +1,298 @@
+"""
+Module untuk deteksi anomali penjualan secara streaming
+Dijalankan saat checkout: setiap kunci (produk, jam) hanya menyimpan
+rata-rata dan varians EWMA sehingga tidak perlu memindai file transaksi
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+
+# File state detektor dan daftar alert terbaru
+ANOMALY_STATE_FILE = "data/anomaly_state.json"
+
+# Parameter detektor
+EWMA_ALPHA = 0.1
+Z_THRESHOLD = 3.0
+MIN_OBSERVATIONS = 5
+PRICE_TOLERANCE = 0.01
+MISSING_SALES_FACTOR = 4.0
+MISSING_SALES_MIN_HOURS = 2.0
+MAX_ALERTS = 50
+
+# Jam dan hari buka kantin (weekday: 0 = Senin). Interval antar penjualan
+# hanya dipelajari dalam satu hari buka, dan cek produk tidak terjual hanya
+# berjalan saat kantin buka, agar malam dan akhir pekan tidak dihitung
+TRADING_START_HOUR = 6
+TRADING_END_HOUR = 16
+TRADING_WEEKDAYS = (0, 1, 2, 3, 4, 5)
+
+# Cache state di memori, dibaca ulang hanya jika file berubah
+_STATE_CACHE = {
+    'mtime': None,
+    'state': None
+}
+
+# ==================== FUNGSI STATE ====================
+
+def _empty_state():
+    """State kosong detektor"""
+    return {
+        'stats': {},
+        'last_sale': {},
+        'names': {},
+        'alerts': []
+    }
+
+def load_anomaly_state():
+    """
+    Fungsi untuk memuat state detektor anomali
+    
+    Returns:
+        dict: State detektor
+    """
+    try:
+        mtime = os.path.getmtime(ANOMALY_STATE_FILE)
+    except OSError:
+        return _empty_state()
+    
+    if mtime != _STATE_CACHE['mtime']:
+        try:
+            with open(ANOMALY_STATE_FILE, 'r', encoding='utf-8') as f:
+                _STATE_CACHE['state'] = json.load(f)
+            _STATE_CACHE['mtime'] = mtime
+        except (OSError, ValueError) as e:
+            print(f"Error loading anomaly state: {e}")
+            return _empty_state()
+    
+    return _STATE_CACHE['state']
+
+def save_anomaly_state(state):
+    """
+    Fungsi untuk menyimpan state detektor anomali
+    
+    Args:
+        state: State detektor
+    
+    Returns:
+        bool: True jika berhasil
+    """
+    try:
+        os.makedirs(os.path.dirname(ANOMALY_STATE_FILE), exist_ok=True)
+        temp_file = ANOMALY_STATE_FILE + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_file, ANOMALY_STATE_FILE)
+        
+        _STATE_CACHE['mtime'] = os.path.getmtime(ANOMALY_STATE_FILE)
+        _STATE_CACHE['state'] = state
+        return True
+    except OSError as e:
+        print(f"Error saving anomaly state: {e}")
+        return False
+
+# ==================== FUNGSI EWMA ====================
+
+def _update_ewma(stats, key, value, alpha=EWMA_ALPHA):
+    """
+    Fungsi untuk memperbarui rata-rata/varians EWMA sebuah kunci
+    dan menghitung z-score nilai baru terhadap statistik sebelumnya
+    
+    Args:
+        stats: Dict statistik {key: [n, mean, var]}
+        key: Kunci statistik
+        value: Nilai observasi baru
+        alpha: Faktor smoothing
+    
+    Returns:
+        float atau None: z-score (None jika observasi belum cukup)
+    """
+    n, mean, var = stats.get(key, [0, 0.0, 0.0])
+    value = float(value)
+    
+    z_score = None
+    if n >= MIN_OBSERVATIONS:
+        std = math.sqrt(var)
+        # Batas bawah std agar data yang selalu sama tidak memicu alert
+        z_score = (value - mean) / max(std, 0.5, abs(mean) * 0.1)
+    
+    if n == 0:
+        mean, var = value, 0.0
+    else:
+        diff = value - mean
+        increment = alpha * diff
+        mean += increment
+        var = (1 - alpha) * (var + diff * increment)
+    
+    stats[key] = [n + 1, mean, var]
+    return z_score
+
+def _add_alert(state, alert_type, message, barcode_id=None, score=None, now=None):
+    """Tambahkan alert ke state (hanya MAX_ALERTS terbaru yang disimpan), kembalikan alert-nya"""
+    alert = {
+        'waktu': (now or datetime.now()).strftime("%Y-%m-%d %H:%M:%S"),
+        'tipe': alert_type,
+        'barcode_id': barcode_id,
+        'pesan': message,
+        'skor': round(score, 2) if score is not None else None
+    }
+    state['alerts'].append(alert)
+    del state['alerts'][:-MAX_ALERTS]
+    return alert
+
+def _is_trading_time(moment):
+    """Cek apakah waktu berada di dalam jam buka kantin"""
+    return moment.weekday() in TRADING_WEEKDAYS and TRADING_START_HOUR <= moment.hour < TRADING_END_HOUR
+
+def _trading_hours_since(last_sale, now):
+    """
+    Fungsi untuk menghitung jam buka yang sudah lewat sejak penjualan terakhir
+    Jika penjualan terakhir terjadi sebelum hari ini, dihitung dari jam buka hari ini
+    
+    Args:
+        last_sale: Timestamp penjualan terakhir
+        now: Waktu pengecekan (datetime)
+    
+    Returns:
+        float: Jumlah jam
+    """
+    opening = now.replace(hour=TRADING_START_HOUR, minute=0, second=0, microsecond=0)
+    start = max(datetime.fromtimestamp(last_sale), opening)
+    return max((now - start).total_seconds(), 0.0) / 3600
+
+# ==================== FUNGSI DETEKSI ====================
+
+def observe_checkout(items, products_df, now=None):
+    """
+    Fungsi untuk memproses satu checkout dan mendeteksi anomali:
+    jumlah tidak wajar per produk, nilai struk tidak wajar per jam,
+    dan harga yang berbeda dari harga_jual di katalog
+    
+    Args:
+        items: List dict item struk (barcode_id, nama_produk, jumlah, harga_satuan)
+        products_df: DataFrame produk (katalog harga)
+        now: Waktu checkout (default sekarang)
+    
+    Returns:
+        list: Alert baru yang dihasilkan checkout ini
+    """
+    try:
+        now = now or datetime.now()
+        state = load_anomaly_state()
+        stats = state['stats']
+        new_alerts = []
+        
+        catalog_price = dict(zip(products_df['barcode_id'], products_df['harga_jual']))
+        basket_value = 0
+        
+        for item in items:
+            barcode_id = item['barcode_id']
+            jumlah = item['jumlah']
+            harga_satuan = item['harga_satuan']
+            basket_value += jumlah * harga_satuan
+            state['names'][barcode_id] = item['nama_produk']
+            
+            # Harga berbeda dari katalog
+            harga_jual = catalog_price.get(barcode_id)
+            if harga_jual and abs(harga_satuan - harga_jual) > harga_jual * PRICE_TOLERANCE:
+                new_alerts.append(_add_alert(
+                    state, 'harga',
+                    f"Harga {item['nama_produk']} Rp {harga_satuan:,.0f} berbeda dari katalog Rp {harga_jual:,.0f}",
+                    barcode_id, now=now
+                ))
+            
+            # Jumlah per produk tidak wajar
+            z_score = _update_ewma(stats, f"jumlah:{barcode_id}", jumlah)
+            if z_score is not None and abs(z_score) >= Z_THRESHOLD:
+                new_alerts.append(_add_alert(
+                    state, 'jumlah',
+                    f"Jumlah {item['nama_produk']} tidak wajar: {jumlah} pcs",
+                    barcode_id, z_score, now=now
+                ))
+            
+            # Interval antar penjualan, dipakai untuk deteksi produk tidak terjual.
+            # Hanya jeda di dalam jam buka hari yang sama (bukan malam/akhir pekan)
+            last_sale = state['last_sale'].get(barcode_id)
+            if last_sale is not None:
+                last_time = datetime.fromtimestamp(last_sale)
+                if last_time.date() == now.date() and _is_trading_time(last_time) and _is_trading_time(now):
+                    gap_hours = (now - last_time).total_seconds() / 3600
+                    _update_ewma(stats, f"interval_buka:{barcode_id}", gap_hours)
+            state['last_sale'][barcode_id] = now.timestamp()
+        
+        # Nilai struk per jam tidak wajar
+        z_score = _update_ewma(stats, f"struk_jam:{now.hour}", basket_value)
+        if z_score is not None and abs(z_score) >= Z_THRESHOLD:
+            new_alerts.append(_add_alert(
+                state, 'nilai_struk',
+                f"Nilai struk Rp {basket_value:,.0f} tidak wajar untuk jam {now.hour:02d}:00",
+                score=z_score, now=now
+            ))
+        
+        save_anomaly_state(state)
+        return new_alerts
+    
+    except Exception as e:
+        print(f"Error observing checkout: {e}")
+        return []
+
+def check_missing_sales(now=None):
+    """
+    Fungsi untuk mendeteksi produk laris yang lama tidak terjual
+    (kemungkinan stok hilang/rusak atau tidak tercatat di kasir)
+    
+    Args:
+        now: Waktu pengecekan (default sekarang)
+    
+    Returns:
+        list: Dict barcode_id, nama_produk, jam_sejak_terjual (jam buka),
+              interval_normal. Kosong jika kantin sedang tutup
+    """
+    now = now or datetime.now()
+    if not _is_trading_time(now):
+        return []
+    
+    state = load_anomaly_state()
+    missing = []
+    
+    for barcode_id, last_sale in state['last_sale'].items():
+        n, mean_interval, _ = state['stats'].get(f"interval_buka:{barcode_id}", [0, 0.0, 0.0])
+        if n < MIN_OBSERVATIONS:
+            continue
+        
+        hours_since = _trading_hours_since(last_sale, now)
+        limit = max(mean_interval * MISSING_SALES_FACTOR, MISSING_SALES_MIN_HOURS)
+        
+        if hours_since > limit:
+            missing.append({
+                'barcode_id': barcode_id,
+                'nama_produk': state['names'].get(barcode_id, barcode_id),
+                'jam_sejak_terjual': round(hours_since, 1),
+                'interval_normal': round(mean_interval, 1)
+            })
+    
+    return sorted(missing, key=lambda x: x['jam_sejak_terjual'] / max(x['interval_normal'], 0.1), reverse=True)
+
+def get_recent_alerts(limit=10):
+    """
+    Fungsi untuk mengambil alert anomali terbaru
+    
+    Args:
+        limit: Jumlah alert
+    
+    Returns:
+        list: Alert terbaru (paling baru di depan)
+    """
+    return list(reversed(load_anomaly_state()['alerts'][-limit:]))
+
+def clear_alerts():
+    """
+    Fungsi untuk menghapus semua alert (statistik tetap disimpan)
+    
+    Returns:
+        bool: True jika berhasil
+    """
+    state = load_anomaly_state()
+    state['alerts'] = []
+    return save_anomaly_state(state)
@@ -0,0 +1,865 @@
+"""
+Module untuk backup data berbasis konten (content-addressed)
+File CSV dipotong per baris menjadi chunk; batas chunk ditentukan oleh isi
+baris, sehingga baris yang ditambahkan di akhir file tidak menggeser chunk
+lama. Setiap chunk disimpan sekali (nama = hash SHA-256, isi dikompres zlib)
+dan setiap backup hanya berupa manifest daftar chunk, jadi data yang tidak
+berubah tidak memakan tempat lagi
+"""
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+import zlib
+from datetime import datetime
+
+import pandas as pd
+
+from modules.data_handler import PRODUCTS_FILE, TRANSACTIONS_FILE, TRANSACTION_COLUMNS
+from modules.journal_handler import (
+    append_journal, get_journal_offset, iter_journal,
+    JOURNAL_PRODUCTS, JOURNAL_TRANSACTIONS_APPEND, JOURNAL_REWRITE
+)
+
+# Lokasi store backup (chunk dan manifest)
+BACKUP_FOLDER = "data/backup"
+BACKUP_STORE_FOLDER = os.path.join(BACKUP_FOLDER, "store")
+BACKUP_CHUNKS_FOLDER = os.path.join(BACKUP_STORE_FOLDER, "chunks")
+BACKUP_MANIFESTS_FOLDER = os.path.join(BACKUP_STORE_FOLDER, "manifests")
+BACKUP_STAGING_FOLDER = os.path.join(BACKUP_STORE_FOLDER, "staging")
+
+# File yang di-backup oleh create_snapshot() tanpa argumen
+BACKUP_FILES = [PRODUCTS_FILE, TRANSACTIONS_FILE]
+
+# Ukuran chunk: dipotong setelah baris yang hash-nya cocok dengan mask
+# (rata-rata ~2048 baris), tapi tidak lebih kecil/besar dari batas ini
+CHUNK_MIN_BYTES = 64 * 1024
+CHUNK_MAX_BYTES = 1024 * 1024
+CHUNK_BOUNDARY_MASK = 0x7FF
+
+BACKUP_COMPRESS_LEVEL = 6
+
+# Snapshot diulang jika journal bertambah selama file dibaca (isi file harus
+# sama persis dengan posisi journal yang dicatat di manifest)
+SNAPSHOT_MAX_ATTEMPTS = 3
+
+# Replay journal: baris transaksi ditulis per sekian baris, dan transaksi_id
+# yang sudah ada dicek dari ekor file staging sebesar ini
+REPLAY_FLUSH_ROWS = 5000
+REPLAY_TAIL_BYTES = 256 * 1024
+
+# ==================== FUNGSI CHUNK ====================
+
+def _iter_line_chunks(file_path):
+    """
+    Potong file menjadi chunk yang selalu berakhir di batas baris
+    
+    Args:
+        file_path: Path file
+    
+    Yields:
+        bytes: Isi chunk
+    """
+    lines = []
+    size = 0
+    with open(file_path, 'rb') as f:
+        for line in f:
+            lines.append(line)
+            size += len(line)
+            if size >= CHUNK_MAX_BYTES or (
+                size >= CHUNK_MIN_BYTES and (zlib.crc32(line) & CHUNK_BOUNDARY_MASK) == 0
+            ):
+                yield b''.join(lines)
+                lines = []
+                size = 0
+    if lines:
+        yield b''.join(lines)
+
+def _chunk_path(digest):
+    """Path file chunk (dibagi per 2 karakter awal hash agar folder tidak terlalu besar)"""
+    return os.path.join(BACKUP_CHUNKS_FOLDER, digest[:2], digest)
+
+def _store_chunk(digest, data):
+    """
+    Simpan chunk terkompresi jika belum ada
+    
+    Returns:
+        int: Jumlah byte yang ditulis ke disk (0 jika chunk sudah ada)
+    """
+    path = _chunk_path(digest)
+    if os.path.exists(path):
+        return 0
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    compressed = zlib.compress(data, BACKUP_COMPRESS_LEVEL)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(compressed)
+    os.replace(temp_path, path)
+    return len(compressed)
+
+def _read_chunk(digest, size=None):
+    """
+    Baca dan verifikasi satu chunk
+    
+    Args:
+        digest: Hash SHA-256 chunk
+        size: Ukuran asli chunk (opsional, ikut dicek)
+    
+    Returns:
+        bytes: Isi chunk
+    
+    Raises:
+        ValueError: Jika chunk rusak atau hilang
+    """
+    try:
+        with open(_chunk_path(digest), 'rb') as f:
+            data = zlib.decompress(f.read())
+    except FileNotFoundError:
+        raise ValueError(f"Chunk {digest[:12]} tidak ditemukan")
+    except zlib.error as e:
+        raise ValueError(f"Chunk {digest[:12]} rusak: {e}")
+    
+    if hashlib.sha256(data).hexdigest() != digest or (size is not None and len(data) != size):
+        raise ValueError(f"Checksum chunk {digest[:12]} tidak cocok")
+    return data
+
+# ==================== FUNGSI MANIFEST ====================
+
+def _manifest_path(backup_id):
+    """Path file manifest backup"""
+    return os.path.join(BACKUP_MANIFESTS_FOLDER, f"{backup_id}.json")
+
+def load_manifest(backup_id):
+    """
+    Fungsi untuk memuat manifest backup
+    
+    Args:
+        backup_id: ID backup
+    
+    Returns:
+        dict: Manifest, atau None jika tidak ada
+    """
+    try:
+        with open(_manifest_path(backup_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error loading backup manifest {backup_id}: {e}")
+        return None
+
+def _load_all_manifests():
+    """Muat semua manifest, terbaru di depan"""
+    if not os.path.exists(BACKUP_MANIFESTS_FOLDER):
+        return []
+    
+    manifests = []
+    for filename in os.listdir(BACKUP_MANIFESTS_FOLDER):
+        if filename.endswith('.json'):
+            manifest = load_manifest(filename[:-len('.json')])
+            if manifest is not None:
+                manifests.append(manifest)
+    return sorted(manifests, key=lambda m: m['created'], reverse=True)
+
+def _write_manifest(manifest):
+    """Tulis manifest secara atomik"""
+    os.makedirs(BACKUP_MANIFESTS_FOLDER, exist_ok=True)
+    path = _manifest_path(manifest['backup_id'])
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp_path, path)
+    return path
+
+def _count_rows(newlines, size, last_byte):
+    """Jumlah baris data CSV (tanpa header) dari jumlah newline"""
+    if size == 0:
+        return 0
+    lines = newlines + (0 if last_byte == b'\n' else 1)
+    return max(lines - 1, 0)
+
+# ==================== FUNGSI BACKUP ====================
+
+def create_snapshot(files=None, label="manual"):
+    """
+    Fungsi untuk membuat backup (snapshot) file data ke store
+    Hanya chunk yang belum pernah disimpan yang ditulis; jika semua file
+    sama persis dengan backup terakhir, tidak ada manifest baru
+    
+    Args:
+        files: List path file (default BACKUP_FILES)
+        label: Keterangan backup (misal 'manual', 'otomatis')
+    
+    Returns:
+        dict: Status, pesan, backup_id, manifest_path, new_chunks, new_bytes,
+              total_bytes, unchanged
+    """
+    try:
+        files = [f for f in (files or BACKUP_FILES) if os.path.exists(f)]
+        if not files:
+            return {
+                'success': False,
+                'message': "Tidak ada file untuk di-backup"
+            }
+        
+        # Hanya snapshot lengkap yang bisa dipakai sebagai dasar point-in-time restore
+        full_snapshot = set(files) >= {f for f in BACKUP_FILES if os.path.exists(f)}
+        new_chunks = 0
+        new_bytes = 0
+        
+        for attempt in range(SNAPSHOT_MAX_ATTEMPTS):
+            journal_offset = get_journal_offset()
+            now = datetime.now()
+            manifest = {
+                'backup_id': now.strftime("%Y%m%d_%H%M%S_%f"),
+                'created': now.isoformat(timespec='microseconds'),
+                'label': label,
+                'files': {}
+            }
+            if full_snapshot:
+                manifest['journal'] = {'offset': journal_offset}
+            total_bytes = 0
+            
+            for file_path in files:
+                file_hash = hashlib.sha256()
+                chunks = []
+                offset = 0
+                newlines = 0
+                last_byte = b''
+                
+                for data in _iter_line_chunks(file_path):
+                    digest = hashlib.sha256(data).hexdigest()
+                    stored = _store_chunk(digest, data)
+                    if stored:
+                        new_chunks += 1
+                        new_bytes += stored
+                    
+                    chunks.append({'hash': digest, 'offset': offset, 'size': len(data)})
+                    file_hash.update(data)
+                    offset += len(data)
+                    newlines += data.count(b'\n')
+                    last_byte = data[-1:]
+                
+                total_bytes += offset
+                manifest['files'][file_path] = {
+                    'size': offset,
+                    'sha256': file_hash.hexdigest(),
+                    'rows': _count_rows(newlines, offset, last_byte),
+                    'chunks': chunks
+                }
+            
+            # Ada perubahan data selama file dibaca: ulangi agar konsisten dengan offset
+            if get_journal_offset() == journal_offset:
+                break
+        
+        # Tidak ada perubahan sejak backup terakhir: tidak perlu manifest baru
+        latest = list_snapshots(limit=1)
+        if latest and not new_chunks:
+            previous = load_manifest(latest[0]['backup_id'])
+            if previous and ('journal' in previous or not full_snapshot) and all(
+                previous['files'].get(path, {}).get('sha256') == info['sha256']
+                for path, info in manifest['files'].items()
+            ) and set(previous['files']) >= set(manifest['files']):
+                return {
+                    'success': True,
+                    'message': f"Data tidak berubah sejak backup {previous['backup_id']}",
+                    'backup_id': previous['backup_id'],
+                    'manifest_path': _manifest_path(previous['backup_id']),
+                    'new_chunks': 0,
+                    'new_bytes': 0,
+                    'total_bytes': total_bytes,
+                    'unchanged': True
+                }
+        
+        manifest_path = _write_manifest(manifest)
+        
+        return {
+            'success': True,
+            'message': (
+                f"Backup {len(files)} file berhasil "
+                f"({new_chunks} chunk baru, {new_bytes / 1024:.1f} KB ditulis)"
+            ),
+            'backup_id': manifest['backup_id'],
+            'manifest_path': manifest_path,
+            'new_chunks': new_chunks,
+            'new_bytes': new_bytes,
+            'total_bytes': total_bytes,
+            'unchanged': False
+        }
+    
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f"Gagal membuat backup: {str(e)}"
+        }
+
+def list_snapshots(limit=None):
+    """
+    Fungsi untuk mengambil daftar backup, terbaru di atas
+    
+    Args:
+        limit: Jumlah maksimal backup (None = semua)
+    
+    Returns:
+        list: Dict backup_id, created, label, files {path: {rows, size}}, total_bytes
+    """
+    snapshots = []
+    for manifest in _load_all_manifests()[:limit]:
+        snapshots.append({
+            'backup_id': manifest['backup_id'],
+            'created': manifest['created'],
+            'label': manifest.get('label', ''),
+            'files': {
+                path: {'rows': info['rows'], 'size': info['size']}
+                for path, info in manifest['files'].items()
+            },
+            'total_bytes': sum(info['size'] for info in manifest['files'].values())
+        })
+    return snapshots
+
+def get_backup_store_stats():
+    """
+    Fungsi untuk statistik store backup
+    
+    Returns:
+        dict: snapshots, chunks, stored_bytes (di disk), logical_bytes (total isi semua backup)
+    """
+    chunk_count = 0
+    stored_bytes = 0
+    if os.path.exists(BACKUP_CHUNKS_FOLDER):
+        for root, _, filenames in os.walk(BACKUP_CHUNKS_FOLDER):
+            for filename in filenames:
+                chunk_count += 1
+                stored_bytes += os.path.getsize(os.path.join(root, filename))
+    
+    snapshots = list_snapshots()
+    return {
+        'snapshots': len(snapshots),
+        'chunks': chunk_count,
+        'stored_bytes': stored_bytes,
+        'logical_bytes': sum(s['total_bytes'] for s in snapshots)
+    }
+
+# ==================== FUNGSI VERIFIKASI & RESTORE ====================
+
+def verify_snapshot(backup_id):
+    """
+    Fungsi untuk memverifikasi backup: semua chunk ada, checksum chunk
+    dan checksum file utuh cocok
+    
+    Args:
+        backup_id: ID backup
+    
+    Returns:
+        dict: Status, pesan, errors (list pesan)
+    """
+    manifest = load_manifest(backup_id)
+    if manifest is None:
+        return {
+            'success': False,
+            'message': f"Backup {backup_id} tidak ditemukan",
+            'errors': []
+        }
+    
+    errors = []
+    for file_path, info in manifest['files'].items():
+        file_hash = hashlib.sha256()
+        try:
+            for chunk in info['chunks']:
+                file_hash.update(_read_chunk(chunk['hash'], chunk['size']))
+        except ValueError as e:
+            errors.append(f"{file_path}: {e}")
+            continue
+        if file_hash.hexdigest() != info['sha256']:
+            errors.append(f"{file_path}: checksum file tidak cocok")
+    
+    if errors:
+        return {
+            'success': False,
+            'message': f"❌ Backup {backup_id} rusak ({len(errors)} file)",
+            'errors': errors
+        }
+    return {
+        'success': True,
+        'message': f"✅ Backup {backup_id} utuh ({len(manifest['files'])} file terverifikasi)",
+        'errors': []
+    }
+
+def _write_restored_file(info, target_path):
+    """
+    Susun ulang satu file dari chunk ke file sementara, sambil verifikasi
+    
+    Returns:
+        str: Path file sementara (belum menggantikan target)
+    """
+    temp_path = f"{target_path}.restore.tmp"
+    file_hash = hashlib.sha256()
+    target_folder = os.path.dirname(target_path)
+    if target_folder:
+        os.makedirs(target_folder, exist_ok=True)
+    
+    try:
+        with open(temp_path, 'wb') as f:
+            for chunk in info['chunks']:
+                data = _read_chunk(chunk['hash'], chunk['size'])
+                file_hash.update(data)
+                f.write(data)
+        if file_hash.hexdigest() != info['sha256']:
+            raise ValueError("checksum file tidak cocok")
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    return temp_path
+
+def restore_snapshot(backup_id, files=None, target_folder=None):
+    """
+    Fungsi untuk restore backup
+    Semua file disusun dan diverifikasi dulu ke file sementara, baru
+    menggantikan file asli (os.replace) jika semuanya valid. Data saat ini
+    di-backup dulu dengan label 'sebelum-restore'
+    
+    Args:
+        backup_id: ID backup
+        files: List path file yang di-restore (default semua file di backup)
+        target_folder: Jika diisi, file ditulis ke folder ini (tidak menimpa data)
+    
+    Returns:
+        dict: Status, pesan, restored (list path), safety_backup_id
+    """
+    manifest = load_manifest(backup_id)
+    if manifest is None:
+        return {
+            'success': False,
+            'message': f"Backup {backup_id} tidak ditemukan",
+            'restored': []
+        }
+    
+    selected = {
+        path: info for path, info in manifest['files'].items()
+        if files is None or path in files
+    }
+    if not selected:
+        return {
+            'success': False,
+            'message': "Tidak ada file yang cocok untuk di-restore",
+            'restored': []
+        }
+    
+    targets = {
+        path: os.path.join(target_folder, os.path.basename(path)) if target_folder else path
+        for path in selected
+    }
+    
+    # Tahap 1: susun dan verifikasi semua file
+    temp_paths = {}
+    try:
+        for path, info in selected.items():
+            temp_paths[path] = _write_restored_file(info, targets[path])
+    except Exception as e:
+        for temp_path in temp_paths.values():
+            os.remove(temp_path)
+        return {
+            'success': False,
+            'message': f"❌ Restore dibatalkan, data tidak diubah: {str(e)}",
+            'restored': []
+        }
+    
+    # Tahap 2: amankan data saat ini, lalu ganti file
+    safety_backup_id = None
+    existing = [p for p in selected if os.path.exists(p)]
+    if target_folder is None and existing:
+        safety_backup_id = create_snapshot(existing, label="sebelum-restore").get('backup_id')
+    
+    for path, temp_path in temp_paths.items():
+        os.replace(temp_path, targets[path])
+    
+    # Journal sebelum titik ini tidak berlaku lagi untuk file yang diganti;
+    # snapshot baru menjadi dasar replay berikutnya
+    if target_folder is None:
+        _mark_rewritten(list(temp_paths))
+    
+    return {
+        'success': True,
+        'message': f"✅ Restore {len(temp_paths)} file dari backup {backup_id} berhasil",
+        'restored': list(targets.values()),
+        'safety_backup_id': safety_backup_id
+    }
+
+# ==================== FUNGSI POINT-IN-TIME RESTORE ====================
+
+def _mark_rewritten(paths):
+    """
+    Catat file yang ditulis ulang seluruhnya ke journal (batas replay),
+    lalu buat snapshot baru sebagai dasar replay berikutnya
+    """
+    for path in paths:
+        append_journal(JOURNAL_REWRITE, {'file': path})
+    create_snapshot(label="setelah-restore")
+
+def _file_sha256(file_path, block_size=1024 * 1024):
+    """Checksum SHA-256 file"""
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+def _file_rows(file_path, block_size=1024 * 1024):
+    """Jumlah baris data CSV (tanpa header), 0 jika file tidak ada"""
+    if not os.path.exists(file_path):
+        return 0
+    
+    newlines = 0
+    size = 0
+    last_byte = b''
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            newlines += block.count(b'\n')
+            size += len(block)
+            last_byte = block[-1:]
+    return _count_rows(newlines, size, last_byte)
+
+def _find_base_snapshot(target):
+    """Snapshot lengkap terbaru (punya offset journal) yang dibuat sebelum target"""
+    for manifest in _load_all_manifests():
+        if 'journal' in manifest and datetime.fromisoformat(manifest['created']) <= target:
+            return manifest
+    return None
+
+def _apply_products_op(df, data):
+    """
+    Terapkan satu operasi journal produk (hapus lalu upsert per barcode_id)
+    
+    Args:
+        df: DataFrame produk (index = barcode_id string, dtype object)
+        data: Isi operasi {'columns', 'upsert', 'delete'}
+    
+    Returns:
+        DataFrame: Produk setelah operasi
+    """
+    columns = data['columns']
+    # Kolom baru/kosong dari reindex bertipe float64; dijadikan object agar
+    # nilai teks dari journal bisa diisikan (pandas 3 menolak upcasting)
+    df = df.drop(index=[i for i in data['delete'] if i in df.index]).reindex(columns=columns).astype(object)
+    
+    if data['upsert']:
+        upsert = pd.DataFrame(data['upsert']).reindex(columns=columns).astype(object)
+        upsert.index = upsert['barcode_id'].astype(str)
+        existing = upsert.index.isin(df.index)
+        df.loc[upsert.index[existing]] = upsert[existing]
+        df = pd.concat([df, upsert[~existing]])
+    
+    return df
+
+def _tail_transaction_ids(file_path, tail_bytes=REPLAY_TAIL_BYTES):
+    """
+    Ambil header dan transaksi_id dari ekor file transaksi (tanpa membaca seluruh file)
+    
+    Returns:
+        tuple: (list kolom header, set transaksi_id)
+    """
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        header = next(csv.reader([f.readline()]), [])
+    if 'transaksi_id' not in header:
+        return header, set()
+    
+    position = header.index('transaksi_id')
+    size = os.path.getsize(file_path)
+    start = max(size - tail_bytes, 0)
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        tail = f.read().decode('utf-8', errors='ignore')
+    
+    # Baris pertama adalah header (start = 0) atau potongan baris yang tidak utuh
+    lines = tail.splitlines()[1:]
+    ids = {row[position] for row in csv.reader(lines) if len(row) > position}
+    return header, ids
+
+def _append_staged_transactions(file_path, rows, state):
+    """
+    Tambahkan baris transaksi hasil replay ke file staging
+    Transaksi yang sudah ada (transaksi_id sama) dilewati, jadi replay aman diulang
+    
+    Args:
+        file_path: Path file transaksi staging
+        rows: List dict baris transaksi
+        state: Dict header dan known_ids (diisi saat pertama dipanggil)
+    
+    Returns:
+        int: Jumlah baris yang ditulis
+    """
+    if 'header' not in state:
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            pd.DataFrame(columns=TRANSACTION_COLUMNS).to_csv(file_path, index=False)
+        with open(file_path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+        state['header'], state['known_ids'] = _tail_transaction_ids(file_path)
+    
+    new_rows = pd.DataFrame(rows).reindex(columns=state['header'])
+    if 'transaksi_id' in new_rows.columns:
+        ids = new_rows['transaksi_id'].astype(str)
+        new_rows = new_rows[~ids.isin(state['known_ids']) & ~ids.duplicated()]
+        state['known_ids'].update(ids)
+    
+    if not new_rows.empty:
+        new_rows.to_csv(file_path, mode='a', header=False, index=False)
+    return len(new_rows)
+
+def _replay_journal(base, staged, target):
+    """
+    Replay journal sejak offset snapshot dasar sampai target ke file staging
+    
+    Args:
+        base: Manifest snapshot dasar
+        staged: Dict path asli -> path file staging
+        target: Datetime batas replay (inklusif)
+    
+    Returns:
+        int: Jumlah operasi journal yang di-replay
+    
+    Raises:
+        ValueError: Jika journal rusak atau ada file yang ditulis ulang sebelum target
+    """
+    products_path = staged[PRODUCTS_FILE]
+    transactions_path = staged[TRANSACTIONS_FILE]
+    products = None
+    pending_rows = []
+    transaction_state = {}
+    replayed = 0
+    
+    for entry in iter_journal(base['journal']['offset'], until=target):
+        op = entry['op']
+        data = entry['data']
+        
+        if op == JOURNAL_REWRITE:
+            raise ValueError(
+                f"{data.get('file')} ditulis ulang pada {entry['ts'][:19]}; "
+                f"pilih waktu setelahnya atau sebelum {entry['ts'][:19]}"
+            )
+        
+        if op == JOURNAL_PRODUCTS:
+            if products is None:
+                if os.path.exists(products_path):
+                    products = pd.read_csv(products_path, dtype={'barcode_id': str}).astype(object)
+                else:
+                    products = pd.DataFrame(columns=data['columns'], dtype=object)
+                products.index = products['barcode_id'].astype(str)
+            products = _apply_products_op(products, data)
+        
+        elif op == JOURNAL_TRANSACTIONS_APPEND:
+            pending_rows.extend(data['rows'])
+            if len(pending_rows) >= REPLAY_FLUSH_ROWS:
+                _append_staged_transactions(transactions_path, pending_rows, transaction_state)
+                pending_rows = []
+        
+        replayed += 1
+    
+    if pending_rows:
+        _append_staged_transactions(transactions_path, pending_rows, transaction_state)
+    if products is not None:
+        products.to_csv(products_path, index=False)
+    
+    return replayed
+
+def preview_point_in_time_restore(target_time):
+    """
+    Fungsi untuk menyiapkan restore data ke waktu tertentu (tanpa mengubah data)
+    Snapshot terdekat sebelum target disusun dan diverifikasi ke folder staging,
+    lalu journal di-replay mulai offset snapshot tersebut sampai target. Waktu
+    pemulihan hanya bergantung pada perubahan sejak snapshot, bukan seluruh riwayat
+    
+    Args:
+        target_time: Waktu tujuan (datetime/string)
+    
+    Returns:
+        dict: Status, pesan, plan_id, staging, target, backup_id, snapshot_time,
+              replayed_ops, files {path: {staged, sha256, rows_now, rows_restored}}
+    """
+    target = pd.Timestamp(target_time).to_pydatetime()
+    base = _find_base_snapshot(target)
+    if base is None:
+        return {
+            'success': False,
+            'message': f"❌ Tidak ada backup sebelum {target:%Y-%m-%d %H:%M:%S} yang bisa dipakai"
+        }
+    
+    plan_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    staging = os.path.join(BACKUP_STAGING_FOLDER, plan_id)
+    
+    try:
+        # Susun snapshot dasar ke staging (checksum chunk dan file diverifikasi)
+        restored = restore_snapshot(base['backup_id'], target_folder=staging)
+        if not restored['success']:
+            raise ValueError(restored['message'])
+        
+        staged = {path: os.path.join(staging, os.path.basename(path)) for path in BACKUP_FILES}
+        replayed = _replay_journal(base, staged, target)
+        
+        files = {}
+        for path, staged_path in staged.items():
+            if os.path.exists(staged_path):
+                files[path] = {
+                    'staged': staged_path,
+                    'sha256': _file_sha256(staged_path),
+                    'rows_now': _file_rows(path),
+                    'rows_restored': _file_rows(staged_path)
+                }
+        
+        return {
+            'success': True,
+            'message': (
+                f"Backup {base['backup_id']} + {replayed} perubahan journal "
+                f"sampai {target:%Y-%m-%d %H:%M:%S}"
+            ),
+            'plan_id': plan_id,
+            'staging': staging,
+            'target': target.isoformat(),
+            'backup_id': base['backup_id'],
+            'snapshot_time': base['created'],
+            'replayed_ops': replayed,
+            'files': files
+        }
+    
+    except Exception as e:
+        print(f"Error preparing point-in-time restore: {e}")
+        shutil.rmtree(staging, ignore_errors=True)
+        return {
+            'success': False,
+            'message': f"❌ Restore tidak bisa disiapkan: {str(e)}"
+        }
+
+def apply_point_in_time_restore(plan):
+    """
+    Fungsi untuk menerapkan hasil preview_point_in_time_restore()
+    File staging dicek ulang checksum-nya, data saat ini di-backup dengan
+    label 'sebelum-restore', lalu file staging menggantikan file data
+    
+    Args:
+        plan: Dict hasil preview_point_in_time_restore()
+    
+    Returns:
+        dict: Status, pesan, restored (list path), safety_backup_id
+    """
+    try:
+        for path, info in plan['files'].items():
+            if not os.path.exists(info['staged']) or _file_sha256(info['staged']) != info['sha256']:
+                return {
+                    'success': False,
+                    'message': f"❌ File staging {path} berubah atau hilang, ulangi preview",
+                    'restored': []
+                }
+        
+        existing = [path for path in plan['files'] if os.path.exists(path)]
+        safety_backup_id = None
+        if existing:
+            safety = create_snapshot(existing, label="sebelum-restore")
+            if not safety['success']:
+                return {
+                    'success': False,
+                    'message': f"❌ Restore dibatalkan: {safety['message']}",
+                    'restored': []
+                }
+            safety_backup_id = safety['backup_id']
+        
+        for path, info in plan['files'].items():
+            os.replace(info['staged'], path)
+        
+        _mark_rewritten(list(plan['files']))
+        discard_restore_plan(plan)
+        
+        return {
+            'success': True,
+            'message': f"✅ Data dikembalikan ke {plan['target'][:19].replace('T', ' ')}",
+            'restored': list(plan['files']),
+            'safety_backup_id': safety_backup_id
+        }
+    
+    except Exception as e:
+        print(f"Error applying point-in-time restore: {e}")
+        return {
+            'success': False,
+            'message': f"❌ Error: {str(e)}",
+            'restored': []
+        }
+
+def discard_restore_plan(plan):
+    """
+    Fungsi untuk membuang folder staging hasil preview yang tidak jadi diterapkan
+    
+    Args:
+        plan: Dict hasil preview_point_in_time_restore()
+    """
+    if plan and plan.get('staging'):
+        shutil.rmtree(plan['staging'], ignore_errors=True)
+
+# ==================== FUNGSI PEMBERSIHAN ====================
+
+def prune_snapshots(days=7):
+    """
+    Fungsi untuk menghapus backup yang lebih lama dari sekian hari, lalu
+    menghapus chunk yang tidak dipakai backup mana pun (backup terbaru selalu disimpan)
+    
+    Args:
+        days: Jumlah hari backup disimpan
+    
+    Returns:
+        dict: Status, pesan, deleted_snapshots, deleted_chunks, freed_bytes
+    """
+    try:
+        manifests = _load_all_manifests()
+        cutoff = datetime.now() - pd.Timedelta(days=days)
+        
+        kept = manifests[:1]
+        deleted_snapshots = 0
+        for manifest in manifests[1:]:
+            if datetime.fromisoformat(manifest['created']) < cutoff:
+                os.remove(_manifest_path(manifest['backup_id']))
+                deleted_snapshots += 1
+            else:
+                kept.append(manifest)
+        
+        # Mark & sweep chunk yang tidak direferensikan
+        referenced = {
+            chunk['hash']
+            for manifest in kept
+            for info in manifest['files'].values()
+            for chunk in info['chunks']
+        }
+        deleted_chunks = 0
+        freed_bytes = 0
+        if os.path.exists(BACKUP_CHUNKS_FOLDER):
+            for root, _, filenames in os.walk(BACKUP_CHUNKS_FOLDER):
+                for filename in filenames:
+                    if filename not in referenced:
+                        path = os.path.join(root, filename)
+                        freed_bytes += os.path.getsize(path)
+                        os.remove(path)
+                        deleted_chunks += 1
+        
+        return {
+            'success': True,
+            'deleted_snapshots': deleted_snapshots,
+            'deleted_chunks': deleted_chunks,
+            'freed_bytes': freed_bytes,
+            'message': (
+                f"Berhasil menghapus {deleted_snapshots} backup lama "
+                f"({deleted_chunks} chunk, {freed_bytes / 1024:.1f} KB)"
+            )
+        }
+    
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f"Error: {str(e)}"
+        }
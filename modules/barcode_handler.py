@@ -5,264 +5,822 @@ Version: 10.0 - No Recursion Loop
 """
 
 import barcode
-from barcode.writer import ImageWriter
+from barcode.writer import ImageWriter, SVGWriter
 import os
-import streamlit as st
+import io
+import json
+import hashlib
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from modules.utils import run_parallel_chunks
+# Folder default penyimpanan barcode (di root project), didefinisikan di
+# data_handler agar bisa dipakai tanpa library python-barcode
+from modules.data_handler import BARCODES_FOLDER
 
 # ==================== LIBRARY DETECTION ====================
 
-print("=" * 60)
-print("🔍 DETECTING SCANNER LIBRARIES...")
-print("=" * 60)
-
-# QRCode Scanner Detection
-QRCODE_SCANNER_AVAILABLE = False
-try:
-    from streamlit_qrcode_scanner import qrcode_scanner
-    QRCODE_SCANNER_AVAILABLE = True
-    print(f"✅ Streamlit-QRCode-Scanner: Available")
-    print(f"   Method: JavaScript-based (HTML5 getUserMedia)")
-except ImportError as e:
-    print(f"❌ Streamlit-QRCode-Scanner: {e}")
-    print(f"   Install: pip install streamlit-qrcode-scanner==0.1.2")
-
-# Final Status
-SCANNER_READY = QRCODE_SCANNER_AVAILABLE
-
-print("\n" + "=" * 60)
-if SCANNER_READY:
-    print("✅ SCANNER READY: JavaScript-based QRCode Scanner")
-    print("   Method: HTML5 getUserMedia API")
-    print("   Preview: 400x400 with visual feedback")
-else:
-    print("❌ SCANNER NOT AVAILABLE")
-    print("   📥 Install: pip install streamlit-qrcode-scanner==0.1.2")
-print("=" * 60)
-print()
+# Library scanner baru dicek saat pertama kali dipakai (bukan saat import)
+# agar import modul cepat dan tidak mencetak apa pun
+
+@lru_cache(maxsize=None)
+def _load_qrcode_scanner():
+    """
+    Import komponen streamlit-qrcode-scanner saat pertama dibutuhkan
+    
+    Returns:
+        function atau None: qrcode_scanner jika library terpasang
+    """
+    try:
+        from streamlit_qrcode_scanner import qrcode_scanner
+        return qrcode_scanner
+    except ImportError:
+        return None
+
+def is_scanner_available():
+    """Cek apakah library scanner terpasang (hasil di-cache)"""
+    return _load_qrcode_scanner() is not None
+
+def __getattr__(name):
+    """Kompatibilitas: SCANNER_READY/QRCODE_SCANNER_AVAILABLE dihitung saat diakses"""
+    if name in ('SCANNER_READY', 'QRCODE_SCANNER_AVAILABLE'):
+        return is_scanner_available()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ==================== QRCODE SCANNER FUNCTION ====================
 
-if SCANNER_READY:
-    def scan_barcode_realtime():
-        """
-        Enhanced barcode scanner dengan visual feedback
-        FIXED: No recursion - return barcode_data instead of rerun
+# Deteksi barcode yang sama dalam jendela ini dianggap getaran kamera, bukan scan baru
+SCAN_DEBOUNCE_SECONDS = 1.0
+
+def debounce_scan(scan_state, barcode_data, now=None, debounce_seconds=SCAN_DEBOUNCE_SECONDS):
+    """
+    Fungsi untuk menyaring deteksi ganda dari kamera berdasarkan jendela waktu
+    Barcode berbeda selalu diterima. Barcode yang sama baru diterima lagi jika
+    kamera tidak melihatnya selama debounce_seconds (jendela bergeser)
+    
+    Args:
+        scan_state: Dict {'barcode', 'time'} deteksi terakhir (diperbarui di tempat)
+        barcode_data: Data barcode yang terdeteksi
+        now: Waktu deteksi dalam detik monotonic (default sekarang)
+        debounce_seconds: Lebar jendela debounce
+    
+    Returns:
+        bool: True jika deteksi dihitung sebagai scan baru
+    """
+    now = time.monotonic() if now is None else now
+    last_time = scan_state.get('time')
+    
+    is_repeat = (
+        barcode_data == scan_state.get('barcode')
+        and last_time is not None
+        and now - last_time < debounce_seconds
+    )
+    
+    scan_state['barcode'] = barcode_data
+    scan_state['time'] = now
+    return not is_repeat
+
+def scan_barcode_realtime(repeat_same=False):
+    """
+    Scanner barcode realtime (kamera browser)
+    
+    Args:
+        repeat_same: True agar barcode yang sama bisa di-scan berulang
+            (komponen kamera dipasang ulang setelah setiap deteksi,
+            pemanggil perlu st.rerun() agar kamera baru tampil)
+    
+    Returns:
+        str or None: barcode data if detected, None otherwise
+    """
+    qrcode_scanner = _load_qrcode_scanner()
+    if qrcode_scanner is None:
+        return _scan_unavailable()
+    return _scan_with_camera(qrcode_scanner, repeat_same)
+
+def _scan_with_camera(qrcode_scanner, repeat_same=False):
+    """
+    Enhanced barcode scanner dengan visual feedback
+    FIXED: No recursion - return barcode_data instead of rerun
+    
+    Komponen hanya mengirim nilai baru jika hasil decode berbeda dari
+    sebelumnya, dan nilai terakhir dikembalikan lagi di setiap rerun.
+    Karena itu setiap nilai hanya diproses sekali (scanner_last_value),
+    dan pada mode repeat_same key komponen diganti agar barcode yang
+    sama bisa terdeteksi lagi
+    
+    Args:
+        qrcode_scanner: Fungsi komponen streamlit-qrcode-scanner
+        repeat_same: True agar barcode yang sama bisa di-scan berulang
+    
+    Returns:
+        str or None: barcode data if detected, None otherwise
+    """
+    import streamlit as st
+    
+    # Custom CSS untuk scanner area dengan visual feedback
+    st.markdown("""
+        <style>
+        /* Scanner Container */
+        .stApp [data-testid="stVerticalBlock"] iframe {
+            min-height: 400px !important;
+            min-width: 400px !important;
+            border-radius: 15px;
+        }
         
-        Returns:
-            str or None: barcode data if detected, None otherwise
-        """
-        # Custom CSS untuk scanner area dengan visual feedback
-        st.markdown("""
-            <style>
-            /* Scanner Container */
-            .stApp [data-testid="stVerticalBlock"] iframe {
-                min-height: 400px !important;
-                min-width: 400px !important;
-                border-radius: 15px;
-            }
-            
-            /* Scanner Frame - Scanning State (Yellow) */
-            .scanner-frame-scanning {
-                border: 5px solid #FFC107;
-                border-radius: 15px;
-                padding: 10px;
-                background: linear-gradient(135deg, #FFF9C4 0%, #FFEB3B 100%);
+        /* Scanner Frame - Scanning State (Yellow) */
+        .scanner-frame-scanning {
+            border: 5px solid #FFC107;
+            border-radius: 15px;
+            padding: 10px;
+            background: linear-gradient(135deg, #FFF9C4 0%, #FFEB3B 100%);
+            box-shadow: 0 0 20px rgba(255, 193, 7, 0.5);
+            animation: pulse-yellow 1.5s infinite;
+        }
+        
+        /* Scanner Frame - Success State (Green) */
+        .scanner-frame-success {
+            border: 5px solid #4CAF50;
+            border-radius: 15px;
+            padding: 10px;
+            background: linear-gradient(135deg, #C8E6C9 0%, #4CAF50 100%);
+            box-shadow: 0 0 20px rgba(76, 175, 80, 0.5);
+            animation: pulse-green 0.5s;
+        }
+        
+        /* Scanner Frame - Default State */
+        .scanner-frame-default {
+            border: 3px solid #667eea;
+            border-radius: 15px;
+            padding: 10px;
+            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
+        }
+        
+        @keyframes pulse-yellow {
+            0%, 100% { 
                 box-shadow: 0 0 20px rgba(255, 193, 7, 0.5);
-                animation: pulse-yellow 1.5s infinite;
-            }
-            
-            /* Scanner Frame - Success State (Green) */
-            .scanner-frame-success {
-                border: 5px solid #4CAF50;
-                border-radius: 15px;
-                padding: 10px;
-                background: linear-gradient(135deg, #C8E6C9 0%, #4CAF50 100%);
-                box-shadow: 0 0 20px rgba(76, 175, 80, 0.5);
-                animation: pulse-green 0.5s;
+                transform: scale(1);
             }
-            
-            /* Scanner Frame - Default State */
-            .scanner-frame-default {
-                border: 3px solid #667eea;
-                border-radius: 15px;
-                padding: 10px;
-                background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
+            50% { 
+                box-shadow: 0 0 40px rgba(255, 193, 7, 0.8);
+                transform: scale(1.02);
             }
-            
-            @keyframes pulse-yellow {
-                0%, 100% { 
-                    box-shadow: 0 0 20px rgba(255, 193, 7, 0.5);
-                    transform: scale(1);
-                }
-                50% { 
-                    box-shadow: 0 0 40px rgba(255, 193, 7, 0.8);
-                    transform: scale(1.02);
-                }
-            }
-            
-            @keyframes pulse-green {
-                0% { 
-                    box-shadow: 0 0 0px rgba(76, 175, 80, 0);
-                    transform: scale(1);
-                }
-                50% { 
-                    box-shadow: 0 0 60px rgba(76, 175, 80, 1);
-                    transform: scale(1.05);
-                }
-                100% { 
-                    box-shadow: 0 0 20px rgba(76, 175, 80, 0.5);
-                    transform: scale(1);
-                }
-            }
-            
-            /* Status Indicator */
-            .scan-status {
-                text-align: center;
-                font-size: 1.2rem;
-                font-weight: bold;
-                padding: 0.5rem;
-                border-radius: 10px;
-                margin-bottom: 1rem;
-            }
-            
-            .scan-status-scanning {
-                background: #FFF9C4;
-                color: #F57F17;
-                border: 2px solid #FFC107;
+        }
+        
+        @keyframes pulse-green {
+            0% { 
+                box-shadow: 0 0 0px rgba(76, 175, 80, 0);
+                transform: scale(1);
             }
-            
-            .scan-status-success {
-                background: #C8E6C9;
-                color: #2E7D32;
-                border: 2px solid #4CAF50;
+            50% { 
+                box-shadow: 0 0 60px rgba(76, 175, 80, 1);
+                transform: scale(1.05);
             }
-            
-            .scan-status-waiting {
-                background: #E3F2FD;
-                color: #1565C0;
-                border: 2px solid #2196F3;
+            100% { 
+                box-shadow: 0 0 20px rgba(76, 175, 80, 0.5);
+                transform: scale(1);
             }
-            </style>
-        """, unsafe_allow_html=True)
+        }
         
-        # Initialize scan state
-        if 'scanner_state' not in st.session_state:
-            st.session_state.scanner_state = 'waiting'
+        /* Status Indicator */
+        .scan-status {
+            text-align: center;
+            font-size: 1.2rem;
+            font-weight: bold;
+            padding: 0.5rem;
+            border-radius: 10px;
+            margin-bottom: 1rem;
+        }
         
-        # Initialize last detected barcode
-        if 'last_detected_barcode' not in st.session_state:
-            st.session_state.last_detected_barcode = None
+        .scan-status-scanning {
+            background: #FFF9C4;
+            color: #F57F17;
+            border: 2px solid #FFC107;
+        }
         
-        # Determine frame class based on state
-        if st.session_state.scanner_state == 'scanning':
-            frame_class = "scanner-frame-scanning"
-            status_class = "scan-status-scanning"
-            status_icon = "🟡"
-            status_text = "SCANNING..."
-        elif st.session_state.scanner_state == 'success':
-            frame_class = "scanner-frame-success"
-            status_class = "scan-status-success"
-            status_icon = "🟢"
-            status_text = "BERHASIL!"
-        else:
-            frame_class = "scanner-frame-default"
-            status_class = "scan-status-waiting"
-            status_icon = "🔵"
-            status_text = "READY"
+        .scan-status-success {
+            background: #C8E6C9;
+            color: #2E7D32;
+            border: 2px solid #4CAF50;
+        }
         
-        # Status indicator
-        st.markdown(f"""
-            <div class="scan-status {status_class}">
-                <div style="font-size: 2rem; margin-bottom: 0.3rem;">{status_icon}</div>
-                <div>{status_text}</div>
-            </div>
-        """, unsafe_allow_html=True)
+        .scan-status-waiting {
+            background: #E3F2FD;
+            color: #1565C0;
+            border: 2px solid #2196F3;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    
+    # Initialize scan state
+    if 'scanner_state' not in st.session_state:
+        st.session_state.scanner_state = 'waiting'
+    
+    # Initialize last detected barcode
+    if 'last_detected_barcode' not in st.session_state:
+        st.session_state.last_detected_barcode = None
+    
+    # Generasi key komponen, nilai terakhir yang sudah diproses, dan state debounce
+    if 'scanner_generation' not in st.session_state:
+        st.session_state.scanner_generation = 0
+    if 'scanner_last_value' not in st.session_state:
+        st.session_state.scanner_last_value = None
+    if 'scan_debounce' not in st.session_state:
+        st.session_state.scan_debounce = {}
+    
+    # Determine frame class based on state
+    if st.session_state.scanner_state == 'scanning':
+        frame_class = "scanner-frame-scanning"
+        status_class = "scan-status-scanning"
+        status_icon = "🟡"
+        status_text = "SCANNING..."
+    elif st.session_state.scanner_state == 'success':
+        frame_class = "scanner-frame-success"
+        status_class = "scan-status-success"
+        status_icon = "🟢"
+        status_text = "BERHASIL!"
+    else:
+        frame_class = "scanner-frame-default"
+        status_class = "scan-status-waiting"
+        status_icon = "🔵"
+        status_text = "READY"
+    
+    # Status indicator
+    st.markdown(f"""
+        <div class="scan-status {status_class}">
+            <div style="font-size: 2rem; margin-bottom: 0.3rem;">{status_icon}</div>
+            <div>{status_text}</div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Scanner container with visual feedback
+    st.markdown(f'<div class="{frame_class}">', unsafe_allow_html=True)
+    
+    # Call scanner - Library akan tampilkan button dan camera
+    barcode_data = qrcode_scanner(key=f"barcode-scanner-{st.session_state.scanner_generation}")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Nilai yang sama dari komponen yang sama = rerun biasa, bukan deteksi baru
+    if not barcode_data or barcode_data == st.session_state.scanner_last_value:
+        if st.session_state.scanner_state != 'success':
+            st.session_state.scanner_state = 'scanning'
+        return None
+    
+    st.session_state.scanner_last_value = barcode_data
+    
+    if repeat_same:
+        # Pasang komponen baru agar barcode yang sama bisa terdeteksi lagi
+        st.session_state.scanner_generation += 1
+        st.session_state.scanner_last_value = None
+    
+    # FIXED: Return barcode data instead of calling st.rerun()
+    if debounce_scan(st.session_state.scan_debounce, barcode_data):
+        st.session_state.scanner_state = 'success'
+        st.session_state.last_detected_barcode = barcode_data
         
-        # Scanner container with visual feedback
-        st.markdown(f'<div class="{frame_class}">', unsafe_allow_html=True)
+        # Success feedback
+        st.success(f"✅ **SCAN BERHASIL!**")
+        st.code(barcode_data, language="text")
         
-        # Call scanner - Library akan tampilkan button dan camera
-        barcode_data = qrcode_scanner(key='barcode-scanner')
+        # Return the barcode data
+        return barcode_data
+    
+    # Deteksi ganda dalam jendela debounce (getaran kamera)
+    st.session_state.scanner_state = 'scanning'
+    if repeat_same:
+        st.rerun()
+    return None
+
+def _scan_unavailable():
+    """Fallback jika library scanner tidak tersedia"""
+    import streamlit as st
+    
+    st.error("""
+        ⚠️ **Scanner tidak tersedia**
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        📦 Install library:
+        ```bash
+        pip install streamlit-qrcode-scanner==0.1.2
+        ```
         
-        # FIXED: Return barcode data instead of calling st.rerun()
-        if barcode_data:
-            # Only process if it's a NEW barcode (prevent duplicates)
-            if barcode_data != st.session_state.last_detected_barcode:
-                st.session_state.scanner_state = 'success'
-                st.session_state.last_detected_barcode = barcode_data
-                
-                # Success feedback
-                st.success(f"✅ **SCAN BERHASIL!**")
-                st.code(barcode_data, language="text")
-                
-                # Return the barcode data
-                return barcode_data
-            else:
-                # Same barcode, don't process again
-                st.session_state.scanner_state = 'scanning'
-                return None
+        💡 **ALTERNATIF:** Gunakan 'Input Manual'
+    """)
+    return None
+
+# ==================== BARCODE GENERATION ====================
+
+
+# Batch kecil dirender langsung, tanpa overhead start process pool
+PARALLEL_MIN_ITEMS = 50
+
+# Jumlah gambar barcode yang disimpan di cache memori (LRU)
+BARCODE_CACHE_SIZE = 512
+
+# Manifest render: barcode_id -> hash label yang terakhir dirender
+RENDER_MANIFEST_FILE = ".manifest.json"
+BARCODE_SYMBOLOGY = 'code128'
+BARCODE_WRITER_OPTIONS = {}
+
+# Format file barcode: 'svg' (vektor, tanpa rasterisasi Pillow) atau 'png'
+BARCODE_IMAGE_FORMATS = ('png', 'svg')
+BARCODE_IMAGE_FORMAT = 'png'
+
+def _resolve_image_format(image_format=None):
+    """Validasi format gambar barcode (default BARCODE_IMAGE_FORMAT)"""
+    image_format = (image_format or BARCODE_IMAGE_FORMAT).lower()
+    if image_format not in BARCODE_IMAGE_FORMATS:
+        raise ValueError(f"Format barcode tidak dikenal: {image_format}")
+    return image_format
+
+def _barcode_writer(image_format):
+    """Writer python-barcode sesuai format"""
+    return SVGWriter() if image_format == 'svg' else ImageWriter()
+
+def _render_barcode_file(barcode_id, output_folder, image_format=None):
+    """Render satu barcode Code128 ke file PNG/SVG dan kembalikan path-nya"""
+    image_format = _resolve_image_format(image_format)
+    code128 = barcode.get_barcode_class(BARCODE_SYMBOLOGY)
+    barcode_instance = code128(str(barcode_id), writer=_barcode_writer(image_format))
+    filename = os.path.join(output_folder, str(barcode_id))
+    return barcode_instance.save(filename, options=BARCODE_WRITER_OPTIONS)
+
+# ==================== RENDER DI MEMORI ====================
+
+@lru_cache(maxsize=BARCODE_CACHE_SIZE)
+def _render_barcode_cached(barcode_id, image_format, label_hash):
+    """Render barcode ke bytes; label_hash ikut jadi kunci cache agar label berubah ter-render ulang"""
+    code128 = barcode.get_barcode_class(BARCODE_SYMBOLOGY)
+    buffer = io.BytesIO()
+    code128(barcode_id, writer=_barcode_writer(image_format)).write(buffer, options=BARCODE_WRITER_OPTIONS)
+    return buffer.getvalue()
+
+def render_barcode_bytes(barcode_id, image_format='png'):
+    """
+    Fungsi untuk merender barcode langsung ke memori (tanpa file)
+    Hasil disimpan di cache LRU sehingga galeri dan export tidak merender ulang
+    
+    Args:
+        barcode_id: ID barcode
+        image_format: 'png' atau 'svg'
+    
+    Returns:
+        bytes: Isi gambar, atau None jika gagal
+    """
+    try:
+        barcode_id = str(barcode_id)
+        image_format = _resolve_image_format(image_format)
+        return _render_barcode_cached(
+            barcode_id, image_format, barcode_label_hash(barcode_id, image_format=image_format)
+        )
+    except Exception as e:
+        print(f"Render barcode error: {e}")
+        return None
+
+def clear_barcode_cache():
+    """Kosongkan cache render barcode di memori"""
+    _render_barcode_cached.cache_clear()
+
+# ==================== RENDER MANIFEST ====================
+
+def barcode_label_hash(barcode_id, label_text=None, image_format=None):
+    """
+    Hash konten label: berubah jika ID, simbologi, writer, opsi writer atau teks label berubah
+    
+    Args:
+        barcode_id: ID barcode
+        label_text: Teks di bawah barcode (default barcode_id)
+        image_format: 'png' atau 'svg' (default BARCODE_IMAGE_FORMAT)
+    
+    Returns:
+        str: Hash SHA-1 label
+    """
+    image_format = _resolve_image_format(image_format)
+    payload = json.dumps({
+        'barcode_id': str(barcode_id),
+        'symbology': BARCODE_SYMBOLOGY,
+        'writer': type(_barcode_writer(image_format)).__name__,
+        'writer_options': BARCODE_WRITER_OPTIONS,
+        'label_text': str(label_text if label_text is not None else barcode_id),
+        'library_version': getattr(barcode, '__version__', '')
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def load_render_manifest(output_folder=None):
+    """
+    Muat manifest render dari folder barcode
+    
+    Returns:
+        dict: {barcode_id: hash}
+    """
+    manifest_path = os.path.join(output_folder or BARCODES_FOLDER, RENDER_MANIFEST_FILE)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_render_manifest(manifest, output_folder=None):
+    """Simpan manifest render (ditulis atomik lewat file sementara)"""
+    output_folder = output_folder or BARCODES_FOLDER
+    os.makedirs(output_folder, exist_ok=True)
+    manifest_path = os.path.join(output_folder, RENDER_MANIFEST_FILE)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+def plan_barcode_render(barcode_ids, output_folder=None, force=False, image_format=None,
+                        exclude=None):
+    """
+    Tentukan barcode yang perlu dirender ulang dengan satu kali scan folder
+    
+    Args:
+        barcode_ids: List barcode ID di katalog
+        output_folder: Folder barcode
+        force: Render ulang semua
+        image_format: 'png' atau 'svg' (default BARCODE_IMAGE_FORMAT)
+        exclude: Barcode ID katalog yang tidak dirender (misal tidak lolos validasi);
+            tetap dihitung bagian katalog sehingga gambarnya tidak dihapus
+    
+    Returns:
+        dict: to_render, unchanged, excluded, orphans (file tanpa produk),
+              stale_files (file format lain milik produk katalog), manifest
+    """
+    output_folder = output_folder or BARCODES_FOLDER
+    image_format = _resolve_image_format(image_format)
+    exclude = set(map(str, exclude or []))
+    manifest = load_render_manifest(output_folder)
+    
+    files_by_format = {fmt: set() for fmt in BARCODE_IMAGE_FORMATS}
+    if os.path.isdir(output_folder):
+        with os.scandir(output_folder) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if ext[1:] in files_by_format and entry.is_file():
+                    files_by_format[ext[1:]].add(stem)
+    existing_files = files_by_format[image_format]
+    all_files = set().union(*files_by_format.values())
+    
+    to_render = []
+    unchanged = []
+    excluded = []
+    catalog = set()
+    
+    for barcode_id in map(str, barcode_ids):
+        # ID duplikat di katalog hanya direncanakan sekali (satu file per ID)
+        if barcode_id in catalog:
+            continue
+        catalog.add(barcode_id)
+        if barcode_id in exclude:
+            excluded.append(barcode_id)
+        elif (not force and barcode_id in existing_files
+                and manifest.get(barcode_id) == barcode_label_hash(barcode_id, image_format=image_format)):
+            unchanged.append(barcode_id)
         else:
-            # Set state to scanning when camera active
-            if st.session_state.scanner_state != 'success':
-                st.session_state.scanner_state = 'scanning'
-            return None
-else:
-    # Fallback jika library tidak tersedia
-    def scan_barcode_realtime():
-        """Fallback function"""
-        st.error("""
-            ⚠️ **Scanner tidak tersedia**
-            
-            📦 Install library:
-            ```bash
-            pip install streamlit-qrcode-scanner==0.1.2
-            ```
-            
-            💡 **ALTERNATIF:** Gunakan 'Input Manual'
-        """)
+            to_render.append(barcode_id)
+    
+    orphans = sorted((all_files | set(manifest)) - catalog)
+    stale_files = sorted(
+        f"{barcode_id}.{fmt}"
+        for fmt, stems in files_by_format.items() if fmt != image_format
+        for barcode_id in (stems & catalog) - exclude
+    )
+    
+    return {
+        'to_render': to_render,
+        'unchanged': unchanged,
+        'excluded': excluded,
+        'orphans': orphans,
+        'stale_files': stale_files,
+        'manifest': manifest
+    }
+
+def _remove_barcode_files(output_folder, filenames):
+    """Hapus file barcode, kembalikan True jika semua berhasil"""
+    ok = True
+    for filename in filenames:
+        try:
+            os.remove(os.path.join(output_folder, filename))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Gagal menghapus barcode {filename}: {e}")
+            ok = False
+    return ok
+
+def sync_barcodes(barcode_ids, output_folder=None, force=False, prune=True,
+                  max_workers=None, progress_callback=None, image_format=None, plan=None,
+                  exclude=None):
+    """
+    Sinkronkan folder barcode dengan katalog: render yang baru/berubah saja
+    dan hapus gambar yatim (produk sudah tidak ada)
+    
+    Args:
+        barcode_ids: List barcode ID di katalog (lengkap jika prune=True)
+        output_folder: Folder barcode
+        force: Render ulang semua
+        prune: Hapus gambar yang tidak ada di katalog
+        max_workers: Jumlah process
+        progress_callback: Fungsi callback(selesai, total)
+        image_format: 'png' atau 'svg' (default BARCODE_IMAGE_FORMAT)
+        plan: Hasil plan_barcode_render dengan argumen yang sama
+            (opsional, agar folder tidak di-scan dua kali)
+        exclude: Barcode ID katalog yang tidak dirender, gambarnya tidak dihapus
+    
+    Returns:
+        dict: rendered, skipped, removed, failed_items
+    """
+    output_folder = output_folder or BARCODES_FOLDER
+    image_format = _resolve_image_format(image_format)
+    if plan is None:
+        plan = plan_barcode_render(barcode_ids, output_folder, force=force, image_format=image_format,
+                                   exclude=exclude)
+    manifest = plan['manifest']
+    
+    result = generate_barcodes_parallel(
+        plan['to_render'],
+        output_folder=output_folder,
+        max_workers=max_workers,
+        progress_callback=progress_callback,
+        image_format=image_format
+    )
+    
+    for barcode_id in result['paths']:
+        manifest[barcode_id] = barcode_label_hash(barcode_id, image_format=image_format)
+    
+    removed = []
+    if prune:
+        for barcode_id in plan['orphans']:
+            filenames = [f"{barcode_id}.{fmt}" for fmt in BARCODE_IMAGE_FORMATS]
+            if _remove_barcode_files(output_folder, filenames):
+                manifest.pop(barcode_id, None)
+                removed.append(barcode_id)
+        
+        # Setelah ganti format, file format lama tidak dipakai lagi
+        _remove_barcode_files(output_folder, plan['stale_files'])
+        
+        # Thumbnail galeri milik produk yang sudah dihapus
+        _remove_barcode_files(
+            os.path.join(output_folder, THUMBNAIL_FOLDER_NAME),
+            [f"{barcode_id}.png" for barcode_id in removed]
+        )
+    
+    save_render_manifest(manifest, output_folder)
+    
+    return {
+        'rendered': result['success_count'],
+        'skipped': len(plan['unchanged']),
+        'removed': removed,
+        'failed_items': result['failed_items']
+    }
+
+# ==================== GALERI & THUMBNAIL ====================
+
+# Thumbnail PNG kecil untuk galeri, disimpan di subfolder folder barcode
+THUMBNAIL_FOLDER_NAME = ".thumbs"
+THUMBNAIL_SIZE = (240, 120)
+
+# Index folder barcode per folder: {folder: (tanda versi, index)}
+_IMAGE_INDEX_CACHE = {}
+
+def _folder_signature(output_folder):
+    """
+    Tanda versi folder: mtime folder dan inode manifest
+    Setiap render/hapus menulis ulang manifest lewat os.replace
+    (inode baru), jadi tanda ini berubah walau mtime folder kasar
+    """
+    try:
+        folder_mtime = os.stat(output_folder).st_mtime_ns
+    except OSError:
         return None
+    try:
+        manifest_inode = os.stat(os.path.join(output_folder, RENDER_MANIFEST_FILE)).st_ino
+    except OSError:
+        manifest_inode = None
+    return (folder_mtime, manifest_inode)
 
-# ==================== BARCODE GENERATION ====================
+def get_barcode_image_index(output_folder=None):
+    """
+    Index gambar barcode di folder (satu kali scandir, di-cache sampai folder berubah)
+    
+    Args:
+        output_folder: Folder barcode
+    
+    Returns:
+        dict: {barcode_id: {'path', 'format', 'mtime_ns'}}
+    """
+    output_folder = output_folder or BARCODES_FOLDER
+    signature = _folder_signature(output_folder)
+    if signature is None:
+        return {}
+    
+    cached = _IMAGE_INDEX_CACHE.get(output_folder)
+    if cached and cached[0] == signature:
+        return cached[1]
+    
+    index = {}
+    with os.scandir(output_folder) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext[1:] not in BARCODE_IMAGE_FORMATS or not entry.is_file():
+                continue
+            mtime_ns = entry.stat().st_mtime_ns
+            # Jika ada PNG dan SVG (sisa ganti format), pakai yang terbaru
+            if stem not in index or mtime_ns > index[stem]['mtime_ns']:
+                index[stem] = {'path': entry.path, 'format': ext[1:], 'mtime_ns': mtime_ns}
+    
+    _IMAGE_INDEX_CACHE[output_folder] = (signature, index)
+    return index
 
-def generate_barcode(barcode_id, product_name):
-    """Generate barcode Code128 PNG"""
+def _thumbnail_mtimes(thumbs_folder):
+    """Mtime semua thumbnail dengan satu kali scandir: {barcode_id: mtime_ns}"""
     try:
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        barcodes_folder = os.path.join(project_root, "barcodes")
-        os.makedirs(barcodes_folder, exist_ok=True)
+        with os.scandir(thumbs_folder) as entries:
+            return {
+                os.path.splitext(entry.name)[0]: entry.stat().st_mtime_ns
+                for entry in entries if entry.name.endswith('.png')
+            }
+    except OSError:
+        return {}
+
+def _render_thumbnail(source_path, thumb_path):
+    """Perkecil gambar barcode PNG ke THUMBNAIL_SIZE (ditulis atomik)"""
+    from PIL import Image
+    
+    with Image.open(source_path) as img:
+        thumb = img.convert('L')
+        thumb.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+    temp_path = thumb_path + ".tmp"
+    thumb.save(temp_path, format='PNG', optimize=True)
+    os.replace(temp_path, thumb_path)
+
+def get_barcode_thumbnails(barcode_ids, output_folder=None):
+    """
+    Path thumbnail galeri untuk sejumlah barcode (biasanya satu halaman galeri)
+    Thumbnail dibuat sekali dan dibuat ulang hanya jika gambar sumber lebih baru.
+    SVG tidak perlu thumbnail (vektor, ringan), path aslinya dikembalikan
+    
+    Args:
+        barcode_ids: List barcode ID
+        output_folder: Folder barcode
+    
+    Returns:
+        dict: {barcode_id: path gambar} untuk barcode yang punya file gambar
+    """
+    output_folder = output_folder or BARCODES_FOLDER
+    index = get_barcode_image_index(output_folder)
+    thumbs_folder = os.path.join(output_folder, THUMBNAIL_FOLDER_NAME)
+    thumb_mtimes = None
+    result = {}
+    
+    for barcode_id in map(str, barcode_ids):
+        info = index.get(barcode_id)
+        if info is None:
+            continue
+        if info['format'] != 'png':
+            result[barcode_id] = info['path']
+            continue
+        
+        if thumb_mtimes is None:
+            thumb_mtimes = _thumbnail_mtimes(thumbs_folder)
+        
+        thumb_path = os.path.join(thumbs_folder, f"{barcode_id}.png")
+        if thumb_mtimes.get(barcode_id, -1) < info['mtime_ns']:
+            try:
+                os.makedirs(thumbs_folder, exist_ok=True)
+                _render_thumbnail(info['path'], thumb_path)
+            except Exception as e:
+                print(f"Error creating thumbnail {barcode_id}: {e}")
+                thumb_path = info['path']
+        result[barcode_id] = thumb_path
+    
+    return result
+
+def _render_barcode_chunk(barcode_ids, output_folder, image_format=None):
+    """
+    Worker process pool: render satu potongan barcode
+    Error dicatat per item agar satu barcode rusak tidak menggagalkan potongan
+    
+    Returns:
+        list: Tuple (barcode_id, path atau None, error atau None)
+    """
+    results = []
+    for barcode_id in barcode_ids:
+        try:
+            results.append((barcode_id, _render_barcode_file(barcode_id, output_folder, image_format), None))
+        except Exception as e:
+            results.append((barcode_id, None, str(e)))
+    return results
+
+def generate_barcodes_parallel(barcode_ids, output_folder=None, max_workers=None,
+                               chunk_size=None, progress_callback=None, image_format=None):
+    """
+    Generate banyak barcode secara paralel dengan process pool
+    
+    Args:
+        barcode_ids: List barcode ID
+        output_folder: Folder tujuan (default BARCODES_FOLDER)
+        max_workers: Jumlah process (default jumlah CPU)
+        chunk_size: Jumlah barcode per tugas (default otomatis)
+        progress_callback: Fungsi callback(selesai, total) untuk progress bar
+        image_format: 'png' atau 'svg' (default BARCODE_IMAGE_FORMAT)
+    
+    Returns:
+        dict: success_count, paths {barcode_id: path}, failed_items [{barcode_id, error}]
+    """
+    output_folder = output_folder or BARCODES_FOLDER
+    image_format = _resolve_image_format(image_format)
+    os.makedirs(output_folder, exist_ok=True)
+    
+    return run_parallel_chunks(
+        _render_barcode_chunk,
+        [str(b) for b in barcode_ids],
+        worker_args=(output_folder, image_format),
+        max_workers=max_workers,
+        chunk_size=chunk_size,
+        progress_callback=progress_callback,
+        min_parallel_items=PARALLEL_MIN_ITEMS
+    )
+
+def generate_barcode(barcode_id, product_name, force=False, image_format=None):
+    """Generate barcode Code128 PNG/SVG ke disk (dilewati jika label tidak berubah)"""
+    try:
+        barcode_id = str(barcode_id)
+        image_format = _resolve_image_format(image_format)
+        label_hash = barcode_label_hash(barcode_id, image_format=image_format)
+        manifest = load_render_manifest()
+        full_path = os.path.join(BARCODES_FOLDER, f"{barcode_id}.{image_format}")
         
-        code128 = barcode.get_barcode_class('code128')
-        barcode_instance = code128(barcode_id, writer=ImageWriter())
+        if not force and manifest.get(barcode_id) == label_hash and os.path.exists(full_path):
+            return full_path
+        
+        image_bytes = render_barcode_bytes(barcode_id, image_format)
+        if image_bytes is None:
+            return None
         
-        filename = os.path.join(barcodes_folder, barcode_id)
-        full_path = barcode_instance.save(filename)
+        os.makedirs(BARCODES_FOLDER, exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(image_bytes)
         
+        manifest[barcode_id] = label_hash
+        save_render_manifest(manifest)
         return full_path
     except Exception as e:
         print(f"Generate barcode error: {e}")
         return None
 
-def generate_batch_barcodes(products_df):
-    """Batch generate barcodes"""
+def generate_batch_barcodes(products_df, progress_callback=None, max_workers=None,
+                            force=False, prune=False, image_format=None):
+    """
+    Batch generate barcodes (paralel, hanya label baru/berubah)
+    prune=True menghapus gambar yatim, hanya aman jika products_df = seluruh katalog
+    image_format 'svg' melewati rasterisasi Pillow (lebih cepat, tajam di semua ukuran)
+    Barcode yang tidak lolos validate_barcodes tidak dirender dan masuk errors
+    """
     try:
-        success_count = 0
-        failed_items = []
+        validation = validate_barcodes(products_df['barcode_id'])
+        rejected = [
+            {'barcode_id': row['barcode_id'], 'error': row['error']}
+            for row in validation[~validation['valid']].to_dict('records')
+        ]
         
-        for index, row in products_df.iterrows():
-            result = generate_barcode(row['barcode_id'], row['nama_produk'])
-            if result:
-                success_count += 1
-            else:
-                failed_items.append(row['barcode_id'])
+        # Orphan dihitung dari seluruh katalog: gambar produk yang ditolak tidak dihapus
+        valid_ids = validation.loc[validation['valid'], 'barcode_id']
+        result = sync_barcodes(
+            validation['barcode_id'].tolist(),
+            exclude=set(validation['barcode_id']) - set(valid_ids),
+            force=force,
+            prune=prune,
+            max_workers=max_workers,
+            progress_callback=progress_callback,
+            image_format=image_format
+        )
+        success_count = result['rendered'] + result['skipped']
         
+        message = (
+            f"Generate {success_count}/{len(products_df)} berhasil "
+            f"({result['rendered']} dirender, {result['skipped']} tidak berubah"
+        )
+        if result['removed']:
+            message += f", {len(result['removed'])} gambar yatim dihapus"
+        if rejected:
+            message += f", {len(rejected)} barcode tidak valid"
+        
+        errors = rejected + result['failed_items']
         return {
             'success': True,
             'total': len(products_df),
             'success_count': success_count,
-            'failed_items': failed_items,
-            'message': f"Generate {success_count}/{len(products_df)} berhasil"
+            'rendered': result['rendered'],
+            'skipped': result['skipped'],
+            'removed': result['removed'],
+            'rejected': rejected,
+            'failed_items': [item['barcode_id'] for item in errors],
+            'errors': errors,
+            'message': message + ")"
         }
     except Exception as e:
         return {
@@ -270,44 +828,116 @@ def generate_batch_barcodes(products_df):
             'message': f"Error: {str(e)}"
         }
 
+# ==================== VALIDASI ====================
+
+# Panjang minimal barcode internal
+BARCODE_MIN_LENGTH = 3
+
+# Karakter yang mudah tertukar saat diketik/dibaca (O-0, I/L-1),
+# dipakai untuk mendeteksi barcode yang hampir sama
+_NEAR_DUPLICATE_TABLE = str.maketrans('OIL', '011')
+
+def _check_digit_valid(digits, weights):
+    """
+    Cek digit terakhir (mod 10) untuk banyak kode sekaligus
+    
+    Args:
+        digits: Series string angka dengan panjang sama
+        weights: Bobot untuk setiap digit kecuali digit cek
+    
+    Returns:
+        ndarray: Array bool per kode
+    """
+    if digits.empty:
+        return np.zeros(0, dtype=bool)
+    length = len(weights) + 1
+    matrix = np.frombuffer(''.join(digits).encode('ascii'), dtype=np.uint8).reshape(-1, length) - 48
+    expected = (10 - (matrix[:, :-1].astype(np.int64) @ np.array(weights)) % 10) % 10
+    return expected == matrix[:, -1]
+
+def validate_barcodes(barcode_ids):
+    """
+    Validasi banyak barcode sekaligus (vectorized)
+    - Code128: minimal BARCODE_MIN_LENGTH karakter, tanpa spasi, hanya ASCII
+    - 13 digit angka dianggap EAN-13, 12 digit UPC-A: digit cek harus benar
+    - Duplikat: kemunculan kedua dan seterusnya ditolak
+    - Hampir sama (beda huruf besar/kecil, tanda baca, O/0, I/L/1): hanya peringatan
+    
+    Args:
+        barcode_ids: Series/list barcode ID
+    
+    Returns:
+        DataFrame: barcode_id, jenis, valid, error, mirip_dengan (index sama dengan input)
+    """
+    ids = pd.Series(barcode_ids, dtype='object')
+    codes = ids.fillna('').astype(str)
+    
+    jenis = pd.Series('CODE128', index=codes.index, dtype='object')
+    error = pd.Series('', index=codes.index, dtype='object')
+    
+    def _reject(mask, message):
+        mask = mask & (error == '')
+        error[mask] = message
+    
+    _reject(codes.str.len() < BARCODE_MIN_LENGTH, f"Terlalu pendek (min {BARCODE_MIN_LENGTH} karakter)")
+    _reject(codes.str.contains(r'\s', regex=True), "Mengandung spasi")
+    _reject(~codes.str.fullmatch(r'[\x00-\x7f]*'), "Karakter di luar Code128 (non-ASCII)")
+    
+    # EAN-13 / UPC-A: digit cek dihitung sekaligus untuk semua kode sepanjang itu
+    for name, length, weights in (('EAN-13', 13, [1, 3] * 6), ('UPC-A', 12, [3, 1] * 5 + [3])):
+        mask = codes.str.fullmatch(rf'\d{{{length}}}')
+        jenis[mask] = name
+        valid_check = pd.Series(_check_digit_valid(codes[mask], weights), index=codes[mask].index)
+        _reject(mask & ~valid_check.reindex(codes.index, fill_value=True), f"Digit cek {name} salah")
+    
+    _reject(codes.duplicated(keep='first') & (codes != ''), "Duplikat")
+    
+    # Hampir sama: kunci normalisasi sama tapi teks asli berbeda
+    near_key = codes.str.upper().str.replace(r'[^0-9A-Z]', '', regex=True).str.translate(_NEAR_DUPLICATE_TABLE)
+    variants = pd.DataFrame({'key': near_key, 'code': codes}).drop_duplicates()
+    variant_count = variants['key'].value_counts()
+    near_duplicate = near_key.map(variant_count).gt(1) & (near_key != '')
+    
+    # Biasanya hanya sedikit, cukup dipetakan per kunci: tunjuk varian lain yang pertama muncul
+    mirip_dengan = pd.Series('', index=codes.index, dtype='object')
+    if near_duplicate.any():
+        grouped = variants[variants['key'].isin(near_key[near_duplicate])].groupby('key')['code'].agg(list)
+        mirip_dengan[near_duplicate] = [
+            next(c for c in grouped[key] if c != code)
+            for key, code in zip(near_key[near_duplicate], codes[near_duplicate])
+        ]
+    
+    return pd.DataFrame({
+        'barcode_id': codes,
+        'jenis': jenis,
+        'valid': error == '',
+        'error': error,
+        'mirip_dengan': mirip_dengan
+    })
+
 # ==================== UTILITY ====================
 
 def check_scanner_availability():
     """Check and return scanner status"""
     
-    if SCANNER_READY:
+    scanner_ready = is_scanner_available()
+    
+    if scanner_ready:
         message = "✅ Scanner siap: 400x400 preview dengan visual feedback\n" + \
                  "   🟡 Kuning = Scanning | 🟢 Hijau = Berhasil"
     else:
         message = "❌ Install: pip install streamlit-qrcode-scanner==0.1.2"
     
     return {
-        'available': SCANNER_READY,
+        'available': scanner_ready,
         'message': message,
-        'method': 'qrcode-scanner-js' if SCANNER_READY else None,
+        'method': 'qrcode-scanner-js' if scanner_ready else None,
         'requires_https': True
     }
 
 def validate_barcode_format(barcode_id):
-    """Validate barcode format"""
+    """Validate barcode format (satu barcode, aturan sama dengan validate_barcodes)"""
     try:
-        if not barcode_id or len(barcode_id) < 3:
-            return False
-        if ' ' in barcode_id:
-            return False
-        return True
-    except:
+        return bool(validate_barcodes([barcode_id])['valid'].iloc[0])
+    except Exception:
         return False
-
-# ==================== MODULE INFO ====================
-
-print("📦 Barcode Handler Module Loaded")
-print(f"   Scanner: {'✅ Ready' if SCANNER_READY else '❌ Not Available'}")
-if SCANNER_READY:
-    print(f"   Method: JavaScript-based (streamlit-qrcode-scanner)")
-    print(f"   Preview: 400x400 with visual feedback")
-    print(f"   Visual: 🟡 Yellow (scanning) | 🟢 Green (success)")
-    print(f"   FIXED: No recursion loop")
-else:
-    print(f"   Install: pip install streamlit-qrcode-scanner==0.1.2")
-print()
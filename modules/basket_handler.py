@@ -0,0 +1,204 @@
+"""
+Module untuk analisis keranjang belanja (market basket analysis)
+Menghitung pasangan produk yang sering dibeli bersamaan dalam satu struk
+"""
+
+import pandas as pd
+from collections import Counter
+from itertools import combinations
+
+# State co-occurrence disimpan di memori dan diperbarui secara inkremental:
+# hanya baris transaksi baru yang diproses pada setiap pemanggilan.
+# pair_counts adalah matriks item-item sparse (hanya pasangan yang muncul)
+_BASKET_STATE = {
+    'row_count': 0,
+    'last_trx_id': None,
+    'n_baskets': 0,
+    'item_counts': Counter(),
+    'pair_counts': Counter(),
+    'item_names': {},
+    'last_basket': None
+}
+
+# ==================== FUNGSI HELPER ====================
+
+def _reset_state():
+    """Reset state co-occurrence ke kondisi awal"""
+    _BASKET_STATE['row_count'] = 0
+    _BASKET_STATE['last_trx_id'] = None
+    _BASKET_STATE['n_baskets'] = 0
+    _BASKET_STATE['item_counts'] = Counter()
+    _BASKET_STATE['pair_counts'] = Counter()
+    _BASKET_STATE['item_names'] = {}
+    _BASKET_STATE['last_basket'] = None
+
+def _basket_keys(transactions_df):
+    """
+    Fungsi untuk mendapatkan kunci struk tiap baris
+    Transaksi lama tanpa struk_id dianggap satu struk per baris
+    
+    Args:
+        transactions_df: DataFrame transaksi
+    
+    Returns:
+        Series: ID struk per baris
+    """
+    if 'struk_id' in transactions_df.columns:
+        return transactions_df['struk_id'].fillna(transactions_df['transaksi_id'])
+    return transactions_df['transaksi_id']
+
+def _apply_basket(items, sign=1):
+    """
+    Fungsi untuk menambah (sign=1) atau mengurangi (sign=-1) kontribusi
+    satu struk ke matriks co-occurrence
+    
+    Args:
+        items: Set barcode_id dalam satu struk
+        sign: 1 untuk menambah, -1 untuk mengurangi
+    """
+    _BASKET_STATE['n_baskets'] += sign
+    for item in items:
+        _BASKET_STATE['item_counts'][item] += sign
+    for pair in combinations(sorted(items), 2):
+        _BASKET_STATE['pair_counts'][pair] += sign
+
+def _is_prefix_unchanged(transactions_df):
+    """
+    Fungsi untuk mengecek apakah baris yang sudah diproses tidak berubah
+    (file transaksi hanya bertambah di akhir)
+    
+    Args:
+        transactions_df: DataFrame transaksi lengkap
+    
+    Returns:
+        bool: True jika state masih bisa dipakai
+    """
+    row_count = _BASKET_STATE['row_count']
+    
+    if row_count == 0:
+        return True
+    if len(transactions_df) < row_count:
+        return False
+    
+    return transactions_df['transaksi_id'].iloc[row_count - 1] == _BASKET_STATE['last_trx_id']
+
+# ==================== FUNGSI CO-OCCURRENCE ====================
+
+def update_cooccurrence(transactions_df):
+    """
+    Fungsi untuk memperbarui matriks co-occurrence secara inkremental
+    Hanya baris yang belum pernah diproses yang dihitung
+    
+    Args:
+        transactions_df: DataFrame transaksi lengkap (tidak difilter)
+    
+    Returns:
+        int: Jumlah baris baru yang diproses
+    """
+    if transactions_df.empty:
+        _reset_state()
+        return 0
+    
+    if not _is_prefix_unchanged(transactions_df):
+        _reset_state()
+    
+    new_rows = transactions_df.iloc[_BASKET_STATE['row_count']:]
+    
+    if new_rows.empty:
+        return 0
+    
+    keys = _basket_keys(new_rows)
+    _BASKET_STATE['item_names'].update(
+        dict(zip(new_rows['barcode_id'], new_rows['nama_produk']))
+    )
+    
+    # Kelompokkan barcode per struk (urutan struk dipertahankan)
+    baskets = dict(new_rows['barcode_id'].groupby(keys, sort=False).agg(set))
+    
+    # Struk terakhir yang sebelumnya diproses bisa berlanjut di baris baru
+    last_basket = _BASKET_STATE['last_basket']
+    if last_basket is not None and last_basket[0] in baskets:
+        _apply_basket(last_basket[1], sign=-1)
+        baskets[last_basket[0]] |= last_basket[1]
+    
+    for items in baskets.values():
+        _apply_basket(items)
+    
+    last_key = keys.iloc[-1]
+    _BASKET_STATE['row_count'] = len(transactions_df)
+    _BASKET_STATE['last_trx_id'] = transactions_df['transaksi_id'].iloc[-1]
+    _BASKET_STATE['last_basket'] = (last_key, baskets[last_key])
+    
+    return len(new_rows)
+
+def get_association_pairs(transactions_df, min_count=2, top_n=20, sort_by='lift'):
+    """
+    Fungsi untuk mendapatkan pasangan produk dengan asosiasi terkuat
+    
+    Args:
+        transactions_df: DataFrame transaksi lengkap (tidak difilter)
+        min_count: Minimal jumlah struk yang memuat pasangan
+        top_n: Jumlah pasangan yang dikembalikan
+        sort_by: Kolom pengurutan ('lift', 'support', 'confidence' atau 'jumlah_struk')
+    
+    Returns:
+        DataFrame: Pasangan produk dengan support, confidence dan lift
+    """
+    columns = [
+        'produk_a', 'produk_b', 'jumlah_struk', 'support',
+        'confidence_a_b', 'confidence_b_a', 'confidence', 'lift'
+    ]
+    
+    try:
+        update_cooccurrence(transactions_df)
+        
+        n_baskets = _BASKET_STATE['n_baskets']
+        pairs = [(a, b, n) for (a, b), n in _BASKET_STATE['pair_counts'].items() if n >= min_count]
+        
+        if n_baskets == 0 or not pairs:
+            return pd.DataFrame(columns=columns)
+        
+        pairs_df = pd.DataFrame(pairs, columns=['item_a', 'item_b', 'jumlah_struk'])
+        item_counts = pd.Series(_BASKET_STATE['item_counts'], dtype='float64')
+        count_a = pairs_df['item_a'].map(item_counts)
+        count_b = pairs_df['item_b'].map(item_counts)
+        
+        # Hitung metrik asosiasi secara vektor
+        pairs_df['support'] = pairs_df['jumlah_struk'] / n_baskets
+        pairs_df['confidence_a_b'] = pairs_df['jumlah_struk'] / count_a
+        pairs_df['confidence_b_a'] = pairs_df['jumlah_struk'] / count_b
+        pairs_df['confidence'] = pairs_df[['confidence_a_b', 'confidence_b_a']].max(axis=1)
+        pairs_df['lift'] = pairs_df['jumlah_struk'] * n_baskets / (count_a * count_b)
+        
+        names = _BASKET_STATE['item_names']
+        pairs_df['produk_a'] = pairs_df['item_a'].map(lambda x: names.get(x, x))
+        pairs_df['produk_b'] = pairs_df['item_b'].map(lambda x: names.get(x, x))
+        
+        pairs_df = pairs_df.sort_values([sort_by, 'jumlah_struk'], ascending=False).head(top_n)
+        
+        return pairs_df[columns].reset_index(drop=True)
+    
+    except Exception as e:
+        print(f"Error calculating association pairs: {e}")
+        return pd.DataFrame(columns=columns)
+
+def get_basket_summary(transactions_df):
+    """
+    Fungsi untuk mendapatkan ringkasan struk
+    
+    Args:
+        transactions_df: DataFrame transaksi lengkap (tidak difilter)
+    
+    Returns:
+        dict: Jumlah struk, rata-rata item per struk, jumlah pasangan unik
+    """
+    update_cooccurrence(transactions_df)
+    
+    n_baskets = _BASKET_STATE['n_baskets']
+    total_items = sum(_BASKET_STATE['item_counts'].values())
+    
+    return {
+        'total_baskets': n_baskets,
+        'avg_items_per_basket': total_items / n_baskets if n_baskets else 0,
+        'unique_pairs': sum(1 for n in _BASKET_STATE['pair_counts'].values() if n > 0)
+    }
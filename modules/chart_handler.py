@@ -5,8 +5,21 @@ Menggunakan plotly untuk grafik interaktif
 
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from collections import OrderedDict
+
+from modules.rollup_handler import get_data_version
+
+# Batas kumulatif klasifikasi ABC (A: s.d. 80%, B: s.d. 95%, sisanya C)
+ABC_THRESHOLDS = (0.80, 0.95)
+
+# Cache hasil analisis ABC per signature data dan parameter (LRU kecil, agar
+# filter tanggal dan periode yang dipakai bergantian tidak saling menggusur)
+ABC_CACHE_SIZE = 8
+_ABC_CACHE = OrderedDict()
 
 # ==================== FUNGSI STATISTIK ====================
 
@@ -188,6 +201,32 @@ def create_sales_chart(transactions_df):
         print(f"Error creating sales chart: {e}")
         return go.Figure()
 
+def _aggregate_product_sales(transactions_df, period=None):
+    """
+    Fungsi untuk menghitung total penjualan per produk (dan per periode)
+    
+    Args:
+        transactions_df: DataFrame transaksi
+        period: Periode pandas ('M' bulanan, 'W' mingguan) atau None
+        
+    Returns:
+        DataFrame: jumlah, total_harga dan keuntungan per produk
+    """
+    keys = ['nama_produk']
+    df = transactions_df
+    
+    if period:
+        df = transactions_df.assign(
+            periode=pd.to_datetime(transactions_df['waktu']).dt.to_period(period).astype(str)
+        )
+        keys = ['periode', 'nama_produk']
+    
+    return df.groupby(keys).agg({
+        'jumlah': 'sum',
+        'total_harga': 'sum',
+        'keuntungan': 'sum'
+    }).reset_index()
+
 def create_product_sales_chart(transactions_df):
     """
     Fungsi untuk membuat grafik produk terlaris
@@ -200,10 +239,7 @@ def create_product_sales_chart(transactions_df):
     """
     try:
         # Group by produk
-        product_sales = transactions_df.groupby('nama_produk').agg({
-            'jumlah': 'sum',
-            'total_harga': 'sum'
-        }).reset_index()
+        product_sales = _aggregate_product_sales(transactions_df)
         
         # Sort dan ambil top 10
         product_sales = product_sales.sort_values('jumlah', ascending=False).head(10)
@@ -231,6 +267,145 @@ def create_product_sales_chart(transactions_df):
         print(f"Error creating product sales chart: {e}")
         return go.Figure()
 
+# ==================== FUNGSI ANALISIS ABC ====================
+
+def _frame_signature(transactions_df):
+    """
+    Fungsi untuk membuat signature ringkas DataFrame transaksi
+    Dipakai sebagai kunci cache tanpa menyimpan DataFrame. Hanya metadata
+    murah (O(1)): versi file data, jumlah baris, serta ID dan waktu baris
+    pertama/terakhir (membedakan rentang filter yang berbeda)
+    
+    Args:
+        transactions_df: DataFrame transaksi
+        
+    Returns:
+        tuple: Signature data
+    """
+    first = transactions_df.iloc[0]
+    last = transactions_df.iloc[-1]
+    return (
+        get_data_version(),
+        len(transactions_df),
+        str(first['transaksi_id']),
+        str(last['transaksi_id']),
+        str(first['waktu']),
+        str(last['waktu'])
+    )
+
+def calculate_abc_analysis(transactions_df, period=None, thresholds=ABC_THRESHOLDS):
+    """
+    Fungsi untuk klasifikasi ABC (Pareto) produk berdasarkan pendapatan
+    dan keuntungan. Kedua klasifikasi dihitung sekaligus dari satu groupby
+    
+    Args:
+        transactions_df: DataFrame transaksi
+        period: Periode pandas ('M' bulanan, 'W' mingguan) atau None untuk keseluruhan
+        thresholds: Tuple batas kumulatif kelas A dan B
+        
+    Returns:
+        DataFrame: Penjualan per produk dengan share kumulatif dan kelas ABC
+    """
+    try:
+        if transactions_df.empty:
+            return pd.DataFrame()
+        
+        cache_key = (_frame_signature(transactions_df), period, tuple(thresholds))
+        if cache_key in _ABC_CACHE:
+            _ABC_CACHE.move_to_end(cache_key)
+            return _ABC_CACHE[cache_key]
+        
+        product_sales = _aggregate_product_sales(transactions_df, period)
+        period_keys = ['periode'] if period else []
+        
+        for measure, label in [('total_harga', 'pendapatan'), ('keuntungan', 'keuntungan')]:
+            # Urutkan dari kontribusi terbesar di tiap periode
+            product_sales = product_sales.sort_values(
+                period_keys + [measure], ascending=[True] * len(period_keys) + [False]
+            )
+            values = product_sales[measure].clip(lower=0)
+            
+            if period:
+                cumulative = values.groupby(product_sales['periode']).cumsum()
+                total = values.groupby(product_sales['periode']).transform('sum')
+            else:
+                cumulative = values.cumsum()
+                total = values.sum()
+            
+            share = (cumulative / total).fillna(1.0)
+            # Kelas ditentukan dari share kumulatif sebelum produk ini masuk,
+            # sehingga produk yang melewati batas 80% tetap masuk kelas A
+            previous_share = share - (values / total).fillna(0)
+            
+            product_sales[f'share_kumulatif_{label}'] = share.round(4)
+            product_sales[f'kelas_{label}'] = np.select(
+                [previous_share < thresholds[0], previous_share < thresholds[1]],
+                ['A', 'B'],
+                default='C'
+            )
+        
+        product_sales = product_sales.sort_values(
+            period_keys + ['total_harga'], ascending=[True] * len(period_keys) + [False]
+        ).reset_index(drop=True)
+        
+        _ABC_CACHE[cache_key] = product_sales
+        while len(_ABC_CACHE) > ABC_CACHE_SIZE:
+            _ABC_CACHE.popitem(last=False)
+        
+        return product_sales
+        
+    except Exception as e:
+        print(f"Error calculating ABC analysis: {e}")
+        return pd.DataFrame()
+
+def create_abc_chart(abc_df, measure='total_harga'):
+    """
+    Fungsi untuk membuat grafik Pareto hasil analisis ABC
+    
+    Args:
+        abc_df: DataFrame hasil calculate_abc_analysis (tanpa periode)
+        measure: 'total_harga' (pendapatan) atau 'keuntungan'
+        
+    Returns:
+        plotly figure: Grafik bar + garis kumulatif
+    """
+    try:
+        label = 'pendapatan' if measure == 'total_harga' else 'keuntungan'
+        df = abc_df.sort_values(measure, ascending=False)
+        colors = df[f'kelas_{label}'].map({'A': 'green', 'B': 'orange', 'C': 'red'})
+        
+        fig = make_subplots(specs=[[{"secondary_y": True}]])
+        
+        fig.add_trace(go.Bar(
+            x=df['nama_produk'],
+            y=df[measure],
+            name=label.capitalize(),
+            marker_color=colors,
+            text=df[f'kelas_{label}']
+        ), secondary_y=False)
+        
+        fig.add_trace(go.Scatter(
+            x=df['nama_produk'],
+            y=df[f'share_kumulatif_{label}'] * 100,
+            mode='lines+markers',
+            name='Kumulatif (%)',
+            line=dict(color='blue', width=2)
+        ), secondary_y=True)
+        
+        fig.update_layout(
+            title=f'Analisis ABC berdasarkan {label.capitalize()}',
+            xaxis_tickangle=-45,
+            height=450
+        )
+        fig.update_yaxes(title_text='Rupiah (Rp)', secondary_y=False)
+        fig.update_yaxes(title_text='Kumulatif (%)', range=[0, 105], secondary_y=True)
+        
+        return fig
+        
+    except Exception as e:
+        print(f"Error creating ABC chart: {e}")
+        return go.Figure()
+
 # ==================== FUNGSI GRAFIK KEUNTUNGAN ====================
 
 def create_profit_chart(transactions_df):
@@ -322,27 +497,30 @@ def create_profit_comparison_chart(transactions_df):
 
 # ==================== FUNGSI GRAFIK KATEGORI ====================
 
-def create_category_revenue_chart(transactions_df, products_df):
+def create_category_revenue_chart(transactions_df, products_df=None):
     """
     Fungsi untuk membuat grafik pendapatan per kategori
+    Kategori diambil dari kolom kategori yang disimpan saat penjualan
     
     Args:
         transactions_df: DataFrame transaksi
-        products_df: DataFrame produk
+        products_df: DataFrame produk (hanya dipakai untuk data lama
+                     yang belum dimigrasi)
         
     Returns:
         plotly figure: Grafik pie pendapatan per kategori
     """
     try:
-        # Merge transaksi dengan produk untuk mendapatkan kategori
-        merged_df = transactions_df.merge(
-            products_df[['barcode_id', 'kategori']], 
-            on='barcode_id', 
-            how='left'
-        )
+        if 'kategori' not in transactions_df.columns and products_df is not None:
+            # Data lama tanpa kolom kategori: merge dengan data produk
+            transactions_df = transactions_df.merge(
+                products_df[['barcode_id', 'kategori']], 
+                on='barcode_id', 
+                how='left'
+            )
         
         # Group by kategori
-        category_revenue = merged_df.groupby('kategori')['total_harga'].sum().reset_index()
+        category_revenue = transactions_df.groupby('kategori')['total_harga'].sum().reset_index()
         category_revenue.columns = ['kategori', 'pendapatan']
         
         # Buat pie chart
@@ -359,4 +537,4 @@ def create_category_revenue_chart(transactions_df, products_df):
         
     except Exception as e:
         print(f"Error creating category revenue chart: {e}")
-        return go.Figure()
\ No newline at end of file
+        return go.Figure()
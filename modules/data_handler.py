@@ -5,12 +5,42 @@ Semua fungsi menggunakan pendekatan pemrograman terstruktur (tanpa OOP)
 
 import pandas as pd
 import os
+import json
 from datetime import datetime
 
+from modules.journal_handler import (
+    append_journal, JOURNAL_PRODUCTS, JOURNAL_TRANSACTIONS_APPEND, JOURNAL_REWRITE
+)
+
 # Path file data
 PRODUCTS_FILE = "data/products.csv"
 TRANSACTIONS_FILE = "data/transactions.csv"
 
+# Folder gambar barcode (di root project, tidak bergantung direktori kerja)
+BARCODES_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "barcodes"
+)
+
+# Kolom file transaksi. struk_id mengelompokkan baris-baris yang dibeli
+# dalam satu checkout (satu struk/keranjang). kategori dan harga_modal
+# disalin dari data produk saat penjualan agar laporan tetap benar
+# walaupun produk diubah kategorinya atau dihapus
+TRANSACTION_COLUMNS = [
+    'transaksi_id', 'struk_id', 'waktu', 'barcode_id',
+    'nama_produk', 'kategori', 'jumlah', 'harga_satuan',
+    'harga_modal', 'total_harga', 'keuntungan'
+]
+
+# Kategori untuk transaksi lama yang produknya sudah tidak ada
+UNKNOWN_CATEGORY = "Tidak Diketahui"
+
+# Index produk per barcode di memori (dipakai scanner), dibangun ulang
+# hanya jika mtime/ukuran file produk berubah
+_PRODUCT_INDEX_CACHE = {
+    'signature': None,
+    'index': {}
+}
+
 # ==================== FUNGSI LOAD DATA ====================
 
 def load_products_data():
@@ -52,11 +82,7 @@ def load_transactions_data():
             return df
         else:
             # Buat file baru jika belum ada
-            df = pd.DataFrame(columns=[
-                'transaksi_id', 'waktu', 'barcode_id', 
-                'nama_produk', 'jumlah', 'harga_satuan', 
-                'total_harga', 'keuntungan'
-            ])
+            df = pd.DataFrame(columns=TRANSACTION_COLUMNS)
             os.makedirs("data", exist_ok=True)
             df.to_csv(TRANSACTIONS_FILE, index=False)
             return df
@@ -66,9 +92,82 @@ def load_transactions_data():
 
 # ==================== FUNGSI SAVE DATA ====================
 
+# Salinan produk terakhir yang disimpan (dengan tanda versi file), agar
+# diff journal tidak perlu membaca ulang CSV setiap kali menyimpan
+_SAVED_PRODUCTS_CACHE = {
+    'signature': None,
+    'df': None
+}
+
+def _diff_text(df, columns):
+    """
+    Ubah DataFrame menjadi teks yang sebanding antar dtype: angka selalu
+    dalam bentuk float (10 dan 10.0 sama), sel kosong/NaN menjadi ''
+    """
+    df = df.reindex(columns=columns)
+    text = {}
+    for column in columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            text[column] = values.astype('float64').astype(str).where(values.notna(), '')
+        else:
+            text[column] = values.astype(str).where(values.notna(), '')
+    return pd.DataFrame(text, index=df.index)
+
+def _journal_products_diff(previous, current):
+    """
+    Catat perubahan produk ke journal sebagai upsert/delete per baris
+    Hanya baris baru atau yang isinya berubah yang dicatat sebagai upsert
+    
+    Args:
+        previous: DataFrame produk sebelum disimpan (None jika file baru)
+        current: DataFrame produk yang disimpan
+    """
+    current_ids = current['barcode_id'].astype(str)
+    if not current_ids.is_unique:
+        append_journal(JOURNAL_REWRITE, {'file': PRODUCTS_FILE})
+        return
+    
+    columns = list(current.columns)
+    if previous is None or 'barcode_id' not in previous.columns:
+        changed = pd.Series(True, index=current.index)
+        deleted = []
+    else:
+        previous_ids = previous['barcode_id'].astype(str)
+        if not previous_ids.is_unique:
+            append_journal(JOURNAL_REWRITE, {'file': PRODUCTS_FILE})
+            return
+        
+        # ID baru tidak ada di previous_text (NaN), jadi selalu terhitung berubah
+        current_text = _diff_text(current, columns)
+        previous_text = _diff_text(previous.set_index(previous_ids), columns).reindex(current_ids)
+        changed = pd.Series(
+            (current_text.values != previous_text.values).any(axis=1), index=current.index
+        )
+        deleted = sorted(set(previous_ids) - set(current_ids))
+        
+        if not changed.any() and not deleted and list(previous.columns) == columns:
+            return
+    
+    append_journal(JOURNAL_PRODUCTS, {
+        'columns': columns,
+        'upsert': json.loads(current[changed].to_json(orient='records')),
+        'delete': deleted
+    })
+
+def _previous_products():
+    """Data produk di file sebelum disimpan (dari salinan di memori jika file belum berubah)"""
+    signature = _products_file_signature()
+    if signature is None:
+        return None
+    if signature == _SAVED_PRODUCTS_CACHE['signature']:
+        return _SAVED_PRODUCTS_CACHE['df']
+    return pd.read_csv(PRODUCTS_FILE)
+
 def save_products_data(df):
     """
     Fungsi untuk menyimpan data produk ke CSV
+    Perubahan per baris ikut dicatat ke journal (untuk point-in-time restore)
     
     Args:
         df: DataFrame yang akan disimpan
@@ -78,18 +177,24 @@ def save_products_data(df):
     """
     try:
         os.makedirs("data", exist_ok=True)
+        previous = _previous_products()
         df.to_csv(PRODUCTS_FILE, index=False)
+        _SAVED_PRODUCTS_CACHE['signature'] = _products_file_signature()
+        _SAVED_PRODUCTS_CACHE['df'] = df.copy()
+        _journal_products_diff(previous, df)
         return True
     except Exception as e:
         print(f"Error saving products: {e}")
         return False
 
-def save_transactions_data(df):
+def save_transactions_data(df, appended_rows=None):
     """
     Fungsi untuk menyimpan data transaksi ke CSV
     
     Args:
         df: DataFrame yang akan disimpan
+        appended_rows: List dict baris baru yang ditambahkan (dicatat ke journal).
+            None berarti file ditulis ulang seluruhnya (dicatat sebagai rewrite)
         
     Returns:
         bool: True jika berhasil, False jika gagal
@@ -97,6 +202,10 @@ def save_transactions_data(df):
     try:
         os.makedirs("data", exist_ok=True)
         df.to_csv(TRANSACTIONS_FILE, index=False)
+        if appended_rows is not None:
+            append_journal(JOURNAL_TRANSACTIONS_APPEND, {'rows': appended_rows})
+        else:
+            append_journal(JOURNAL_REWRITE, {'file': TRANSACTIONS_FILE})
         return True
     except Exception as e:
         print(f"Error saving transactions: {e}")
@@ -159,7 +268,29 @@ def add_product(barcode_id, nama_produk, kategori, stok, harga_modal, harga_jual
             'message': f"Error: {str(e)}"
         }
 
-def add_transaction(barcode_id, nama_produk, jumlah, harga_satuan, harga_modal):
+def _next_sequence_id(series, prefix, offset=1):
+    """
+    Fungsi untuk membuat ID berurutan berikutnya (contoh: TRX00001, STR00001)
+    
+    Args:
+        series: Series berisi ID yang sudah ada
+        prefix: Prefix ID
+        offset: Selisih dari ID terakhir (1 = ID berikutnya)
+        
+    Returns:
+        str: ID baru
+    """
+    existing = series.dropna().astype(str)
+    existing = existing[existing.str.startswith(prefix)]
+    
+    if existing.empty:
+        num = offset
+    else:
+        num = int(existing.iloc[-1].replace(prefix, "")) + offset
+    
+    return f"{prefix}{num:05d}"
+
+def add_transaction(barcode_id, nama_produk, jumlah, harga_satuan, harga_modal, struk_id=None, kategori=None):
     """
     Fungsi untuk menambah transaksi baru
     
@@ -169,43 +300,93 @@ def add_transaction(barcode_id, nama_produk, jumlah, harga_satuan, harga_modal):
         jumlah: Jumlah yang dibeli
         harga_satuan: Harga per item
         harga_modal: Harga modal per item
+        struk_id: ID struk (opsional, dibuat baru jika kosong)
+        kategori: Kategori produk (opsional, diambil dari data produk jika kosong)
         
     Returns:
         dict: Status dan pesan
     """
+    result = add_transactions_batch([{
+        'barcode_id': barcode_id,
+        'nama_produk': nama_produk,
+        'kategori': kategori,
+        'jumlah': jumlah,
+        'harga_satuan': harga_satuan,
+        'harga_modal': harga_modal
+    }], struk_id=struk_id)
+    
+    if result['success']:
+        result['message'] = f"Transaksi {result['transaksi_ids'][0]} berhasil dicatat!"
+    
+    return result
+
+def add_transactions_batch(items, struk_id=None):
+    """
+    Fungsi untuk mencatat beberapa item sekaligus sebagai satu struk
+    File transaksi hanya dibaca dan ditulis satu kali
+    
+    Args:
+        items: List dict berisi barcode_id, nama_produk, jumlah,
+               harga_satuan, harga_modal dan (opsional) kategori
+        struk_id: ID struk (opsional, dibuat baru jika kosong)
+        
+    Returns:
+        dict: Status, pesan, struk_id dan daftar transaksi_id
+    """
     try:
+        if not items:
+            return {
+                'success': False,
+                'message': "Tidak ada item untuk dicatat!"
+            }
+        
         df = load_transactions_data()
         
-        # Generate ID transaksi
-        if len(df) == 0:
-            transaksi_id = "TRX00001"
-        else:
-            last_id = df['transaksi_id'].iloc[-1]
-            num = int(last_id.replace("TRX", "")) + 1
-            transaksi_id = f"TRX{num:05d}"
-        
-        # Hitung total dan keuntungan
-        total_harga = jumlah * harga_satuan
-        keuntungan = jumlah * (harga_satuan - harga_modal)
-        
-        # Tambah data transaksi
-        new_trans = {
-            'transaksi_id': transaksi_id,
-            'waktu': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'barcode_id': barcode_id,
-            'nama_produk': nama_produk,
-            'jumlah': jumlah,
-            'harga_satuan': harga_satuan,
-            'total_harga': total_harga,
-            'keuntungan': keuntungan
-        }
+        if 'struk_id' not in df.columns:
+            df['struk_id'] = None
         
-        df = pd.concat([df, pd.DataFrame([new_trans])], ignore_index=True)
+        # Generate ID struk (satu untuk semua item)
+        if struk_id is None:
+            struk_id = _next_sequence_id(df['struk_id'], "STR")
         
-        if save_transactions_data(df):
+        waktu = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Lengkapi kategori dari data produk jika tidak dikirim
+        category_map = {}
+        if any(not item.get('kategori') for item in items):
+            products_df = load_products_data()
+            if not products_df.empty:
+                category_map = dict(zip(products_df['barcode_id'], products_df['kategori']))
+        
+        new_rows = []
+        for i, item in enumerate(items):
+            jumlah = item['jumlah']
+            harga_satuan = item['harga_satuan']
+            harga_modal = item['harga_modal']
+            
+            new_rows.append({
+                'transaksi_id': _next_sequence_id(df['transaksi_id'], "TRX", offset=i + 1),
+                'struk_id': struk_id,
+                'waktu': waktu,
+                'barcode_id': item['barcode_id'],
+                'nama_produk': item['nama_produk'],
+                'kategori': item.get('kategori') or category_map.get(item['barcode_id'], UNKNOWN_CATEGORY),
+                'jumlah': jumlah,
+                'harga_satuan': harga_satuan,
+                'harga_modal': harga_modal,
+                'total_harga': jumlah * harga_satuan,
+                'keuntungan': jumlah * (harga_satuan - harga_modal)
+            })
+        
+        new_df = pd.DataFrame(new_rows)
+        df = new_df if df.empty else pd.concat([df, new_df], ignore_index=True)
+        
+        if save_transactions_data(df, appended_rows=new_rows):
             return {
                 'success': True,
-                'message': f"Transaksi {transaksi_id} berhasil dicatat!"
+                'struk_id': struk_id,
+                'transaksi_ids': new_df['transaksi_id'].tolist(),
+                'message': f"Struk {struk_id} berhasil dicatat ({len(new_rows)} item)!"
             }
         else:
             return {
@@ -243,6 +424,57 @@ def get_product_by_barcode(barcode_id):
         print(f"Error getting product: {e}")
         return None
 
+def _products_file_signature():
+    """Tanda versi file produk (mtime_ns, ukuran) atau None jika belum ada"""
+    try:
+        stat = os.stat(PRODUCTS_FILE)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def get_product_index():
+    """
+    Fungsi untuk mendapatkan index produk {barcode_id: data produk}
+    CSV hanya dibaca ulang jika file produk berubah sejak index terakhir
+    
+    Returns:
+        dict: barcode_id (str) -> dict data produk (jangan diubah)
+    """
+    signature = _products_file_signature()
+    
+    if signature is None or signature != _PRODUCT_INDEX_CACHE['signature']:
+        # Tanda versi diambil sebelum membaca, jadi perubahan saat membaca
+        # tetap memicu baca ulang di panggilan berikutnya
+        df = load_products_data()
+        index = {}
+        if 'barcode_id' in df.columns:
+            for record in df.to_dict('records'):
+                # Sama seperti get_product_by_barcode: baris pertama yang dipakai
+                index.setdefault(str(record['barcode_id']), record)
+        _PRODUCT_INDEX_CACHE['signature'] = signature
+        _PRODUCT_INDEX_CACHE['index'] = index
+    
+    return _PRODUCT_INDEX_CACHE['index']
+
+def get_product_cached(barcode_id):
+    """
+    Fungsi untuk mendapatkan data produk berdasarkan barcode dari index di memori
+    Jalur cepat untuk scanner: cukup satu os.stat per panggilan selama
+    file produk tidak berubah
+    
+    Args:
+        barcode_id: ID barcode yang dicari
+    
+    Returns:
+        dict atau None: Data produk atau None jika tidak ditemukan
+    """
+    try:
+        product = get_product_index().get(str(barcode_id).strip())
+        return dict(product) if product is not None else None
+    except Exception as e:
+        print(f"Error getting product: {e}")
+        return None
+
 def search_product(keyword):
     """
     Fungsi untuk mencari produk berdasarkan keyword
@@ -342,6 +574,7 @@ def reduce_stock(barcode_id, jumlah, nama_produk, harga_jual):
         # Ambil stok dan harga modal
         current_stock = df.loc[df['barcode_id'] == barcode_id, 'stok'].values[0]
         harga_modal = df.loc[df['barcode_id'] == barcode_id, 'harga_modal'].values[0]
+        kategori = df.loc[df['barcode_id'] == barcode_id, 'kategori'].values[0]
         
         if current_stock < jumlah:
             return {
@@ -356,7 +589,8 @@ def reduce_stock(barcode_id, jumlah, nama_produk, harga_jual):
         # Simpan perubahan
         if save_products_data(df):
             # Catat transaksi
-            trans_result = add_transaction(barcode_id, nama_produk, jumlah, harga_jual, harga_modal)
+            trans_result = add_transaction(barcode_id, nama_produk, jumlah, harga_jual, harga_modal,
+                                           kategori=kategori)
             
             if trans_result['success']:
                 return {
@@ -422,6 +656,60 @@ def add_stock(barcode_id, jumlah):
             'message': f"Error: {str(e)}"
         }
 
+def set_stock_bulk(stock_counts):
+    """
+    Fungsi untuk mengganti stok banyak produk sekaligus (misal hasil stock opname)
+    File produk hanya dibaca dan ditulis satu kali
+    
+    Args:
+        stock_counts: Dict {barcode_id: stok baru}
+    
+    Returns:
+        dict: Status, pesan, updated (jumlah produk diubah), not_found (list barcode)
+    """
+    try:
+        df = load_products_data()
+        counts = pd.Series(stock_counts, dtype='int64')
+        counts.index = counts.index.astype(str)
+        
+        barcode_ids = df['barcode_id'].astype(str)
+        new_stock = barcode_ids.map(counts)
+        mask = new_stock.notna()
+        not_found = sorted(set(counts.index) - set(barcode_ids[mask]))
+        
+        if not mask.any():
+            return {
+                'success': False,
+                'message': "Tidak ada produk yang cocok!",
+                'updated': 0,
+                'not_found': not_found
+            }
+        
+        df.loc[mask, 'stok'] = new_stock[mask].astype(int)
+        
+        if save_products_data(df):
+            return {
+                'success': True,
+                'message': f"Stok {int(mask.sum())} produk berhasil diperbarui",
+                'updated': int(mask.sum()),
+                'not_found': not_found
+            }
+        else:
+            return {
+                'success': False,
+                'message': "Gagal menyimpan stok!",
+                'updated': 0,
+                'not_found': not_found
+            }
+    
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f"Error: {str(e)}",
+            'updated': 0,
+            'not_found': []
+        }
+
 # ==================== FUNGSI DELETE ====================
 
 def delete_product(barcode_id):
@@ -447,10 +735,11 @@ def delete_product(barcode_id):
         df = df[df['barcode_id'] != barcode_id]
         
         if save_products_data(df):
-            # Hapus file barcode jika ada
-            barcode_file = f"barcodes/{barcode_id}.png"
-            if os.path.exists(barcode_file):
-                os.remove(barcode_file)
+            # Hapus file barcode jika ada (PNG atau SVG)
+            for extension in ('png', 'svg'):
+                barcode_file = os.path.join(BARCODES_FOLDER, f"{barcode_id}.{extension}")
+                if os.path.exists(barcode_file):
+                    os.remove(barcode_file)
             
             return {
                 'success': True,
@@ -466,4 +755,92 @@ def delete_product(barcode_id):
         return {
             'success': False,
             'message': f"Error: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+# ==================== FUNGSI MIGRASI ====================
+
+def migrate_transaction_attributes():
+    """
+    Migrasi satu kali: mengisi kolom kategori dan harga_modal pada
+    transaksi lama yang dibuat sebelum kolom tersebut disimpan saat checkout
+    
+    harga_modal dihitung persis dari harga_satuan - keuntungan / jumlah.
+    kategori diambil dari data produk saat ini, atau UNKNOWN_CATEGORY
+    jika produk sudah dihapus
+    
+    Returns:
+        dict: Status, pesan dan jumlah baris yang diisi
+    """
+    try:
+        if not os.path.exists(TRANSACTIONS_FILE):
+            return {
+                'success': True,
+                'updated_rows': 0,
+                'message': "Tidak ada transaksi untuk dimigrasi"
+            }
+        
+        df = load_transactions_data()
+        
+        for column in ['struk_id', 'kategori', 'harga_modal']:
+            if column not in df.columns:
+                df[column] = None
+        
+        missing_category = df['kategori'].isna()
+        missing_cost = df['harga_modal'].isna()
+        
+        if not (missing_category.any() or missing_cost.any()):
+            return {
+                'success': True,
+                'updated_rows': 0,
+                'message': "Data transaksi sudah lengkap"
+            }
+        
+        # Backup dulu sebelum menulis ulang file transaksi
+        from modules.utils import create_backup
+        backup_result = create_backup(TRANSACTIONS_FILE)
+        if not backup_result['success']:
+            return {
+                'success': False,
+                'updated_rows': 0,
+                'message': f"Migrasi dibatalkan: {backup_result['message']}"
+            }
+        
+        if missing_category.any():
+            products_df = load_products_data()
+            category_map = dict(zip(products_df['barcode_id'], products_df['kategori']))
+            df.loc[missing_category, 'kategori'] = (
+                df.loc[missing_category, 'barcode_id'].map(category_map).fillna(UNKNOWN_CATEGORY)
+            )
+        
+        if missing_cost.any():
+            rows = df.loc[missing_cost]
+            df.loc[missing_cost, 'harga_modal'] = (
+                rows['harga_satuan'] - rows['keuntungan'] / rows['jumlah'].where(rows['jumlah'] != 0)
+            ).fillna(rows['harga_satuan'])
+        
+        df = df[TRANSACTION_COLUMNS + [c for c in df.columns if c not in TRANSACTION_COLUMNS]]
+        updated_rows = int((missing_category | missing_cost).sum())
+        
+        if save_transactions_data(df):
+            # File ditulis ulang: backup baru agar journal bisa di-replay lagi sesudahnya
+            from modules.backup_handler import create_snapshot
+            create_snapshot(label="setelah-migrasi")
+            
+            return {
+                'success': True,
+                'updated_rows': updated_rows,
+                'message': f"Migrasi berhasil: {updated_rows} transaksi dilengkapi"
+            }
+        else:
+            return {
+                'success': False,
+                'updated_rows': 0,
+                'message': "Gagal menyimpan hasil migrasi!"
+            }
+        
+    except Exception as e:
+        return {
+            'success': False,
+            'updated_rows': 0,
+            'message': f"Error: {str(e)}"
+        }
@@ -0,0 +1,481 @@
+"""
+Module untuk membaca barcode dari foto di sisi server
+Dipakai jika scanner kamera browser tidak tersedia (tanpa HTTPS/getUserMedia):
+foto dari st.camera_input atau file upload diperkecil, dibinerkan per baris
+dan dipindai dengan NumPy untuk mencari pola Code128. QR code dibaca dengan
+OpenCV jika library tersebut terpasang
+"""
+
+import importlib.util
+import os
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# OpenCV opsional, hanya untuk membaca QR code
+OPENCV_AVAILABLE = importlib.util.find_spec("cv2") is not None
+
+# Lebar gambar yang dipindai. Dicoba dari yang paling kecil (cepat),
+# lalu resolusi lebih besar jika barcode belum terbaca
+DECODE_WIDTHS = (1024, 2048)
+
+# Jumlah pita baris yang dipindai per orientasi dan tinggi tiap pita
+SCAN_BANDS = 24
+BAND_HEIGHT = 3
+
+# Batas selisih total jarak tepi-ke-tepi (dalam modul) terhadap pola Code128
+MAX_PATTERN_ERROR = 1.5
+
+# Korelasi minimum antar baris pixel berurutan agar dua hasil baca di pita
+# berbeda dianggap bar yang sama (bukan dua label yang bertumpuk)
+MIN_ROW_CORRELATION = 0.5
+
+# ==================== TABEL CODE128 ====================
+
+# Lebar 6 elemen (bar, spasi, bar, spasi, bar, spasi) untuk nilai 0-106.
+# Nilai 106 adalah 6 elemen pertama pola STOP (2331112)
+CODE128_WIDTHS = (
+    '212222', '222122', '222221', '121223', '121322', '131222', '122213', '122312', '132212', '221213',
+    '221312', '231212', '112232', '122132', '122231', '113222', '123122', '123221', '223211', '221132',
+    '221231', '213212', '223112', '312131', '311222', '321122', '321221', '312212', '322112', '322211',
+    '212123', '212321', '232121', '111323', '131123', '131321', '112313', '132113', '132311', '211313',
+    '231113', '231311', '112133', '112331', '132131', '113123', '113321', '133121', '313121', '211331',
+    '231131', '213113', '213311', '213131', '311123', '311321', '331121', '312113', '312311', '332111',
+    '314111', '221411', '431111', '111224', '111422', '121124', '121421', '141122', '141221', '112214',
+    '112412', '122114', '122411', '142112', '142211', '241211', '221114', '413111', '241112', '134111',
+    '111242', '121142', '121241', '114212', '124112', '124211', '411212', '421112', '421211', '212141',
+    '214121', '412121', '111143', '111341', '131141', '114113', '114311', '411113', '411311', '113141',
+    '114131', '311141', '411131', '211412', '211214', '211232', '233111'
+)
+_ELEMENTS = np.array([[int(c) for c in widths] for widths in CODE128_WIDTHS], dtype=np.float32)
+
+# Pola dicocokkan lewat jarak tepi-ke-tepi sejenis (bar+spasi berurutan),
+# yang tidak terpengaruh bar melebar/menipis karena tinta atau blur.
+# Keempat nilai ini unik untuk setiap simbol Code128
+_PATTERNS = _ELEMENTS[:, :4] + _ELEMENTS[:, 1:5]
+
+START_A, START_B, START_C, STOP = 103, 104, 105, 106
+CODE_A, CODE_B, CODE_C, SHIFT = 101, 100, 99, 98
+
+# ==================== FUNGSI GAMBAR ====================
+
+def _load_gray(image):
+    """
+    Fungsi untuk membuka gambar sebagai grayscale (orientasi EXIF dikoreksi)
+    
+    Args:
+        image: bytes, path, file-like (UploadedFile) atau PIL Image
+    
+    Returns:
+        Image: Gambar mode 'L'
+    """
+    if isinstance(image, Image.Image):
+        img = image
+    elif isinstance(image, (bytes, bytearray)):
+        img = Image.open(BytesIO(image))
+    elif isinstance(image, (str, os.PathLike)):
+        img = Image.open(image)
+    else:
+        img = Image.open(BytesIO(image.getvalue() if hasattr(image, 'getvalue') else image.read()))
+    
+    img = ImageOps.exif_transpose(img)
+    return img.convert('L')
+
+def _resize_to_width(gray, width):
+    """Perkecil gambar ke lebar tertentu (tidak pernah memperbesar)"""
+    if gray.width <= width:
+        return gray
+    height = max(1, round(gray.height * width / gray.width))
+    return gray.resize((width, height), Image.BOX)
+
+def _binarize_bands(pixels, band_count=SCAN_BANDS, band_height=BAND_HEIGHT):
+    """
+    Fungsi untuk mengambil pita-pita baris dan membinerkannya
+    dengan ambang rata-rata lokal (tahan terhadap cahaya tidak rata)
+    
+    Args:
+        pixels: Array grayscale (tinggi, lebar)
+        band_count: Jumlah pita baris
+        band_height: Tinggi tiap pita (baris dirata-rata untuk mengurangi noise)
+    
+    Returns:
+        tuple: (array nilai pita, array ambang per pixel, array posisi tengah pita),
+            dua yang pertama berbentuk (band_count, lebar)
+    """
+    height, width = pixels.shape
+    band_height = min(band_height, height)
+    
+    # Pita dari tengah ke arah tepi, barcode biasanya ada di tengah foto
+    centers = np.linspace(height * 0.1, height * 0.9, band_count)
+    order = np.argsort(np.abs(centers - height / 2))
+    tops = np.clip((centers[order] - band_height / 2).astype(int), 0, height - band_height)
+    
+    rows = np.stack([pixels[top:top + band_height].mean(axis=0) for top in tops])
+    
+    # Rata-rata lokal dengan jendela ~1/8 lebar lewat cumulative sum
+    window = max(15, width // 8) | 1
+    pad = window // 2
+    padded = np.pad(rows, ((0, 0), (pad, pad)), mode='edge')
+    cumsum = np.cumsum(padded, axis=1, dtype=np.float64)
+    cumsum = np.concatenate([np.zeros((rows.shape[0], 1)), cumsum], axis=1)
+    local_mean = (cumsum[:, window:] - cumsum[:, :-window]) / window
+    
+    # Baris tanpa kontras (polos) tidak mungkin berisi barcode
+    contrast = rows.max(axis=1) - rows.min(axis=1)
+    keep = contrast >= 40
+    return rows[keep], local_mean[keep] - 2, (tops + band_height / 2)[keep]
+
+def _row_runs(row, threshold):
+    """
+    Fungsi untuk mengubah satu baris menjadi panjang run berselang-seling
+    Posisi tepi dihitung sub-pixel (interpolasi linear di titik ambang)
+    sehingga modul selebar 1-3 pixel tetap terukur dengan baik
+    
+    Args:
+        row: Array nilai grayscale satu baris
+        threshold: Array ambang per pixel
+    
+    Returns:
+        tuple: (array panjang run, bool apakah run pertama gelap)
+    """
+    level = row - threshold
+    dark = level < 0
+    edges = np.flatnonzero(dark[1:] != dark[:-1])
+    before, after = level[edges], level[edges + 1]
+    positions = edges + before / (before - after)
+    bounds = np.concatenate(([0.0], positions + 0.5, [float(row.size)]))
+    return np.diff(bounds).astype(np.float32), bool(dark[0])
+
+# ==================== DECODER CODE128 ====================
+
+def _match_symbols(runs):
+    """
+    Fungsi untuk mencocokkan setiap jendela 6 run dengan tabel Code128
+    sekaligus (vectorized): jarak tepi-ke-tepi dinormalisasi ke 11 modul
+    lalu dicari pola terdekat
+    
+    Args:
+        runs: Array panjang run
+    
+    Returns:
+        tuple: (nilai terbaik per jendela, selisih per jendela)
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(runs, 6)
+    modules = windows * (11.0 / windows.sum(axis=1, keepdims=True))
+    modules = modules[:, :4] + modules[:, 1:5]
+    errors = np.abs(modules[:, None, :] - _PATTERNS[None, :, :]).sum(axis=2)
+    best = errors.argmin(axis=1)
+    return best, errors[np.arange(best.size), best]
+
+def _decode_values(values):
+    """
+    Fungsi untuk menerjemahkan nilai simbol Code128 (tanpa start,
+    checksum dan stop) menjadi teks, termasuk pindah set A/B/C dan SHIFT
+    
+    Args:
+        values: List nilai simbol, diawali kode start
+    
+    Returns:
+        str atau None: Teks hasil decode
+    """
+    code_set = {START_A: 'A', START_B: 'B', START_C: 'C'}[values[0]]
+    text = []
+    shift = False
+    
+    for value in values[1:]:
+        current = code_set
+        if shift:
+            current = 'B' if code_set == 'A' else 'A'
+            shift = False
+        
+        if current == 'C':
+            if value < 100:
+                text.append(f"{value:02d}")
+            elif value == CODE_B:
+                code_set = 'B'
+            elif value == CODE_A:
+                code_set = 'A'
+            continue
+        
+        if value < 96:
+            if current == 'A' and value >= 64:
+                text.append(chr(value - 64))
+            else:
+                text.append(chr(value + 32))
+        elif value == SHIFT:
+            shift = True
+        elif value == CODE_C:
+            code_set = 'C'
+        elif value == CODE_B and current == 'A':
+            code_set = 'B'
+        elif value == CODE_A and current == 'B':
+            code_set = 'A'
+        # FNC1-FNC4 diabaikan
+    
+    return ''.join(text)
+
+def _find_code128(runs, first_dark=True):
+    """
+    Fungsi untuk mencari dan membaca Code128 dari deretan run satu baris
+    beserta posisinya (arah kiri-ke-kanan)
+    
+    Args:
+        runs: Array panjang run berselang-seling gelap/terang
+        first_dark: True jika run pertama adalah bar (gelap)
+    
+    Returns:
+        list: Tuple (teks, index run pertama, index run terakhir) untuk
+            setiap Code128 valid (checksum cocok)
+    """
+    runs = np.asarray(runs, dtype=np.float32)
+    if runs.size < 6 * 3 + 1:
+        return []
+    
+    best, errors = _match_symbols(runs)
+    valid = errors <= MAX_PATTERN_ERROR
+    # Simbol selalu diawali bar: index genap jika run pertama gelap
+    dark_start = (np.arange(best.size) % 2) == (0 if first_dark else 1)
+    starts = np.flatnonzero(valid & dark_start & (best >= START_A) & (best <= START_C))
+    
+    results = []
+    for start in starts:
+        values = [int(best[start])]
+        position = start + 6
+        while position < best.size and valid[position] and best[position] != STOP:
+            values.append(int(best[position]))
+            position += 6
+        
+        if position >= best.size or not valid[position] or len(values) < 2:
+            continue
+        
+        # Bar terakhir pola STOP lebarnya 2 modul
+        end = min(position + 6, runs.size - 1)
+        if position + 6 < runs.size:
+            module = runs[position:position + 6].sum() / 11.0
+            if not 1.2 <= runs[position + 6] / module <= 2.8:
+                continue
+        
+        *data_values, checksum = values
+        weighted = data_values[0] + sum(i * v for i, v in enumerate(data_values[1:], start=1))
+        if weighted % 103 != checksum or any(v > 102 for v in data_values[1:]):
+            continue
+        
+        text = _decode_values(data_values)
+        if text:
+            results.append((text, int(start), int(end)))
+    
+    return results
+
+def decode_code128_runs(runs, first_dark=True):
+    """
+    Fungsi untuk mencari dan membaca Code128 dari deretan run satu baris
+    (arah kiri-ke-kanan; untuk arah terbalik panggil dengan runs dibalik)
+    
+    Args:
+        runs: Array panjang run berselang-seling gelap/terang
+        first_dark: True jika run pertama adalah bar (gelap)
+    
+    Returns:
+        list: Teks Code128 valid (checksum cocok) yang ditemukan
+    """
+    return [text for text, _, _ in _find_code128(runs, first_dark)]
+
+def _same_label(pixels, a, b):
+    """
+    Cek apakah dua hasil baca teks yang sama (x0, x1, y dalam pixel) berasal
+    dari satu label: rentang x bertumpuk dan bar menyambung tanpa putus di
+    antara kedua pita (celah putih atau teks memutus korelasi antar baris)
+    """
+    lo, hi = max(a[0], b[0]), min(a[1], b[1])
+    if hi <= lo:
+        return False
+    # Dari baris terakhir pita atas sampai baris pertama pita bawah, karena
+    # pita di tepi label bisa terbaca walau hanya sebagian barisnya berisi bar
+    upper, lower = sorted((a[2], b[2]))
+    top, bottom = int(upper + BAND_HEIGHT / 2 - 1), int(lower - BAND_HEIGHT / 2)
+    strip = pixels[top:bottom + 1, int(lo):int(np.ceil(hi))]
+    if strip.shape[0] < 2:
+        return True
+    strip = strip - strip.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(strip, axis=1)
+    correlation = (strip[1:] * strip[:-1]).sum(axis=1) / np.maximum(norms[1:] * norms[:-1], 1e-6)
+    return bool(correlation.min() >= MIN_ROW_CORRELATION)
+
+def _scan_code128(pixels, multi=False):
+    """
+    Pindai pita baris satu orientasi, dua arah baca
+    Berhenti di pita pertama yang terbaca, kecuali multi=True (semua pita dipindai)
+    
+    Returns:
+        list: Tuple (teks, kotak (x0, y0, x1, y1)) satu per label, koordinat
+            relatif 0-1 terhadap pixels
+    """
+    found = []
+    height, width = pixels.shape
+    rows, thresholds, centers = _binarize_bands(pixels)
+    for row, threshold, center in zip(rows, thresholds, centers):
+        runs, first_dark = _row_runs(row, threshold)
+        edges = np.concatenate(([0.0], np.cumsum(runs)))
+        # Foto terbalik: baca run dari kanan ke kiri, index run dipetakan balik
+        last_dark = first_dark if runs.size % 2 == 1 else not first_dark
+        spans = _find_code128(runs, first_dark) + [
+            (text, runs.size - 1 - end, runs.size - 1 - start)
+            for text, start, end in _find_code128(runs[::-1], last_dark)
+        ]
+        found.extend((text, (edges[start], edges[end + 1], center)) for text, start, end in spans)
+        if found and not multi:
+            break
+    
+    # Gabungkan hasil baca dari pita-pita yang melewati label yang sama
+    groups = []
+    for text, hit in found:
+        group = next((g for g in groups if g[0] == text and any(_same_label(pixels, hit, h) for h in g[1])), None)
+        if group:
+            group[1].append(hit)
+        else:
+            groups.append((text, [hit]))
+    
+    # Kotak setinggi rentang pita ditambah seperempat jarak antar pita
+    margin = height * 0.8 / max(SCAN_BANDS - 1, 1) / 4
+    results = []
+    for text, hits in groups:
+        hits = np.array(hits)
+        results.append((text, (
+            hits[:, 0].min() / width, (hits[:, 2].min() - margin) / height,
+            hits[:, 1].max() / width, (hits[:, 2].max() + margin) / height
+        )))
+    return results
+
+# ==================== DECODER QR (OPSIONAL) ====================
+
+def _scan_qrcode(pixels):
+    """Baca QR code dengan OpenCV (hanya jika terpasang), hasil sama seperti _scan_code128"""
+    if not OPENCV_AVAILABLE:
+        return []
+    try:
+        import cv2
+        detector = cv2.QRCodeDetector()
+        ok, texts, points, _ = detector.detectAndDecodeMulti(pixels)
+        if not ok:
+            return []
+        height, width = pixels.shape[:2]
+        return [
+            (text, (corners[:, 0].min() / width, corners[:, 1].min() / height,
+                    corners[:, 0].max() / width, corners[:, 1].max() / height))
+            for text, corners in zip(texts, points) if text
+        ]
+    except Exception as e:
+        print(f"Error decoding QR code: {e}")
+        return []
+
+# ==================== FUNGSI DECODE ====================
+
+def _merge_instances(hits):
+    """
+    Fungsi untuk menggabungkan hasil baca yang menunjuk label fisik yang sama
+    (pita lain, arah baca lain, atau resolusi lain) berdasarkan kotak posisi
+    
+    Args:
+        hits: List tuple (teks, jenis, kotak (x0, y0, x1, y1))
+    
+    Returns:
+        list: Dict data/type/box, satu per label fisik
+    """
+    parent = list(range(len(hits)))
+    
+    def _root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for i, (text, code_type, (ax0, ay0, ax1, ay1)) in enumerate(hits):
+        for j in range(i):
+            other_text, other_type, (bx0, by0, bx1, by1) = hits[j]
+            if (text == other_text and code_type == other_type
+                    and ax0 < bx1 and bx0 < ax1 and ay0 < by1 and by0 < ay1):
+                parent[_root(i)] = _root(j)
+    
+    groups = {}
+    for i, (text, code_type, box) in enumerate(hits):
+        x0, y0, x1, y1 = groups.get(_root(i), {}).get('box', box)
+        groups[_root(i)] = {
+            'data': text,
+            'type': code_type,
+            'box': (min(x0, box[0]), min(y0, box[1]), max(x1, box[2]), max(y1, box[3]))
+        }
+    return list(groups.values())
+
+def decode_image(image, include_qr=True, multi=False):
+    """
+    Fungsi untuk membaca barcode Code128 (dan QR code jika OpenCV
+    tersedia) dari sebuah foto
+    
+    Args:
+        image: bytes, path, file-like (UploadedFile/camera_input) atau PIL Image
+        include_qr: True untuk ikut mencari QR code
+        multi: True untuk foto berisi banyak label (misal rak): semua pita,
+            orientasi dan resolusi dipindai walau sudah ada yang terbaca
+    
+    Returns:
+        dict: success, data (hasil pertama), barcodes (list dict data/type, unik
+              per teks), instances (list dict data/type/box, satu per label fisik,
+              hanya diisi jika multi=True), message
+    """
+    try:
+        gray = _load_gray(image)
+    except Exception as e:
+        return {
+            'success': False,
+            'data': None,
+            'barcodes': [],
+            'instances': [],
+            'message': f"❌ Gambar tidak bisa dibuka: {str(e)}"
+        }
+    
+    barcodes = []
+    seen = set()
+    hits = []
+    
+    def _collect(found, code_type, transposed=False):
+        for text, (x0, y0, x1, y1) in found:
+            # Kotak dari pindaian gambar transpose dikembalikan ke orientasi asli
+            hits.append((text, code_type, (y0, x0, y1, x1) if transposed else (x0, y0, x1, y1)))
+            if text not in seen:
+                seen.add(text)
+                barcodes.append({'data': text, 'type': code_type})
+    
+    # Mulai dari resolusi kecil (cepat); resolusi besar hanya jika perlu
+    widths = [w for w in DECODE_WIDTHS if w < gray.width] + [min(gray.width, DECODE_WIDTHS[-1])]
+    for width in dict.fromkeys(widths):
+        pixels = np.asarray(_resize_to_width(gray, width), dtype=np.float32)
+        _collect(_scan_code128(pixels, multi), 'CODE128')
+        if multi or not barcodes:
+            # Barcode vertikal
+            _collect(_scan_code128(pixels.T, multi), 'CODE128', transposed=True)
+        if barcodes and not multi:
+            break
+    
+    if include_qr and (multi or not barcodes):
+        _collect(_scan_qrcode(np.asarray(_resize_to_width(gray, DECODE_WIDTHS[-1]))), 'QRCODE')
+    
+    if barcodes:
+        return {
+            'success': True,
+            'data': barcodes[0]['data'],
+            'barcodes': barcodes,
+            'instances': _merge_instances(hits) if multi else [],
+            'message': f"✅ {len(barcodes)} kode terbaca"
+        }
+    
+    message = "❌ Barcode tidak terbaca. Dekatkan kamera dan pastikan cahaya cukup"
+    if include_qr and not OPENCV_AVAILABLE:
+        message += " (QR code butuh opencv-python-headless)"
+    return {
+        'success': False,
+        'data': None,
+        'barcodes': [],
+        'instances': [],
+        'message': message
+    }
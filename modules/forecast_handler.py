@@ -0,0 +1,177 @@
+"""
+Module untuk forecast permintaan dan saran reorder stok
+Permintaan harian diestimasi dengan exponential smoothing (EWMA)
+yang dihitung sekaligus untuk semua produk dari rollup harian
+"""
+
+import numpy as np
+import pandas as pd
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+
+from modules.rollup_handler import get_daily_rollup, get_data_version
+
+# Parameter default forecast
+DEFAULT_ALPHA = 0.3
+DEFAULT_LEAD_TIME_DAYS = 3
+DEFAULT_REVIEW_DAYS = 7
+DEFAULT_SERVICE_Z = 1.65
+DEFAULT_HISTORY_DAYS = 90
+
+# Cache hasil forecast per versi data dan parameter (LRU kecil, agar forecast
+# default dan forecast dengan parameter lain tidak saling menggusur)
+FORECAST_CACHE_SIZE = 8
+_FORECAST_CACHE = OrderedDict()
+
+# ==================== FUNGSI FORECAST ====================
+
+def _products_signature(products_df):
+    """
+    Fungsi untuk membuat signature kolom produk yang dipakai forecast
+    DataFrame yang dikirim pemanggil bisa berbeda dari file (difilter atau
+    belum disimpan), jadi isi DataFrame itu sendiri yang di-hash
+    
+    Args:
+        products_df: DataFrame produk
+    
+    Returns:
+        str: Digest SHA-1
+    """
+    columns = products_df[['barcode_id', 'nama_produk', 'kategori', 'stok']]
+    return hashlib.sha1(pd.util.hash_pandas_object(columns, index=False).values.tobytes()).hexdigest()
+
+def forecast_daily_demand(alpha=DEFAULT_ALPHA, history_days=DEFAULT_HISTORY_DAYS):
+    """
+    Fungsi untuk mengestimasi permintaan harian semua produk sekaligus
+    
+    Args:
+        alpha: Faktor smoothing EWMA (0-1, makin besar makin responsif)
+        history_days: Jumlah hari riwayat yang dipakai
+    
+    Returns:
+        DataFrame: barcode_id, demand_harian, deviasi_harian
+    """
+    columns = ['barcode_id', 'demand_harian', 'deviasi_harian']
+    
+    daily = get_daily_rollup()
+    if daily.empty:
+        return pd.DataFrame(columns=columns)
+    
+    today = pd.Timestamp(datetime.now().date())
+    start = today - pd.Timedelta(days=history_days - 1)
+    recent = daily[daily['tanggal'] >= start]
+    
+    if recent.empty:
+        return pd.DataFrame(columns=columns)
+    
+    # Matriks hari x produk, hari tanpa penjualan diisi 0
+    matrix = recent.pivot_table(
+        index='tanggal', columns='barcode_id', values='jumlah', aggfunc='sum', fill_value=0
+    )
+    full_range = pd.date_range(matrix.index.min(), today, freq='D')
+    matrix = matrix.reindex(full_range, fill_value=0).astype('float64')
+    
+    # EWMA mean dan std untuk semua kolom (produk) dalam satu operasi
+    ewm = matrix.ewm(alpha=alpha, adjust=False)
+    demand = ewm.mean().iloc[-1]
+    deviation = ewm.std().iloc[-1].fillna(0)
+    
+    return pd.DataFrame({
+        'barcode_id': matrix.columns,
+        'demand_harian': demand.to_numpy(),
+        'deviasi_harian': deviation.to_numpy()
+    })
+
+def calculate_reorder_suggestions(products_df,
+                                  lead_time_days=DEFAULT_LEAD_TIME_DAYS,
+                                  review_days=DEFAULT_REVIEW_DAYS,
+                                  service_z=DEFAULT_SERVICE_Z,
+                                  alpha=DEFAULT_ALPHA):
+    """
+    Fungsi untuk menghitung hari sampai stok habis, reorder point
+    dan jumlah order yang disarankan untuk semua produk
+    
+    Args:
+        products_df: DataFrame produk
+        lead_time_days: Lama waktu pengiriman dari supplier (hari)
+        review_days: Interval pengecekan stok berikutnya (hari)
+        service_z: Faktor z untuk safety stock (1.65 = ~95%)
+        alpha: Faktor smoothing EWMA
+    
+    Returns:
+        DataFrame: Daftar reorder terurut dari yang paling mendesak
+    """
+    columns = [
+        'barcode_id', 'nama_produk', 'kategori', 'stok', 'demand_harian',
+        'hari_sampai_habis', 'safety_stock', 'reorder_point', 'saran_order', 'status'
+    ]
+    
+    if products_df.empty:
+        return pd.DataFrame(columns=columns)
+    
+    # Forecast dihitung sampai hari ini, jadi tanggal ikut menjadi kunci
+    cache_key = (
+        get_data_version(), _products_signature(products_df), datetime.now().date(),
+        lead_time_days, review_days, service_z, alpha
+    )
+    if cache_key in _FORECAST_CACHE:
+        _FORECAST_CACHE.move_to_end(cache_key)
+        return _FORECAST_CACHE[cache_key]
+    
+    try:
+        forecast = forecast_daily_demand(alpha=alpha)
+        
+        result = products_df[['barcode_id', 'nama_produk', 'kategori', 'stok']].merge(
+            forecast, on='barcode_id', how='left'
+        )
+        result[['demand_harian', 'deviasi_harian']] = result[['demand_harian', 'deviasi_harian']].fillna(0)
+        
+        stok = result['stok'].to_numpy(dtype='float64')
+        demand = result['demand_harian'].to_numpy()
+        deviation = result['deviasi_harian'].to_numpy()
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            days_left = np.where(demand > 0, stok / demand, np.inf)
+        
+        safety_stock = service_z * deviation * np.sqrt(lead_time_days)
+        reorder_point = demand * lead_time_days + safety_stock
+        target_stock = demand * (lead_time_days + review_days) + safety_stock
+        
+        result['hari_sampai_habis'] = np.round(days_left, 1)
+        result['safety_stock'] = np.ceil(safety_stock)
+        result['reorder_point'] = np.ceil(reorder_point)
+        result['saran_order'] = np.maximum(np.ceil(target_stock - stok), 0).astype(int)
+        result['status'] = np.select(
+            [stok <= 0, (demand > 0) & (stok <= reorder_point)],
+            ['Habis', 'Segera Order'],
+            default='Aman'
+        )
+        
+        result = result.sort_values(['hari_sampai_habis', 'demand_harian'], ascending=[True, False])
+        result = result[columns].reset_index(drop=True)
+        
+        # Entri terlama dibuang (termasuk hasil versi data lama)
+        _FORECAST_CACHE[cache_key] = result
+        while len(_FORECAST_CACHE) > FORECAST_CACHE_SIZE:
+            _FORECAST_CACHE.popitem(last=False)
+        
+        return result
+    
+    except Exception as e:
+        print(f"Error calculating reorder suggestions: {e}")
+        return pd.DataFrame(columns=columns)
+
+def get_reorder_list(products_df, **kwargs):
+    """
+    Fungsi untuk mendapatkan produk yang perlu di-order saja
+    
+    Args:
+        products_df: DataFrame produk
+        **kwargs: Parameter untuk calculate_reorder_suggestions
+    
+    Returns:
+        DataFrame: Produk dengan status 'Habis' atau 'Segera Order'
+    """
+    suggestions = calculate_reorder_suggestions(products_df, **kwargs)
+    return suggestions[suggestions['status'] != 'Aman'].reset_index(drop=True)
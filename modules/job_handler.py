@@ -0,0 +1,255 @@
+"""
+Module untuk antrian job background (export, backup, generate barcode)
+Job dijalankan di thread pool dalam proses yang sama sehingga script
+Streamlit tidak terblokir selama export berat berjalan. Status, progress
+dan hasil disimpan per job_id dan bisa dipantau dari sesi mana pun
+"""
+
+import inspect
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Jumlah job yang berjalan bersamaan (job berat sudah memakai process pool sendiri)
+JOB_MAX_WORKERS = 2
+
+# Job yang sudah selesai disimpan maksimal sekian detik / sekian buah
+JOB_RETENTION_SECONDS = 3600
+JOB_RETENTION_COUNT = 20
+
+# Interval refresh tampilan job yang masih berjalan (detik)
+JOB_POLL_SECONDS = 1.0
+
+# Status job
+JOB_QUEUED = 'antri'
+JOB_RUNNING = 'berjalan'
+JOB_DONE = 'selesai'
+JOB_FAILED = 'gagal'
+JOB_CANCELLED = 'dibatalkan'
+JOB_ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+# Registry job (job_id -> data job) dan future-nya, dilindungi satu lock
+_JOBS = {}
+_FUTURES = {}
+_JOBS_LOCK = threading.Lock()
+_EXECUTOR = None
+
+# ==================== FUNGSI HELPER ====================
+
+def _get_executor():
+    """Thread pool job, dibuat saat job pertama dikirim"""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=JOB_MAX_WORKERS, thread_name_prefix="kantin-job")
+    return _EXECUTOR
+
+def _accepts_progress(func):
+    """Cek apakah fungsi job menerima argumen progress_callback"""
+    try:
+        return 'progress_callback' in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+def _result_message(result):
+    """Ringkas hasil job menjadi satu pesan"""
+    if isinstance(result, dict):
+        return result.get('message', '')
+    if isinstance(result, str):
+        return result
+    return ''
+
+def _prune_jobs():
+    """Buang job selesai yang melewati batas waktu/jumlah simpan (dipanggil dengan lock)"""
+    now = time.time()
+    finished = sorted(
+        (job for job in _JOBS.values() if job['status'] not in JOB_ACTIVE_STATUSES),
+        key=lambda job: job['finished'] or 0,
+        reverse=True
+    )
+    for position, job in enumerate(finished):
+        if position >= JOB_RETENTION_COUNT or now - (job['finished'] or now) > JOB_RETENTION_SECONDS:
+            _JOBS.pop(job['job_id'], None)
+            _FUTURES.pop(job['job_id'], None)
+
+def _finish_job(job, status, result=None, error=None):
+    """Tandai job selesai (dipanggil dengan lock)"""
+    job['status'] = status
+    job['result'] = result
+    job['error'] = error
+    job['message'] = error or _result_message(result)
+    job['finished'] = time.time()
+    _FUTURES.pop(job['job_id'], None)
+
+def _run_job(job_id, func, args, kwargs):
+    """
+    Worker thread: jalankan fungsi job dan catat status, progress serta hasilnya
+    Pembatalan bersifat kooperatif: dicek setiap kali job melaporkan progress
+    """
+    with _JOBS_LOCK:
+        job = _JOBS[job_id]
+        if job['cancel_requested']:
+            _finish_job(job, JOB_CANCELLED, error="Job dibatalkan")
+            return
+        job['status'] = JOB_RUNNING
+        job['started'] = time.time()
+    
+    def progress_callback(done, total):
+        with _JOBS_LOCK:
+            job['done'] = done
+            job['total'] = total
+            job['progress'] = min(done / total, 1.0) if total else 1.0
+            cancelled = job['cancel_requested']
+        if cancelled:
+            raise InterruptedError("Job dibatalkan")
+    
+    if _accepts_progress(func):
+        kwargs = dict(kwargs, progress_callback=progress_callback)
+    
+    result = None
+    error = None
+    try:
+        result = func(*args, **kwargs)
+    except InterruptedError as e:
+        error = str(e)
+    except Exception as e:
+        print(f"Error running job {job_id}: {e}")
+        error = f"❌ Error: {str(e)}"
+    
+    with _JOBS_LOCK:
+        # Fungsi job bisa menangkap InterruptedError sendiri, jadi flag tetap dicek
+        if job['cancel_requested']:
+            _finish_job(job, JOB_CANCELLED, result, error or "Job dibatalkan")
+        elif error is not None:
+            _finish_job(job, JOB_FAILED, result, error)
+        elif result is None or (isinstance(result, dict) and not result.get('success', True)):
+            _finish_job(job, JOB_FAILED, result, _result_message(result) or "Job gagal")
+        else:
+            job['progress'] = 1.0
+            _finish_job(job, JOB_DONE, result)
+
+# ==================== FUNGSI JOB ====================
+
+def submit_job(name, func, args=(), kwargs=None, kind='umum'):
+    """
+    Fungsi untuk mengirim job ke antrian background
+    Jika func menerima progress_callback, callback progress job diisikan otomatis
+    
+    Args:
+        name: Nama job yang ditampilkan
+        func: Fungsi yang dijalankan
+        args: Argumen posisi untuk func
+        kwargs: Argumen keyword untuk func
+        kind: Kelompok job (misal 'export', 'barcode') untuk filter tampilan
+    
+    Returns:
+        str: job_id
+    """
+    job_id = uuid.uuid4().hex[:8]
+    job = {
+        'job_id': job_id,
+        'name': name,
+        'kind': kind,
+        'status': JOB_QUEUED,
+        'progress': 0.0,
+        'done': 0,
+        'total': 0,
+        'result': None,
+        'error': None,
+        'message': '',
+        'cancel_requested': False,
+        'created': time.time(),
+        'started': None,
+        'finished': None
+    }
+    
+    with _JOBS_LOCK:
+        _prune_jobs()
+        _JOBS[job_id] = job
+        _FUTURES[job_id] = _get_executor().submit(_run_job, job_id, func, tuple(args), dict(kwargs or {}))
+    
+    return job_id
+
+def get_job(job_id):
+    """
+    Fungsi untuk mengambil status job
+    
+    Args:
+        job_id: ID job
+    
+    Returns:
+        dict: Salinan data job, atau None jika tidak ada
+    """
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+        return dict(job) if job else None
+
+def list_jobs(kind=None):
+    """
+    Fungsi untuk mengambil daftar job, terbaru di atas
+    
+    Args:
+        kind: Filter kelompok job (None = semua)
+    
+    Returns:
+        list: Salinan data job
+    """
+    with _JOBS_LOCK:
+        _prune_jobs()
+        jobs = [dict(job) for job in _JOBS.values() if kind is None or job['kind'] == kind]
+    return sorted(jobs, key=lambda job: job['created'], reverse=True)
+
+def has_active_jobs(kind=None):
+    """
+    Fungsi untuk cek apakah masih ada job yang antri/berjalan
+    
+    Args:
+        kind: Filter kelompok job (None = semua)
+    
+    Returns:
+        bool: True jika ada job aktif
+    """
+    return any(job['status'] in JOB_ACTIVE_STATUSES for job in list_jobs(kind))
+
+def cancel_job(job_id):
+    """
+    Fungsi untuk membatalkan job
+    Job yang masih antri langsung dibatalkan, job yang berjalan berhenti
+    pada laporan progress berikutnya
+    
+    Args:
+        job_id: ID job
+    
+    Returns:
+        bool: True jika permintaan batal diterima
+    """
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+        if job is None or job['status'] not in JOB_ACTIVE_STATUSES:
+            return False
+        
+        job['cancel_requested'] = True
+        future = _FUTURES.get(job_id)
+        if future is not None and future.cancel():
+            _finish_job(job, JOB_CANCELLED, error="Job dibatalkan")
+        return True
+
+def clear_finished_jobs(kind=None):
+    """
+    Fungsi untuk menghapus riwayat job yang sudah selesai
+    
+    Args:
+        kind: Filter kelompok job (None = semua)
+    
+    Returns:
+        int: Jumlah job yang dihapus
+    """
+    with _JOBS_LOCK:
+        finished = [
+            job_id for job_id, job in _JOBS.items()
+            if job['status'] not in JOB_ACTIVE_STATUSES and (kind is None or job['kind'] == kind)
+        ]
+        for job_id in finished:
+            _JOBS.pop(job_id, None)
+            _FUTURES.pop(job_id, None)
+    return len(finished)
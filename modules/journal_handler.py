@@ -0,0 +1,119 @@
+"""
+Module untuk journal perubahan data (append-only, satu baris JSON per operasi)
+Setiap perubahan produk/transaksi yang berhasil disimpan dicatat di sini,
+sehingga data pada waktu tertentu bisa dibangun ulang dari backup terdekat
+ditambah replay journal sejak offset yang tercatat di manifest backup
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+JOURNAL_FILE = "data/journal.jsonl"
+
+# Operasi journal
+JOURNAL_PRODUCTS = 'products'                        # upsert/delete baris produk
+JOURNAL_TRANSACTIONS_APPEND = 'transactions_append'  # baris transaksi baru
+JOURNAL_REWRITE = 'rewrite'                          # file ditulis ulang seluruhnya (tidak bisa di-replay)
+
+_JOURNAL_LOCK = threading.Lock()
+
+# ==================== FUNGSI HELPER ====================
+
+def _json_default(value):
+    """Ubah skalar numpy/pandas menjadi tipe JSON biasa"""
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def _entry_checksum(ts, op, data):
+    """Checksum isi entri journal (ts, op, data dalam bentuk JSON kanonik)"""
+    payload = json.dumps([ts, op, data], sort_keys=True, ensure_ascii=False, default=_json_default)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+# ==================== FUNGSI JOURNAL ====================
+
+def append_journal(op, data):
+    """
+    Fungsi untuk mencatat satu operasi ke journal
+    Dipanggil setelah perubahan berhasil disimpan ke file data
+    
+    Args:
+        op: Nama operasi (JOURNAL_PRODUCTS, JOURNAL_TRANSACTIONS_APPEND, JOURNAL_REWRITE)
+        data: Dict isi operasi
+    
+    Returns:
+        bool: True jika berhasil dicatat
+    """
+    try:
+        # Normalisasi lewat JSON dulu agar checksum sama dengan saat dibaca ulang
+        data = json.loads(json.dumps(data, ensure_ascii=False, default=_json_default))
+        ts = datetime.now().isoformat(timespec='microseconds')
+        entry = {'ts': ts, 'op': op, 'data': data, 'crc': _entry_checksum(ts, op, data)}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        
+        with _JOURNAL_LOCK:
+            os.makedirs(os.path.dirname(JOURNAL_FILE), exist_ok=True)
+            with open(JOURNAL_FILE, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        return True
+    
+    except Exception as e:
+        print(f"Error writing journal: {e}")
+        return False
+
+def get_journal_offset():
+    """
+    Fungsi untuk mendapatkan posisi akhir journal (byte), disimpan di manifest backup
+    
+    Returns:
+        int: Ukuran file journal
+    """
+    with _JOURNAL_LOCK:
+        try:
+            return os.path.getsize(JOURNAL_FILE)
+        except OSError:
+            return 0
+
+def iter_journal(offset=0, until=None):
+    """
+    Fungsi untuk membaca entri journal mulai dari offset (seek, tanpa membaca dari awal)
+    
+    Args:
+        offset: Posisi byte awal (dari manifest backup)
+        until: Timestamp/datetime batas akhir (inklusif), None = sampai akhir
+    
+    Yields:
+        dict: Entri journal (ts, op, data)
+    
+    Raises:
+        ValueError: Jika offset tidak valid atau checksum entri tidak cocok
+    """
+    if not os.path.exists(JOURNAL_FILE):
+        if offset:
+            raise ValueError("File journal tidak ditemukan")
+        return
+    
+    if offset > os.path.getsize(JOURNAL_FILE):
+        raise ValueError("Offset journal melewati ukuran file (journal terpotong?)")
+    
+    until_iso = until.isoformat(timespec='microseconds') if until is not None else None
+    
+    with open(JOURNAL_FILE, 'rb') as f:
+        f.seek(offset)
+        for raw_line in f:
+            # Baris terakhir yang belum lengkap (sedang ditulis) diabaikan
+            if not raw_line.endswith(b"\n"):
+                break
+            entry = json.loads(raw_line.decode('utf-8'))
+            if until_iso is not None and entry['ts'] > until_iso:
+                break
+            if entry.get('crc') != _entry_checksum(entry['ts'], entry['op'], entry['data']):
+                raise ValueError(f"Checksum journal tidak cocok pada {entry['ts']}")
+            yield entry
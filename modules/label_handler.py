@@ -0,0 +1,340 @@
+"""
+Module untuk membuat lembar label stiker siap cetak (PDF multi halaman)
+Barcode/QR code, nama produk dan harga disusun dalam grid sesuai layout
+kertas stiker. Halaman dirender paralel dan ditulis ke PDF per batch
+sehingga pemakaian memori tetap kecil walau jumlah label ribuan
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+from modules.utils import format_currency, render_qrcode_bytes
+
+# Layout kertas stiker (ukuran dalam mm)
+LABEL_LAYOUTS = {
+    'A4 3x8 (24 label)': {
+        'page_size': (210, 297), 'columns': 3, 'rows': 8,
+        'margin': (7, 13.5), 'gap': (2.5, 0)
+    },
+    'A4 3x7 (21 label)': {
+        'page_size': (210, 297), 'columns': 3, 'rows': 7,
+        'margin': (7, 15), 'gap': (2.5, 0)
+    },
+    'A4 4x10 (40 label)': {
+        'page_size': (210, 297), 'columns': 4, 'rows': 10,
+        'margin': (5, 13.5), 'gap': (2.5, 0)
+    },
+    'A4 2x7 (14 label)': {
+        'page_size': (210, 297), 'columns': 2, 'rows': 7,
+        'margin': (4.5, 15), 'gap': (3, 0)
+    }
+}
+DEFAULT_LAYOUT = 'A4 3x8 (24 label)'
+
+# Resolusi render halaman (cukup tajam untuk scanner, tetap ringan)
+DEFAULT_DPI = 200
+
+# Jumlah halaman yang ditahan di memori sebelum ditulis ke PDF
+PAGES_PER_BATCH = 8
+
+# Job kecil dirender langsung tanpa process pool
+PARALLEL_MIN_PAGES = 4
+
+# ==================== FUNGSI HELPER ====================
+
+def _mm_to_px(mm, dpi):
+    """Konversi milimeter ke pixel"""
+    return int(round(mm * dpi / 25.4))
+
+def _load_font(size):
+    """Font default Pillow dengan ukuran tertentu"""
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+def _fit_text(draw, text, font, max_width):
+    """Potong teks dengan '...' agar muat di lebar label"""
+    text = str(text)
+    if draw.textlength(text, font=font) <= max_width:
+        return text
+    while text and draw.textlength(text + "...", font=font) > max_width:
+        text = text[:-1]
+    return text + "..."
+
+# Gambar barcode/QR yang sudah diperkecil, per process worker
+_CODE_IMAGE_CACHE = {}
+CODE_IMAGE_CACHE_SIZE = 256
+
+def _render_barcode_image(barcode_id, max_width, max_height, dpi):
+    """
+    Render Code128 langsung pada ukuran label (lebar modul = kelipatan pixel)
+    sehingga garis tetap tajam dan terbaca scanner, tanpa resize
+    """
+    import barcode
+    from barcode.writer import ImageWriter
+    from modules.barcode_handler import BARCODE_SYMBOLOGY
+    
+    code = barcode.get_barcode_class(BARCODE_SYMBOLOGY)(str(barcode_id), writer=ImageWriter())
+    quiet_modules = 4
+    modules = len(code.build()[0]) + 2 * quiet_modules
+    px_per_module = max(1, max_width // modules)
+    module_mm = px_per_module * 25.4 / dpi
+    
+    # Teks barcode digambar sendiri di bawah garis agar tidak menimpa
+    text_height = max(8, max_height // 6)
+    options = {
+        'dpi': dpi,
+        'module_width': module_mm,
+        'quiet_zone': quiet_modules * module_mm,
+        'module_height': (max_height - text_height) * 25.4 / dpi,
+        'write_text': False,
+        'margin_top': 0,
+        'margin_bottom': 0
+    }
+    buffer = BytesIO()
+    code.write(buffer, options=options)
+    bars = Image.open(BytesIO(buffer.getvalue())).convert('L')
+    
+    image = Image.new('L', (bars.width, bars.height + text_height), 255)
+    image.paste(bars, (0, 0))
+    ImageDraw.Draw(image).text(
+        (image.width // 2, image.height), str(barcode_id),
+        fill=0, font=_load_font(int(text_height * 0.9)), anchor='mb'
+    )
+    return image
+
+def _render_code_image(label, code_type, max_width, max_height, dpi):
+    """Render gambar barcode/QR satu label, muat di dalam max_width x max_height"""
+    if code_type == 'qrcode':
+        image_bytes = render_qrcode_bytes(label['barcode_id'], label)
+        if image_bytes is None:
+            return None
+        # Modul QR diskalakan dengan NEAREST agar kotak tetap tegas
+        image = Image.open(BytesIO(image_bytes)).convert('L')
+        side = min(max_width, max_height)
+        return image.resize((side, side), Image.Resampling.NEAREST)
+    
+    image = _render_barcode_image(label['barcode_id'], max_width, max_height, dpi)
+    if image.width > max_width or image.height > max_height:
+        image.thumbnail((max_width, max_height), Image.Resampling.NEAREST)
+    return image
+
+def _draw_label(page, draw, label, box, code_type, fonts, dpi):
+    """
+    Gambar satu label (nama, barcode/QR, harga) di dalam kotak
+    
+    Args:
+        page: Image halaman
+        draw: ImageDraw halaman
+        label: Dict data produk
+        box: (x, y, lebar, tinggi) kotak label dalam pixel
+        code_type: 'barcode' atau 'qrcode'
+        fonts: (font nama, font harga)
+        dpi: Resolusi halaman
+    """
+    x, y, width, height = box
+    padding = max(2, width // 30)
+    name_font, price_font = fonts
+    inner_width = width - 2 * padding
+    
+    name = _fit_text(draw, label.get('nama_produk', ''), name_font, inner_width)
+    draw.text((x + width // 2, y + padding), name, fill=0, font=name_font, anchor='mt')
+    
+    price = format_currency(label.get('harga_jual', 0))
+    draw.text((x + width // 2, y + height - padding), price, fill=0, font=price_font, anchor='mb')
+    
+    # Sisa ruang di tengah untuk barcode/QR
+    top = y + padding + name_font.size + padding
+    bottom = y + height - padding - price_font.size - padding
+    if bottom <= top:
+        return
+    
+    # Salinan label produk yang sama memakai gambar yang sudah diperkecil
+    cache_key = (label['barcode_id'], code_type, inner_width, bottom - top)
+    code_image = _CODE_IMAGE_CACHE.get(cache_key)
+    if code_image is None:
+        try:
+            code_image = _render_code_image(label, code_type, inner_width, bottom - top, dpi)
+        except Exception as e:
+            print(f"Error rendering label {label['barcode_id']}: {e}")
+            return
+        if code_image is None:
+            return
+        if len(_CODE_IMAGE_CACHE) >= CODE_IMAGE_CACHE_SIZE:
+            _CODE_IMAGE_CACHE.pop(next(iter(_CODE_IMAGE_CACHE)))
+        _CODE_IMAGE_CACHE[cache_key] = code_image
+    
+    offset_x = x + (width - code_image.width) // 2
+    offset_y = top + (bottom - top - code_image.height) // 2
+    page.paste(code_image, (offset_x, offset_y))
+
+def _render_label_page(labels, layout_name, code_type, dpi):
+    """
+    Worker: render satu halaman label
+    Dikembalikan sebagai bytes 1-bit agar murah dikirim antar process
+    
+    Returns:
+        tuple: (ukuran halaman, bytes gambar mode '1')
+    """
+    layout = LABEL_LAYOUTS[layout_name]
+    page_width = _mm_to_px(layout['page_size'][0], dpi)
+    page_height = _mm_to_px(layout['page_size'][1], dpi)
+    margin_x, margin_y = (_mm_to_px(v, dpi) for v in layout['margin'])
+    gap_x, gap_y = (_mm_to_px(v, dpi) for v in layout['gap'])
+    columns, rows = layout['columns'], layout['rows']
+    
+    cell_width = (page_width - 2 * margin_x - (columns - 1) * gap_x) // columns
+    cell_height = (page_height - 2 * margin_y - (rows - 1) * gap_y) // rows
+    
+    fonts = (
+        _load_font(max(8, cell_height // 9)),
+        _load_font(max(8, cell_height // 7))
+    )
+    
+    page = Image.new('L', (page_width, page_height), 255)
+    draw = ImageDraw.Draw(page)
+    
+    for index, label in enumerate(labels):
+        row, column = divmod(index, columns)
+        box = (
+            margin_x + column * (cell_width + gap_x),
+            margin_y + row * (cell_height + gap_y),
+            cell_width,
+            cell_height
+        )
+        _draw_label(page, draw, label, box, code_type, fonts, dpi)
+    
+    page = page.convert('1', dither=Image.Dither.NONE)
+    return page.size, page.tobytes()
+
+def _write_pdf_batch(pdf_path, pages, dpi, append):
+    """Tulis sekumpulan halaman ke PDF (append=True menambah ke file yang ada)"""
+    first, rest = pages[0], pages[1:]
+    first.save(pdf_path, 'PDF', resolution=float(dpi), save_all=True,
+               append_images=rest, append=append)
+
+# ==================== FUNGSI LEMBAR LABEL ====================
+
+def build_label_list(products_df, copies=1):
+    """
+    Fungsi untuk menyusun daftar label dari DataFrame produk
+    
+    Args:
+        products_df: DataFrame produk
+        copies: Jumlah label per produk (int atau nama kolom, misal 'stok')
+    
+    Returns:
+        list: Dict data label (barcode_id, nama_produk, kategori, harga_jual, stok)
+    """
+    columns = [c for c in ['barcode_id', 'nama_produk', 'kategori', 'harga_jual', 'stok']
+               if c in products_df.columns]
+    records = products_df[columns].to_dict('records')
+    
+    if isinstance(copies, str):
+        counts = products_df[copies].fillna(0).clip(lower=0).astype(int).tolist()
+    else:
+        counts = [max(int(copies), 0)] * len(records)
+    
+    labels = []
+    for record, count in zip(records, counts):
+        record['barcode_id'] = str(record['barcode_id'])
+        labels.extend([record] * count)
+    return labels
+
+def create_label_sheet_pdf(products_df, layout=DEFAULT_LAYOUT, code_type='barcode',
+                           copies=1, dpi=DEFAULT_DPI, output_path=None,
+                           max_workers=None, progress_callback=None):
+    """
+    Fungsi untuk membuat PDF lembar label stiker siap cetak
+    
+    Args:
+        products_df: DataFrame produk
+        layout: Nama layout di LABEL_LAYOUTS
+        code_type: 'barcode' atau 'qrcode'
+        copies: Jumlah label per produk (int atau nama kolom, misal 'stok')
+        dpi: Resolusi render halaman
+        output_path: Path file PDF (default data/exports/labels_<timestamp>.pdf)
+        max_workers: Jumlah process (default jumlah CPU)
+        progress_callback: Fungsi callback(halaman_selesai, total_halaman)
+    
+    Returns:
+        dict: Status, pdf_path, label_count, page_count
+    """
+    try:
+        if layout not in LABEL_LAYOUTS:
+            return {
+                'success': False,
+                'message': f"Layout {layout} tidak dikenal"
+            }
+        
+        labels = build_label_list(products_df, copies)
+        
+        if not labels:
+            return {
+                'success': False,
+                'message': "Tidak ada label untuk dicetak"
+            }
+        
+        per_page = LABEL_LAYOUTS[layout]['columns'] * LABEL_LAYOUTS[layout]['rows']
+        pages = [labels[i:i + per_page] for i in range(0, len(labels), per_page)]
+        total_pages = len(pages)
+        
+        if output_path is None:
+            export_folder = "data/exports"
+            os.makedirs(export_folder, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = os.path.join(export_folder, f"labels_{timestamp}.pdf")
+        
+        max_workers = max_workers or os.cpu_count() or 1
+        batch = []
+        written = 0
+        
+        def collect(result):
+            nonlocal written
+            size, data = result
+            batch.append(Image.frombytes('1', size, data))
+            if len(batch) >= PAGES_PER_BATCH:
+                _write_pdf_batch(output_path, batch, dpi, append=written > 0)
+                written += len(batch)
+                batch.clear()
+            if progress_callback:
+                progress_callback(written + len(batch), total_pages)
+        
+        if total_pages < PARALLEL_MIN_PAGES or max_workers == 1:
+            for page_labels in pages:
+                collect(_render_label_page(page_labels, layout, code_type, dpi))
+        else:
+            # Jendela job terbatas: urutan halaman terjaga dan memori tidak membengkak
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                pending = deque()
+                for page_labels in pages:
+                    pending.append(executor.submit(_render_label_page, page_labels, layout, code_type, dpi))
+                    if len(pending) >= max_workers * 2:
+                        collect(pending.popleft().result())
+                while pending:
+                    collect(pending.popleft().result())
+        
+        if batch:
+            _write_pdf_batch(output_path, batch, dpi, append=written > 0)
+            written += len(batch)
+        
+        return {
+            'success': True,
+            'pdf_path': output_path,
+            'label_count': len(labels),
+            'page_count': written,
+            'message': f"✅ {len(labels)} label dalam {written} halaman berhasil dibuat!"
+        }
+    
+    except Exception as e:
+        print(f"Error creating label sheet: {e}")
+        return {
+            'success': False,
+            'message': f"❌ Error: {str(e)}"
+        }
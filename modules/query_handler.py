@@ -0,0 +1,443 @@
+"""
+Module untuk query agregasi (pivot/OLAP) data penjualan
+Satu fungsi aggregate() untuk semua laporan: memakai rollup harian jika
+memungkinkan, dan membaca file transaksi mentah hanya jika perlu
+"""
+
+import pandas as pd
+import os
+
+from modules.data_handler import TRANSACTIONS_FILE
+from modules.rollup_handler import get_daily_rollup, get_transactions_version
+
+# Ukuran dasar: nama -> (kolom transaksi, agregasi mentah, kolom rollup)
+# Kolom rollup None berarti ukuran tidak aditif dan harus dihitung dari data mentah
+BASE_MEASURES = {
+    'pendapatan': ('total_harga', 'sum', 'total_harga'),
+    'keuntungan': ('keuntungan', 'sum', 'keuntungan'),
+    'jumlah': ('jumlah', 'sum', 'jumlah'),
+    'jumlah_transaksi': ('transaksi_id', 'count', 'jumlah_transaksi'),
+    'jumlah_struk': ('struk_id', 'nunique', None)
+}
+
+# Ukuran turunan: nama -> (ukuran dasar yang dibutuhkan, fungsi hitung)
+DERIVED_MEASURES = {
+    'rata_rata_transaksi': (
+        ['pendapatan', 'jumlah_transaksi'],
+        lambda df: df['pendapatan'] / df['jumlah_transaksi'].where(df['jumlah_transaksi'] != 0)
+    ),
+    'margin_persen': (
+        ['pendapatan', 'keuntungan'],
+        lambda df: df['keuntungan'] / df['pendapatan'].where(df['pendapatan'] != 0) * 100
+    )
+}
+
+# Dimensi yang tersedia di rollup harian dan yang hanya ada di data mentah
+ROLLUP_DIMENSIONS = ['barcode_id', 'nama_produk', 'kategori']
+RAW_DIMENSIONS = ROLLUP_DIMENSIONS + ['struk_id', 'jam']
+
+# Granularitas waktu: nama -> (frekuensi pandas, bisa dari rollup harian)
+TIME_GRAINS = {
+    'jam': ('h', False),
+    'hari': ('D', True),
+    'minggu': ('W', True),
+    'bulan': ('M', True),
+    'tahun': ('Y', True)
+}
+
+# Ukuran potongan saat membaca file transaksi mentah
+RAW_CHUNK_SIZE = 50000
+
+# Cache hasil query per signature, dibatasi jumlahnya
+_QUERY_CACHE = {}
+_QUERY_CACHE_SIZE = 64
+
+# ==================== FUNGSI HELPER ====================
+
+def _as_list(value):
+    """Ubah nilai tunggal menjadi list"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+def _normalize_filters(filters):
+    """
+    Fungsi untuk menormalkan filter menjadi bentuk yang bisa di-hash
+    
+    Args:
+        filters: Dict filter, contoh {'tanggal': (mulai, akhir), 'kategori': ['Snack']}
+    
+    Returns:
+        tuple: Filter terurut (kolom, nilai)
+    """
+    normalized = []
+    
+    for column, value in (filters or {}).items():
+        if column == 'tanggal':
+            start, end = value
+            start = pd.Timestamp(start).normalize() if start is not None else None
+            end = pd.Timestamp(end).normalize() if end is not None else None
+            normalized.append((column, (start, end)))
+        else:
+            normalized.append((column, tuple(sorted(map(str, _as_list(value))))))
+    
+    return tuple(sorted(normalized, key=lambda item: item[0]))
+
+def _base_measures_for(measures):
+    """
+    Fungsi untuk menentukan ukuran dasar yang harus dihitung
+    
+    Args:
+        measures: List nama ukuran
+    
+    Returns:
+        list: Nama ukuran dasar
+    """
+    base = []
+    
+    for measure in measures:
+        if measure in BASE_MEASURES:
+            needed = [measure]
+        elif measure in DERIVED_MEASURES:
+            needed = DERIVED_MEASURES[measure][0]
+        else:
+            raise ValueError(f"Ukuran tidak dikenal: {measure}")
+        
+        for name in needed:
+            if name not in base:
+                base.append(name)
+    
+    return base
+
+def _apply_filters(df, filters, date_column):
+    """
+    Fungsi untuk menerapkan filter pada DataFrame
+    
+    Args:
+        df: DataFrame (rollup atau potongan data mentah)
+        filters: Filter yang sudah dinormalkan
+        date_column: Kolom tanggal yang dipakai untuk filter 'tanggal'
+    
+    Returns:
+        DataFrame: Data yang lolos filter
+    """
+    mask = pd.Series(True, index=df.index)
+    
+    for column, value in filters:
+        if column == 'tanggal':
+            start, end = value
+            dates = df[date_column].dt.normalize()
+            if start is not None:
+                mask &= dates >= start
+            if end is not None:
+                mask &= dates <= end
+        else:
+            mask &= df[column].astype(str).isin(value)
+    
+    return df[mask]
+
+def _add_time_column(df, time_grain, date_column):
+    """
+    Fungsi untuk menambah kolom 'periode' sesuai granularitas waktu
+    
+    Args:
+        df: DataFrame
+        time_grain: Nama granularitas (lihat TIME_GRAINS) atau None
+        date_column: Kolom tanggal/waktu sumber
+    
+    Returns:
+        DataFrame: DataFrame dengan kolom 'periode' (jika time_grain diisi)
+    """
+    if not time_grain:
+        return df
+    
+    freq = TIME_GRAINS[time_grain][0]
+    dates = df[date_column]
+    
+    if freq in ('h', 'D'):
+        periode = dates.dt.floor(freq)
+    else:
+        periode = dates.dt.to_period(freq).dt.start_time
+    
+    return df.assign(periode=periode)
+
+def _finalize(result, measures):
+    """
+    Fungsi untuk menghitung ukuran turunan dan memilih kolom hasil
+    
+    Args:
+        result: DataFrame hasil groupby ukuran dasar
+        measures: List ukuran yang diminta
+    
+    Returns:
+        DataFrame: Hasil akhir
+    """
+    for measure in measures:
+        if measure in DERIVED_MEASURES:
+            result[measure] = DERIVED_MEASURES[measure][1](result)
+    
+    keys = [c for c in result.columns if c not in BASE_MEASURES and c not in DERIVED_MEASURES]
+    return result[keys + list(measures)]
+
+# ==================== FUNGSI PLANNER ====================
+
+def plan_query(measures, dimensions=None, filters=None, time_grain=None):
+    """
+    Fungsi untuk menentukan sumber data query
+    
+    Args:
+        measures: List nama ukuran
+        dimensions: List dimensi pengelompokan
+        filters: Dict filter
+        time_grain: Granularitas waktu atau None
+    
+    Returns:
+        str: 'rollup' jika bisa dijawab dari rollup harian, 'raw' jika tidak
+    """
+    measures = _as_list(measures)
+    dimensions = _as_list(dimensions)
+    filter_columns = [column for column in (filters or {}) if column != 'tanggal']
+    
+    if time_grain and time_grain not in TIME_GRAINS:
+        raise ValueError(f"Granularitas waktu tidak dikenal: {time_grain}")
+    for dimension in dimensions + filter_columns:
+        if dimension not in RAW_DIMENSIONS:
+            raise ValueError(f"Dimensi tidak dikenal: {dimension}")
+    
+    base = _base_measures_for(measures)
+    
+    if any(BASE_MEASURES[name][2] is None for name in base):
+        return 'raw'
+    if any(dimension not in ROLLUP_DIMENSIONS for dimension in dimensions + filter_columns):
+        return 'raw'
+    if time_grain and not TIME_GRAINS[time_grain][1]:
+        return 'raw'
+    
+    return 'rollup'
+
+def _aggregate_rollup(base, dimensions, filters, time_grain):
+    """Jalankan query terhadap rollup harian"""
+    daily = get_daily_rollup()
+    if daily.empty:
+        return pd.DataFrame()
+    
+    daily = _apply_filters(daily, filters, 'tanggal')
+    daily = _add_time_column(daily, time_grain, 'tanggal')
+    
+    keys = (['periode'] if time_grain else []) + dimensions
+    agg_spec = {name: (BASE_MEASURES[name][2], 'sum') for name in base}
+    
+    if keys:
+        return daily.groupby(keys, dropna=False).agg(**agg_spec).reset_index()
+    
+    return pd.DataFrame({name: [daily[column].sum()] for name, (column, _) in agg_spec.items()})
+
+def _aggregate_raw(base, dimensions, filters, time_grain):
+    """
+    Jalankan query terhadap file transaksi mentah
+    Hanya kolom yang diperlukan yang dibaca, dan filter diterapkan per
+    potongan file sebelum digabung (predicate pushdown)
+    """
+    if not os.path.exists(TRANSACTIONS_FILE):
+        return pd.DataFrame()
+    
+    available = pd.read_csv(TRANSACTIONS_FILE, nrows=0).columns
+    filter_columns = [column for column, _ in filters if column != 'tanggal']
+    needs_time = time_grain is not None or 'jam' in dimensions or any(c == 'tanggal' for c, _ in filters)
+    
+    source_columns = {BASE_MEASURES[name][0] for name in base}
+    source_columns |= {d for d in dimensions + filter_columns if d != 'jam'}
+    if needs_time:
+        source_columns.add('waktu')
+    
+    # Baris lama tanpa struk_id dihitung sebagai satu struk per transaksi,
+    # sama seperti basket_handler._basket_keys
+    fill_struk = 'struk_id' in source_columns and 'transaksi_id' in available
+    if fill_struk:
+        source_columns.add('transaksi_id')
+    
+    missing = source_columns - set(available)
+    usecols = sorted(source_columns & set(available))
+    
+    parts = []
+    for chunk in pd.read_csv(TRANSACTIONS_FILE, usecols=usecols, chunksize=RAW_CHUNK_SIZE):
+        for column in missing:
+            chunk[column] = None
+        if fill_struk:
+            chunk['struk_id'] = chunk['struk_id'].fillna(chunk['transaksi_id'])
+        if needs_time:
+            chunk['waktu'] = pd.to_datetime(chunk['waktu'])
+            if 'jam' in dimensions:
+                chunk['jam'] = chunk['waktu'].dt.hour
+        chunk = _apply_filters(chunk, filters, 'waktu')
+        if not chunk.empty:
+            parts.append(chunk)
+    
+    data = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=usecols + list(missing))
+    data = _add_time_column(data, time_grain, 'waktu')
+    
+    keys = (['periode'] if time_grain else []) + dimensions
+    agg_spec = {name: (BASE_MEASURES[name][0], BASE_MEASURES[name][1]) for name in base}
+    
+    if keys:
+        return data.groupby(keys, dropna=False).agg(**agg_spec).reset_index()
+    
+    return pd.DataFrame({name: [data[column].agg(func)] for name, (column, func) in agg_spec.items()})
+
+# ==================== FUNGSI QUERY ====================
+
+def aggregate(measures, dimensions=None, filters=None, time_grain=None):
+    """
+    Fungsi query agregasi data penjualan
+    
+    Contoh:
+        aggregate(['pendapatan', 'keuntungan'], ['kategori'],
+                  filters={'tanggal': ('2024-01-01', '2024-01-31')},
+                  time_grain='minggu')
+    
+    Args:
+        measures: Ukuran (lihat BASE_MEASURES dan DERIVED_MEASURES)
+        dimensions: Dimensi pengelompokan (lihat RAW_DIMENSIONS)
+        filters: Dict filter. 'tanggal' berisi tuple (mulai, akhir) inklusif,
+                 dimensi lain berisi satu nilai atau list nilai
+        time_grain: Granularitas waktu (lihat TIME_GRAINS) atau None
+    
+    Returns:
+        DataFrame: Kolom 'periode' (jika ada time_grain), dimensi dan ukuran.
+                   df.attrs['plan'] berisi sumber data yang dipakai
+    """
+    measures = _as_list(measures)
+    dimensions = _as_list(dimensions)
+    normalized_filters = _normalize_filters(filters)
+    
+    plan = plan_query(measures, dimensions, filters, time_grain)
+    cache_key = (
+        tuple(measures), tuple(dimensions), normalized_filters, time_grain,
+        get_transactions_version()
+    )
+    
+    if cache_key in _QUERY_CACHE:
+        return _QUERY_CACHE[cache_key].copy()
+    
+    base = _base_measures_for(measures)
+    
+    if plan == 'rollup':
+        result = _aggregate_rollup(base, dimensions, normalized_filters, time_grain)
+    else:
+        result = _aggregate_raw(base, dimensions, normalized_filters, time_grain)
+    
+    if result.empty:
+        result = pd.DataFrame(columns=(['periode'] if time_grain else []) + dimensions + base)
+    
+    result = _finalize(result, measures)
+    result.attrs['plan'] = plan
+    
+    # Buang entri tertua jika cache penuh
+    if len(_QUERY_CACHE) >= _QUERY_CACHE_SIZE:
+        _QUERY_CACHE.pop(next(iter(_QUERY_CACHE)))
+    _QUERY_CACHE[cache_key] = result
+    
+    return result.copy()
+
+# ==================== FUNGSI PERBANDINGAN PERIODE ====================
+
+def get_comparison_periods(start_date, end_date):
+    """
+    Fungsi untuk menentukan periode pembanding
+    
+    Args:
+        start_date: Tanggal awal periode terpilih
+        end_date: Tanggal akhir periode terpilih
+    
+    Returns:
+        dict: Rentang (mulai, akhir) untuk 'sekarang', 'sebelumnya' dan 'tahun_lalu'
+    """
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize()
+    length = end - start + pd.Timedelta(days=1)
+    one_year = pd.DateOffset(years=1)
+    
+    return {
+        'sekarang': (start, end),
+        'sebelumnya': (start - length, start - pd.Timedelta(days=1)),
+        'tahun_lalu': (start - one_year, end - one_year)
+    }
+
+def _percent_change(current, previous):
+    """Hitung persentase perubahan (NaN jika pembanding 0)"""
+    return (current - previous) / previous.where(previous != 0) * 100
+
+def _compare_dimension(dimensions, periods, top_n):
+    """
+    Fungsi untuk membandingkan ukuran per dimensi antar periode
+    
+    Args:
+        dimensions: Dimensi pengelompokan
+        periods: Hasil get_comparison_periods
+        top_n: Jumlah baris naik/turun terbesar yang diambil
+    
+    Returns:
+        DataFrame: Ukuran per periode dan perubahan, terurut dari
+                   kenaikan pendapatan terbesar ke penurunan terbesar
+    """
+    measures = ['pendapatan', 'keuntungan', 'jumlah']
+    merged = None
+    
+    for label, date_range in periods.items():
+        part = aggregate(measures, dimensions, filters={'tanggal': date_range})
+        part = part.rename(columns={m: f"{m}_{label}" for m in measures})
+        merged = part if merged is None else merged.merge(part, on=dimensions, how='outer')
+    
+    value_columns = [c for c in merged.columns if c not in dimensions]
+    merged[value_columns] = merged[value_columns].fillna(0).astype('float64')
+    
+    merged['selisih_pendapatan'] = merged['pendapatan_sekarang'] - merged['pendapatan_sebelumnya']
+    merged['perubahan_%'] = _percent_change(merged['pendapatan_sekarang'], merged['pendapatan_sebelumnya']).round(1)
+    merged['perubahan_yoy_%'] = _percent_change(merged['pendapatan_sekarang'], merged['pendapatan_tahun_lalu']).round(1)
+    
+    merged = merged.sort_values('selisih_pendapatan', ascending=False)
+    movers = pd.concat([
+        merged[merged['selisih_pendapatan'] > 0].head(top_n),
+        merged[merged['selisih_pendapatan'] < 0].tail(top_n)
+    ])
+    
+    return movers.reset_index(drop=True)
+
+def compare_periods(start_date, end_date, top_n=5):
+    """
+    Fungsi untuk membandingkan periode terpilih dengan periode sebelumnya
+    dan periode yang sama tahun lalu. Semua angka diambil dari rollup harian
+    
+    Args:
+        start_date: Tanggal awal periode terpilih
+        end_date: Tanggal akhir periode terpilih
+        top_n: Jumlah produk/kategori naik dan turun terbesar
+    
+    Returns:
+        dict: periods, summary (DataFrame ringkasan), products dan
+              categories (DataFrame top movers)
+    """
+    periods = get_comparison_periods(start_date, end_date)
+    measures = ['pendapatan', 'keuntungan', 'jumlah_transaksi', 'jumlah']
+    
+    totals = {}
+    for label, date_range in periods.items():
+        result = aggregate(measures, filters={'tanggal': date_range})
+        # Tanpa data sama sekali aggregate() mengembalikan DataFrame kosong
+        if result.empty:
+            totals[label] = pd.Series(0.0, index=measures)
+        else:
+            totals[label] = result.iloc[0]
+    
+    summary = pd.DataFrame(totals).astype('float64')
+    summary['perubahan_%'] = _percent_change(summary['sekarang'], summary['sebelumnya']).round(1)
+    summary['perubahan_yoy_%'] = _percent_change(summary['sekarang'], summary['tahun_lalu']).round(1)
+    
+    return {
+        'periods': periods,
+        'summary': summary,
+        'products': _compare_dimension(['barcode_id', 'nama_produk'], periods, top_n),
+        'categories': _compare_dimension(['kategori'], periods, top_n)
+    }
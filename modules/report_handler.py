@@ -0,0 +1,211 @@
+"""
+Module untuk laporan penjualan Excel multi-sheet
+Transaksi dibaca dari CSV per potongan dan langsung di-stream ke workbook
+write-only openpyxl, sehingga memori tetap konstan walau datanya setahun penuh.
+Sheet ringkasan, harian dan per produk diambil dari aggregate() (rollup harian)
+"""
+
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from modules.data_handler import TRANSACTIONS_FILE, TRANSACTION_COLUMNS
+from modules.query_handler import aggregate
+from modules.utils import append_dataframe_rows
+
+# Jumlah baris transaksi yang dibaca dari CSV per potongan
+REPORT_CHUNK_ROWS = 50000
+
+REPORT_EXPORT_FOLDER = "data/exports"
+
+# Urutan sheet di workbook (Transaksi ditulis paling awal, tapi tampil terakhir)
+REPORT_SHEETS = ['Ringkasan', 'Harian', 'Per Produk', 'Transaksi']
+
+REPORT_MEASURES = ['pendapatan', 'keuntungan', 'jumlah', 'jumlah_transaksi', 'margin_persen']
+
+# ==================== FUNGSI HELPER ====================
+
+def _count_csv_rows(file_path, block_size=1024 * 1024):
+    """
+    Hitung baris data CSV dari jumlah newline (untuk progress), tanpa parsing
+    
+    Args:
+        file_path: Path file CSV
+        block_size: Ukuran blok baca (bytes)
+    
+    Returns:
+        int: Jumlah baris data (tanpa header)
+    """
+    count = 0
+    last_byte = b'\n'
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            count += block.count(b'\n')
+            last_byte = block[-1:]
+    
+    # Baris terakhir tanpa newline tetap dihitung
+    if last_byte != b'\n':
+        count += 1
+    return max(count - 1, 0)
+
+def _stream_transactions(worksheet, start, end, chunk_size, progress_callback=None):
+    """
+    Tulis transaksi (opsional difilter tanggal) ke worksheet per potongan CSV
+    
+    Args:
+        worksheet: Worksheet write-only tujuan
+        start: Tanggal mulai (Timestamp) atau None
+        end: Tanggal akhir inklusif (Timestamp) atau None
+        chunk_size: Jumlah baris per potongan
+        progress_callback: Fungsi callback(baris_dibaca, total_baris)
+    
+    Returns:
+        tuple: (jumlah baris ditulis, jumlah struk unik)
+    """
+    total = _count_csv_rows(TRANSACTIONS_FILE)
+    header_written = False
+    rows_read = 0
+    rows_written = 0
+    struk_ids = set()
+    
+    for chunk in pd.read_csv(TRANSACTIONS_FILE, chunksize=chunk_size):
+        rows_read += len(chunk)
+        
+        if start is not None or end is not None:
+            dates = pd.to_datetime(chunk['waktu']).dt.normalize()
+            mask = pd.Series(True, index=chunk.index)
+            if start is not None:
+                mask &= dates >= start
+            if end is not None:
+                mask &= dates <= end
+            chunk = chunk[mask]
+        
+        append_dataframe_rows(worksheet, chunk, header=not header_written)
+        header_written = True
+        rows_written += len(chunk)
+        # Baris lama tanpa struk_id dihitung satu struk per transaksi,
+        # sama seperti basket_handler._basket_keys
+        if 'struk_id' in chunk.columns:
+            struk_ids.update(chunk['struk_id'].fillna(chunk['transaksi_id']).dropna().astype(str))
+        else:
+            struk_ids.update(chunk['transaksi_id'].dropna().astype(str))
+        
+        if progress_callback:
+            progress_callback(min(rows_read, total), total)
+    
+    if not header_written:
+        worksheet.append(TRANSACTION_COLUMNS)
+    
+    return rows_written, len(struk_ids)
+
+def _build_summary(daily, per_product, rows, struk_count, start, end):
+    """
+    Susun sheet ringkasan (keterangan, nilai) dari hasil agregasi
+    
+    Returns:
+        DataFrame: Kolom keterangan dan nilai
+    """
+    pendapatan = float(daily['pendapatan'].sum()) if not daily.empty else 0.0
+    keuntungan = float(daily['keuntungan'].sum()) if not daily.empty else 0.0
+    
+    if start is None and not daily.empty:
+        start = daily['periode'].min()
+    if end is None and not daily.empty:
+        end = daily['periode'].max()
+    
+    summary = [
+        ('Periode Dari', start.strftime("%Y-%m-%d") if start is not None else '-'),
+        ('Periode Sampai', end.strftime("%Y-%m-%d") if end is not None else '-'),
+        ('Jumlah Transaksi', rows),
+        ('Jumlah Struk', struk_count),
+        ('Item Terjual', int(daily['jumlah'].sum()) if not daily.empty else 0),
+        ('Produk Terjual', int((per_product['jumlah'] > 0).sum()) if not per_product.empty else 0),
+        ('Hari Berjualan', len(daily)),
+        ('Total Pendapatan', pendapatan),
+        ('Total Keuntungan', keuntungan),
+        ('Margin (%)', round(keuntungan / pendapatan * 100, 2) if pendapatan else 0.0),
+        ('Rata-rata per Struk', round(pendapatan / struk_count, 2) if struk_count else 0.0),
+        ('Dibuat', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    ]
+    return pd.DataFrame(summary, columns=['keterangan', 'nilai'])
+
+# ==================== FUNGSI EXPORT ====================
+
+def export_sales_report(start_date=None, end_date=None, filename_prefix="laporan_penjualan",
+                        chunk_size=REPORT_CHUNK_ROWS, progress_callback=None):
+    """
+    Fungsi untuk export laporan penjualan ke Excel multi-sheet secara streaming
+    Sheet: Ringkasan, Harian, Per Produk, Transaksi
+    
+    Args:
+        start_date: Tanggal mulai (inklusif), None = sejak awal
+        end_date: Tanggal akhir (inklusif), None = sampai akhir
+        filename_prefix: Prefix nama file
+        chunk_size: Jumlah baris transaksi per potongan
+        progress_callback: Fungsi callback(baris_dibaca, total_baris)
+    
+    Returns:
+        dict: Status, pesan, path, rows
+    """
+    if not os.path.exists(TRANSACTIONS_FILE):
+        return {
+            'success': False,
+            'message': "❌ File transaksi tidak ditemukan",
+            'path': None,
+            'rows': 0
+        }
+    
+    try:
+        from openpyxl import Workbook
+        
+        start = pd.Timestamp(start_date).normalize() if start_date is not None else None
+        end = pd.Timestamp(end_date).normalize() if end_date is not None else None
+        filters = {'tanggal': (start, end)} if start is not None or end is not None else None
+        
+        # Ringkasan harian dan per produk dari rollup (bukan dari file mentah)
+        daily = aggregate(REPORT_MEASURES, time_grain='hari', filters=filters)
+        per_product = aggregate(REPORT_MEASURES, ['barcode_id', 'nama_produk', 'kategori'], filters=filters)
+        per_product = per_product.sort_values('pendapatan', ascending=False)
+        
+        os.makedirs(REPORT_EXPORT_FOLDER, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(REPORT_EXPORT_FOLDER, f"{filename_prefix}_{timestamp}.xlsx")
+        
+        # Sheet write-only boleh diisi tidak berurutan; urutan tampil = urutan dibuat
+        workbook = Workbook(write_only=True)
+        sheets = {name: workbook.create_sheet(name) for name in REPORT_SHEETS}
+        
+        rows, struk_count = _stream_transactions(
+            sheets['Transaksi'], start, end, chunk_size, progress_callback
+        )
+        
+        append_dataframe_rows(
+            sheets['Ringkasan'], _build_summary(daily, per_product, rows, struk_count, start, end)
+        )
+        append_dataframe_rows(
+            sheets['Harian'],
+            daily.assign(periode=pd.to_datetime(daily['periode']).dt.date).rename(columns={'periode': 'tanggal'})
+        )
+        append_dataframe_rows(sheets['Per Produk'], per_product)
+        
+        workbook.save(filepath)
+        
+        return {
+            'success': True,
+            'message': f"✅ Laporan {rows} transaksi berhasil di-export",
+            'path': filepath,
+            'rows': rows
+        }
+    
+    except Exception as e:
+        print(f"Error exporting sales report: {e}")
+        return {
+            'success': False,
+            'message': f"❌ Error: {str(e)}",
+            'path': None,
+            'rows': 0
+        }
@@ -0,0 +1,177 @@
+"""
+Module untuk rollup (pra-agregasi) data transaksi
+Menyimpan ringkasan harian per produk agar laporan dan forecast
+tidak perlu memindai seluruh file transaksi setiap kali halaman dimuat
+"""
+
+import pandas as pd
+import hashlib
+import os
+
+from modules.data_handler import (
+    PRODUCTS_FILE,
+    TRANSACTIONS_FILE,
+    load_transactions_data
+)
+
+# Kolom dimensi dan ukuran pada rollup harian
+ROLLUP_DIMENSIONS = ['tanggal', 'barcode_id', 'nama_produk', 'kategori']
+ROLLUP_MEASURES = ['jumlah', 'total_harga', 'keuntungan', 'jumlah_transaksi']
+
+# Cache rollup di memori, diperbarui secara inkremental saat file bertambah
+_ROLLUP_CACHE = {
+    'version': None,
+    'row_count': 0,
+    'prefix_hash': None,
+    'daily': None
+}
+
+# ==================== FUNGSI VERSI DATA ====================
+
+def _file_signature(file_path):
+    """
+    Fungsi untuk mendapatkan tanda versi sebuah file (mtime dan ukuran)
+    
+    Args:
+        file_path: Path file
+    
+    Returns:
+        tuple: (mtime_ns, size) atau None jika file tidak ada
+    """
+    try:
+        stat = os.stat(file_path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def get_transactions_version():
+    """
+    Fungsi untuk mendapatkan versi file transaksi
+    
+    Returns:
+        tuple: Tanda versi file transaksi
+    """
+    return _file_signature(TRANSACTIONS_FILE)
+
+def get_data_version():
+    """
+    Fungsi untuk mendapatkan versi data (produk dan transaksi)
+    Dipakai sebagai kunci cache hasil perhitungan
+    
+    Returns:
+        tuple: Tanda versi file produk dan transaksi
+    """
+    return (_file_signature(PRODUCTS_FILE), _file_signature(TRANSACTIONS_FILE))
+
+# ==================== FUNGSI ROLLUP ====================
+
+def build_daily_rollup(transactions_df):
+    """
+    Fungsi untuk membuat rollup harian per produk dari DataFrame transaksi
+    
+    Args:
+        transactions_df: DataFrame transaksi
+    
+    Returns:
+        DataFrame: Rollup dengan kolom ROLLUP_DIMENSIONS + ROLLUP_MEASURES
+    """
+    if transactions_df.empty:
+        return pd.DataFrame(columns=ROLLUP_DIMENSIONS + ROLLUP_MEASURES)
+    
+    df = transactions_df.assign(
+        tanggal=pd.to_datetime(transactions_df['waktu']).dt.normalize()
+    )
+    if 'kategori' not in df.columns:
+        df['kategori'] = None
+    
+    daily = df.groupby(ROLLUP_DIMENSIONS, sort=False, dropna=False).agg(
+        jumlah=('jumlah', 'sum'),
+        total_harga=('total_harga', 'sum'),
+        keuntungan=('keuntungan', 'sum'),
+        jumlah_transaksi=('transaksi_id', 'count')
+    ).reset_index()
+    
+    return daily
+
+def _rows_hash(row_hashes, row_count):
+    """
+    Fungsi untuk membuat hash gabungan dari sejumlah baris pertama
+    
+    Args:
+        row_hashes: Series hash per baris (hash_pandas_object)
+        row_count: Jumlah baris pertama yang di-hash
+    
+    Returns:
+        str: Digest SHA-1
+    """
+    return hashlib.sha1(row_hashes.values[:row_count].tobytes()).hexdigest()
+
+def _merge_rollups(base, delta):
+    """
+    Fungsi untuk menggabungkan rollup lama dengan rollup baris baru
+    
+    Args:
+        base: Rollup yang sudah ada
+        delta: Rollup dari baris transaksi baru
+    
+    Returns:
+        DataFrame: Rollup gabungan
+    """
+    if base is None or base.empty:
+        return delta
+    if delta.empty:
+        return base
+    
+    combined = pd.concat([base, delta], ignore_index=True)
+    return combined.groupby(ROLLUP_DIMENSIONS, sort=False, dropna=False)[ROLLUP_MEASURES].sum().reset_index()
+
+def get_daily_rollup():
+    """
+    Fungsi untuk mendapatkan rollup harian per produk
+    File transaksi hanya dibaca jika versinya berubah, dan hanya baris
+    baru yang diagregasi jika file cuma bertambah di akhir
+    
+    Returns:
+        DataFrame: Rollup harian (tanggal, barcode_id, nama_produk, kategori, ukuran)
+    """
+    version = get_transactions_version()
+    
+    if version is not None and version == _ROLLUP_CACHE['version']:
+        return _ROLLUP_CACHE['daily']
+    
+    try:
+        transactions_df = load_transactions_data()
+        row_count = _ROLLUP_CACHE['row_count']
+        
+        # Hash per baris dari kolom yang dipakai rollup, supaya file yang
+        # ditulis ulang (edit/hapus transaksi, restore backup) terdeteksi
+        # walaupun transaksi_id di ujung prefix masih sama
+        hash_columns = [
+            c for c in ['waktu', 'transaksi_id'] + ROLLUP_DIMENSIONS[1:] + ROLLUP_MEASURES[:-1]
+            if c in transactions_df.columns
+        ]
+        row_hashes = pd.util.hash_pandas_object(transactions_df[hash_columns], index=False)
+        
+        # Cek apakah baris yang sudah di-rollup masih sama
+        prefix_unchanged = (
+            _ROLLUP_CACHE['daily'] is not None
+            and 0 < row_count <= len(transactions_df)
+            and _rows_hash(row_hashes, row_count) == _ROLLUP_CACHE['prefix_hash']
+        )
+        
+        if prefix_unchanged:
+            delta = build_daily_rollup(transactions_df.iloc[row_count:])
+            daily = _merge_rollups(_ROLLUP_CACHE['daily'], delta)
+        else:
+            daily = build_daily_rollup(transactions_df)
+        
+        _ROLLUP_CACHE['version'] = version
+        _ROLLUP_CACHE['row_count'] = len(transactions_df)
+        _ROLLUP_CACHE['prefix_hash'] = _rows_hash(row_hashes, len(transactions_df))
+        _ROLLUP_CACHE['daily'] = daily
+        
+        return daily
+    
+    except Exception as e:
+        print(f"Error building daily rollup: {e}")
+        return pd.DataFrame(columns=ROLLUP_DIMENSIONS + ROLLUP_MEASURES)
@@ -0,0 +1,280 @@
+"""
+Module untuk stock opname dari foto barcode
+Foto rak/label (atau ZIP berisi gambar) di-decode paralel, jumlah per barcode
+dihitung lalu dibandingkan dengan stok di products.csv dalam satu operasi
+DataFrame. Penyesuaian stok ditulis sekaligus lewat set_stock_bulk
+"""
+
+import os
+import zipfile
+from datetime import datetime
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from modules.data_handler import load_products_data, set_stock_bulk
+from modules.decode_handler import decode_image
+from modules.utils import parse_qr_payload, run_parallel_chunks
+
+# Ekstensi gambar yang diproses (file lain di dalam ZIP diabaikan)
+STOCKTAKE_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+
+# Decode satu foto ~25-50 ms, di bawah jumlah ini tidak perlu process pool
+PARALLEL_MIN_IMAGES = 8
+
+# Riwayat penyesuaian stok hasil opname
+STOCKTAKE_LOG_FILE = "data/stocktake_log.csv"
+
+VARIANCE_COLUMNS = [
+    'barcode_id', 'nama_produk', 'kategori', 'stok', 'jumlah_hitung',
+    'selisih', 'harga_modal', 'nilai_selisih', 'status'
+]
+
+# ==================== FUNGSI INPUT ====================
+
+def collect_stocktake_images(files):
+    """
+    Fungsi untuk mengumpulkan gambar dari file upload, ZIP dibongkar per anggota
+    
+    Args:
+        files: List file-like (UploadedFile), path, atau tuple (nama, bytes)
+    
+    Returns:
+        list: Tuple (nama unik, bytes gambar)
+    """
+    images = []
+    seen = {}
+    
+    def _add(name, data):
+        # Nama dibuat unik karena dipakai sebagai kunci hasil decode
+        count = seen.get(name, 0) + 1
+        seen[name] = count
+        images.append((name if count == 1 else f"{name} #{count}", data))
+    
+    for item in files:
+        if isinstance(item, tuple):
+            name, data = item
+        elif isinstance(item, (str, os.PathLike)):
+            name = os.path.basename(item)
+            with open(item, 'rb') as f:
+                data = f.read()
+        else:
+            name = getattr(item, 'name', 'gambar')
+            data = item.getvalue() if hasattr(item, 'getvalue') else item.read()
+        
+        if zipfile.is_zipfile(BytesIO(data)):
+            with zipfile.ZipFile(BytesIO(data)) as zf:
+                for member in zf.infolist():
+                    member_name = member.filename
+                    if (member.is_dir() or '__MACOSX' in member_name
+                            or not member_name.lower().endswith(STOCKTAKE_IMAGE_EXTENSIONS)):
+                        continue
+                    _add(f"{name}/{member_name}", zf.read(member))
+        elif name.lower().endswith(STOCKTAKE_IMAGE_EXTENSIONS):
+            _add(name, data)
+    
+    return images
+
+# ==================== FUNGSI DECODE ====================
+
+def _decode_stocktake_chunk(images):
+    """
+    Worker process: decode satu potongan gambar (mode banyak label per foto)
+    
+    Args:
+        images: List tuple (nama, bytes)
+    
+    Returns:
+        list: Tuple (nama, list barcode_id atau None, error). Barcode_id diulang
+            sebanyak label fisik yang terbaca
+    """
+    results = []
+    for name, data in images:
+        decoded = decode_image(data, multi=True)
+        if decoded['success']:
+            # Setiap label fisik (posisi berbeda) dihitung terpisah. Barcode dan QR
+            # pada label yang sama menunjuk produk yang sama, jadi per produk
+            # diambil jumlah terbanyak dari salah satu jenis kode
+            instances = pd.DataFrame([
+                {'barcode_id': parse_qr_payload(item['data'])['barcode_id'], 'type': item['type']}
+                for item in decoded['instances']
+            ])
+            counts = instances.groupby(['barcode_id', 'type'], sort=False).size().groupby(level=0, sort=False).max()
+            barcode_ids = [barcode_id for barcode_id, count in counts.items() for _ in range(count)]
+            results.append((name, barcode_ids, None))
+        else:
+            results.append((name, None, decoded['message']))
+    return results
+
+def decode_stocktake_images(images, max_workers=None, progress_callback=None):
+    """
+    Fungsi untuk decode banyak foto secara paralel dan menghitung jumlah per barcode
+    Setiap label yang terbaca dihitung 1 pcs; label sama di posisi berbeda
+    dalam satu foto dihitung terpisah
+    
+    Args:
+        images: List tuple (nama, bytes) dari collect_stocktake_images
+        max_workers: Jumlah process (default jumlah CPU)
+        progress_callback: Fungsi callback(selesai, total)
+    
+    Returns:
+        dict: success, total, decoded {nama: [barcode_id]}, counts {barcode_id: jumlah},
+              failed_items [{file, error}], message
+    """
+    if not images:
+        return {
+            'success': False,
+            'total': 0,
+            'decoded': {},
+            'counts': {},
+            'failed_items': [],
+            'message': "Tidak ada gambar untuk diproses"
+        }
+    
+    result = run_parallel_chunks(
+        _decode_stocktake_chunk,
+        images,
+        item_key=lambda image: image[0],
+        max_workers=max_workers,
+        progress_callback=progress_callback,
+        min_parallel_items=PARALLEL_MIN_IMAGES
+    )
+    
+    decoded = result['paths']
+    counts = pd.Series(
+        [barcode_id for barcode_ids in decoded.values() for barcode_id in barcode_ids], dtype='object'
+    ).value_counts()
+    failed_items = [
+        {'file': item['barcode_id'], 'error': item['error']}
+        for item in result['failed_items']
+    ]
+    
+    return {
+        'success': bool(decoded),
+        'total': len(images),
+        'decoded': decoded,
+        'counts': {str(k): int(v) for k, v in counts.items()},
+        'failed_items': failed_items,
+        'message': (
+            f"{len(decoded)}/{len(images)} gambar terbaca, {int(counts.sum())} label, "
+            f"{len(counts)} produk berbeda"
+        )
+    }
+
+# ==================== FUNGSI SELISIH ====================
+
+def build_variance_report(counts, products_df=None, uncounted_as_zero=False):
+    """
+    Fungsi untuk membandingkan hasil hitung dengan stok sistem (vectorized)
+    
+    Args:
+        counts: Dict {barcode_id: jumlah_hitung}
+        products_df: DataFrame produk (default dibaca dari file)
+        uncounted_as_zero: True jika produk yang tidak terhitung dianggap 0
+            (opname penuh). False untuk opname sebagian
+    
+    Returns:
+        DataFrame: Kolom VARIANCE_COLUMNS, urut dari nilai selisih terbesar.
+            status: Cocok / Kurang / Lebih / Tidak di katalog
+    """
+    if products_df is None:
+        products_df = load_products_data()
+    
+    counted = pd.DataFrame({
+        'barcode_id': [str(k) for k in counts.keys()],
+        'jumlah_hitung': list(counts.values())
+    })
+    if products_df.empty and counted.empty:
+        return pd.DataFrame(columns=VARIANCE_COLUMNS)
+    
+    catalog = products_df[['barcode_id', 'nama_produk', 'kategori', 'stok', 'harga_modal']].copy()
+    catalog['barcode_id'] = catalog['barcode_id'].astype(str)
+    catalog = catalog.drop_duplicates('barcode_id')
+    
+    report = catalog.merge(counted, on='barcode_id', how='outer', indicator=True)
+    if not uncounted_as_zero:
+        report = report[report['_merge'] != 'left_only'].copy()
+    
+    report['nama_produk'] = report['nama_produk'].fillna('(tidak dikenal)')
+    report['kategori'] = report['kategori'].fillna('-')
+    report['jumlah_hitung'] = report['jumlah_hitung'].fillna(0).astype(int)
+    report['stok'] = report['stok'].fillna(0).astype(int)
+    report['harga_modal'] = report['harga_modal'].fillna(0)
+    report['selisih'] = report['jumlah_hitung'] - report['stok']
+    report['nilai_selisih'] = report['selisih'] * report['harga_modal']
+    report['status'] = np.select(
+        [report['_merge'] == 'right_only', report['selisih'] == 0, report['selisih'] < 0],
+        ['Tidak di katalog', 'Cocok', 'Kurang'],
+        default='Lebih'
+    )
+    
+    report = report.assign(_abs=report['nilai_selisih'].abs())
+    report = report.sort_values(['_abs', 'barcode_id'], ascending=[False, True])
+    return report[VARIANCE_COLUMNS].reset_index(drop=True)
+
+def summarize_variance(report):
+    """
+    Fungsi untuk meringkas laporan selisih stok
+    
+    Args:
+        report: DataFrame dari build_variance_report
+    
+    Returns:
+        dict: total_produk, cocok, kurang, lebih, tidak_dikenal, nilai_kurang, nilai_lebih
+    """
+    status_counts = report['status'].value_counts()
+    return {
+        'total_produk': len(report),
+        'cocok': int(status_counts.get('Cocok', 0)),
+        'kurang': int(status_counts.get('Kurang', 0)),
+        'lebih': int(status_counts.get('Lebih', 0)),
+        'tidak_dikenal': int(status_counts.get('Tidak di katalog', 0)),
+        'nilai_kurang': float(report.loc[report['selisih'] < 0, 'nilai_selisih'].sum()),
+        'nilai_lebih': float(report.loc[report['selisih'] > 0, 'nilai_selisih'].sum())
+    }
+
+# ==================== FUNGSI PENYESUAIAN ====================
+
+def apply_stocktake(report):
+    """
+    Fungsi untuk menerapkan hasil opname ke stok dalam satu kali tulis
+    dan mencatat penyesuaiannya ke STOCKTAKE_LOG_FILE
+    
+    Args:
+        report: DataFrame dari build_variance_report
+    
+    Returns:
+        dict: Status, pesan, updated
+    """
+    adjustments = report[report['status'].isin(['Kurang', 'Lebih'])]
+    if adjustments.empty:
+        return {
+            'success': True,
+            'message': "Semua stok sudah cocok, tidak ada yang diubah",
+            'updated': 0
+        }
+    
+    result = set_stock_bulk(dict(zip(adjustments['barcode_id'], adjustments['jumlah_hitung'])))
+    if not result['success']:
+        return {
+            'success': False,
+            'message': result['message'],
+            'updated': 0
+        }
+    
+    try:
+        log = adjustments[['barcode_id', 'nama_produk', 'stok', 'jumlah_hitung', 'selisih', 'nilai_selisih']]
+        log = log.rename(columns={'stok': 'stok_sistem'})
+        log.insert(0, 'waktu', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        os.makedirs(os.path.dirname(STOCKTAKE_LOG_FILE), exist_ok=True)
+        log.to_csv(STOCKTAKE_LOG_FILE, mode='a', index=False,
+                   header=not os.path.exists(STOCKTAKE_LOG_FILE))
+    except OSError as e:
+        print(f"Error writing stocktake log: {e}")
+    
+    return {
+        'success': True,
+        'message': f"✅ {result['message']}",
+        'updated': result['updated']
+    }
@@ -9,14 +9,46 @@ from datetime import datetime
 import shutil
 import zipfile
 import json
+import io
+import hashlib
+import importlib.util
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# Try import qrcode
-try:
-    import qrcode
-    QRCODE_AVAILABLE = True
-except ImportError:
-    QRCODE_AVAILABLE = False
-    print("⚠️ qrcode not installed. Run: pip install qrcode[pil]")
+# Library qrcode hanya dicek keberadaannya, baru di-import saat render pertama
+QRCODE_AVAILABLE = importlib.util.find_spec("qrcode") is not None
+
+# Jumlah gambar QR code yang disimpan di cache memori (LRU)
+QRCODE_CACHE_SIZE = 512
+
+# Payload QR ringkas berversi: "KS1|<barcode_id>|h=<harga>|n=<nama>"
+QR_PAYLOAD_PREFIX = "KS"
+QR_PAYLOAD_VERSION = 1
+QR_PAYLOAD_FIELDS = {'harga_jual': 'h', 'nama_produk': 'n', 'kategori': 'k'}
+QR_DEFAULT_FIELDS = ()
+QR_TEXT_MAX_LENGTH = 24
+
+# Folder dan manifest QR code (barcode_id -> hash payload)
+QRCODES_FOLDER = "qrcodes"
+QR_MANIFEST_FILE = ".manifest.json"
+
+# Batch kecil dikerjakan langsung, tanpa overhead start process pool
+PARALLEL_MIN_ITEMS = 50
+
+# Jumlah baris per potongan saat menulis Excel (write-only)
+EXCEL_CHUNK_ROWS = 5000
+
+# Anggota ZIP yang sudah terkompresi disimpan tanpa deflate (ZIP_STORED)
+ZIP_STORED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.zip', '.xlsx', '.pdf')
+
+# Cache ZIP export per hash manifest (export berulang tanpa render/zip ulang).
+# ZIP disimpan sebagai file di folder cache; memori hanya menyimpan path dan jumlah file
+ZIP_EXPORT_CACHE_FOLDER = "data/exports/zip_cache"
+ZIP_EXPORT_CACHE_SIZE = 4
+_ZIP_EXPORT_CACHE = OrderedDict()
+_ZIP_EXPORT_CACHE_LOCK = threading.Lock()
 
 # ==================== FUNGSI VALIDASI ====================
 
@@ -140,67 +172,51 @@ def format_datetime(datetime_str):
 
 def create_backup(file_path):
     """
-    Fungsi untuk membuat backup file
+    Fungsi untuk membuat backup file ke store backup (chunk terdeduplikasi)
     
     Args:
         file_path: Path file yang akan di-backup
         
     Returns:
-        dict: Status dan path backup
+        dict: Status, backup_id dan path manifest backup
     """
-    try:
-        # Buat folder backup jika belum ada
-        backup_folder = "data/backup"
-        os.makedirs(backup_folder, exist_ok=True)
-        
-        # Generate nama file backup dengan timestamp
-        filename = os.path.basename(file_path)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"{timestamp}_{filename}"
-        backup_path = os.path.join(backup_folder, backup_filename)
-        
-        # Copy file
-        shutil.copy2(file_path, backup_path)
-        
-        return {
-            'success': True,
-            'backup_path': backup_path,
-            'message': f"Backup berhasil: {backup_filename}"
-        }
-        
-    except Exception as e:
+    from modules.backup_handler import create_snapshot
+    
+    if not os.path.exists(file_path):
         return {
             'success': False,
-            'message': f"Gagal membuat backup: {str(e)}"
+            'message': f"Gagal membuat backup: {file_path} tidak ditemukan"
         }
+    
+    result = create_snapshot([file_path], label=os.path.basename(file_path))
+    if result['success']:
+        result['backup_path'] = result['manifest_path']
+    return result
 
 def auto_backup_all():
     """
     Fungsi untuk backup semua file data secara otomatis
+    Semua file masuk satu snapshot; chunk yang tidak berubah tidak ditulis ulang
     
     Returns:
         dict: Status backup
     """
+    from modules.backup_handler import create_snapshot, BACKUP_FILES
+    
     try:
-        results = []
-        
-        # Backup products
-        if os.path.exists("data/products.csv"):
-            result = create_backup("data/products.csv")
-            results.append(result)
+        files = [f for f in BACKUP_FILES if os.path.exists(f)]
+        result = create_snapshot(files, label="otomatis")
         
-        # Backup transactions
-        if os.path.exists("data/transactions.csv"):
-            result = create_backup("data/transactions.csv")
-            results.append(result)
-        
-        success_count = sum(1 for r in results if r['success'])
+        if not result['success']:
+            return result
         
         return {
             'success': True,
-            'total': len(results),
-            'success_count': success_count,
-            'message': f"Backup berhasil untuk {success_count} file"
+            'total': len(files),
+            'success_count': len(files),
+            'backup_id': result['backup_id'],
+            'new_bytes': result['new_bytes'],
+            'message': result['message']
         }
         
     except Exception as e:
@@ -230,17 +246,28 @@ def clean_old_backups(days=7):
         deleted_count = 0
         cutoff_date = datetime.now() - pd.Timedelta(days=days)
         
+        # Salinan penuh format lama (file langsung di folder backup)
         for filename in os.listdir(backup_folder):
             file_path = os.path.join(backup_folder, filename)
+            if not os.path.isfile(file_path):
+                continue
             file_time = datetime.fromtimestamp(os.path.getmtime(file_path))
             
             if file_time < cutoff_date:
                 os.remove(file_path)
                 deleted_count += 1
         
+        # Snapshot di store backup, lalu chunk yang tidak terpakai lagi
+        from modules.backup_handler import prune_snapshots
+        prune_result = prune_snapshots(days)
+        if not prune_result['success']:
+            return prune_result
+        deleted_count += prune_result['deleted_snapshots']
+        
         return {
             'success': True,
             'deleted_count': deleted_count,
+            'freed_bytes': prune_result['freed_bytes'],
             'message': f"Berhasil menghapus {deleted_count} backup lama"
         }
         
@@ -252,6 +279,32 @@ def clean_old_backups(days=7):
 
 # ==================== FUNGSI EXPORT ====================
 
+def append_dataframe_rows(worksheet, df, header=True, chunk_size=EXCEL_CHUNK_ROWS):
+    """
+    Fungsi untuk menulis DataFrame ke worksheet openpyxl per potongan baris
+    Dipakai dengan Workbook(write_only=True) agar memori tetap konstan
+    
+    Args:
+        worksheet: Worksheet openpyxl (write-only)
+        df: DataFrame yang ditulis
+        header: Tulis nama kolom di baris pertama
+        chunk_size: Jumlah baris per potongan konversi
+        
+    Returns:
+        int: Jumlah baris data yang ditulis
+    """
+    if header:
+        worksheet.append([str(column) for column in df.columns])
+    
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        # NaN/NaT ditulis sebagai sel kosong
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            worksheet.append(row)
+    
+    return len(df)
+
 def export_to_excel(df, filename_prefix):
     """
     Fungsi untuk export DataFrame ke Excel
@@ -272,8 +325,12 @@ def export_to_excel(df, filename_prefix):
         filename = f"{filename_prefix}_{timestamp}.xlsx"
         filepath = os.path.join("data/exports", filename)
         
-        # Export ke Excel
-        df.to_excel(filepath, index=False, engine='openpyxl')
+        # Export ke Excel (write-only: baris langsung di-stream ke file)
+        from openpyxl import Workbook
+        
+        workbook = Workbook(write_only=True)
+        append_dataframe_rows(workbook.create_sheet("Sheet1"), df)
+        workbook.save(filepath)
         
         return filepath
         
@@ -337,7 +394,8 @@ def copy_barcodes_to_folder(folder_name):
         os.makedirs(export_path)
         
         # Source folder
-        barcode_folder = "barcodes"
+        from modules.data_handler import BARCODES_FOLDER
+        barcode_folder = BARCODES_FOLDER
         
         if not os.path.exists(barcode_folder):
             return {
@@ -345,8 +403,8 @@ def copy_barcodes_to_folder(folder_name):
                 'message': "Folder barcodes tidak ditemukan!"
             }
         
-        # Copy all PNG files
-        barcode_files = [f for f in os.listdir(barcode_folder) if f.endswith('.png')]
+        # Copy all barcode files (PNG/SVG)
+        barcode_files = [f for f in os.listdir(barcode_folder) if f.endswith(('.png', '.svg'))]
         
         if not barcode_files:
             return {
@@ -392,17 +450,8 @@ def create_barcode_zip(zip_filename):
         # ZIP path
         zip_path = os.path.join(export_base, zip_filename)
         
-        # Source folder
-        barcode_folder = "barcodes"
-        
-        if not os.path.exists(barcode_folder):
-            return {
-                'success': False,
-                'message': "Folder barcodes tidak ditemukan!"
-            }
-        
-        # Get barcode files
-        barcode_files = [f for f in os.listdir(barcode_folder) if f.endswith('.png')]
+        # Render barcode semua produk dari cache memori
+        barcode_files, _ = _render_code_images(_load_catalog())
         
         if not barcode_files:
             return {
@@ -410,11 +459,8 @@ def create_barcode_zip(zip_filename):
                 'message': "Tidak ada barcode untuk di-zip!"
             }
         
-        # Create ZIP
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for filename in barcode_files:
-                file_path = os.path.join(barcode_folder, filename)
-                zipf.write(file_path, arcname=filename)
+        # Create ZIP (PNG disimpan tanpa deflate)
+        write_zip(barcode_files, zip_path)
         
         # Get ZIP size
         zip_size = os.path.getsize(zip_path)
@@ -463,7 +509,8 @@ def create_barcode_package(package_name):
         os.makedirs(images_folder)
         
         # Source folders
-        barcode_folder = "barcodes"
+        from modules.data_handler import BARCODES_FOLDER
+        barcode_folder = BARCODES_FOLDER
         
         if not os.path.exists(barcode_folder):
             return {
@@ -471,8 +518,8 @@ def create_barcode_package(package_name):
                 'message': "Folder barcodes tidak ditemukan!"
             }
         
-        # Copy barcode images
-        barcode_files = [f for f in os.listdir(barcode_folder) if f.endswith('.png')]
+        # Copy barcode images (PNG/SVG)
+        barcode_files = [f for f in os.listdir(barcode_folder) if f.endswith(('.png', '.svg'))]
         
         if not barcode_files:
             return {
@@ -492,11 +539,15 @@ def create_barcode_package(package_name):
         
         if not products_df.empty:
             # Add column for barcode image filename
-            products_df['barcode_image_file'] = products_df['barcode_id'] + '.png'
+            image_files = {os.path.splitext(f)[0]: f for f in barcode_files}
+            products_df['barcode_image_file'] = products_df['barcode_id'].map(image_files)
             
             # Add column for barcode availability
-            products_df['barcode_available'] = products_df['barcode_id'].apply(
-                lambda x: 'Yes' if os.path.exists(os.path.join(images_folder, f"{x}.png")) else 'No'
+            products_df['barcode_available'] = products_df['barcode_image_file'].notna().map(
+                {True: 'Yes', False: 'No'}
+            )
+            products_df['barcode_image_file'] = products_df['barcode_image_file'].fillna(
+                products_df['barcode_id'] + '.png'
             )
             
             # Calculate profit margin
@@ -728,12 +779,188 @@ def get_recent_logs(limit=10):
         print(f"Error getting logs: {e}")
         return pd.DataFrame()
 
+# ==================== FUNGSI PARALEL ====================
+
+def run_parallel_chunks(worker, items, worker_args=(), item_key=None, max_workers=None,
+                        chunk_size=None, progress_callback=None, min_parallel_items=PARALLEL_MIN_ITEMS):
+    """
+    Jalankan worker per potongan item dengan process pool
+    
+    Args:
+        worker: Fungsi worker(potongan_item, *worker_args) -> list (id, path, error)
+        items: List item
+        worker_args: Argumen tambahan untuk worker
+        item_key: Fungsi item -> id (untuk mencatat item gagal), default item itu sendiri
+        max_workers: Jumlah process (default jumlah CPU)
+        chunk_size: Jumlah item per tugas (default otomatis)
+        progress_callback: Fungsi callback(selesai, total)
+        min_parallel_items: Di bawah jumlah ini dikerjakan langsung tanpa process pool
+        
+    Returns:
+        dict: success_count, paths {id: path}, failed_items [{barcode_id, error}]
+    """
+    item_key = item_key or (lambda item: item)
+    total = len(items)
+    max_workers = max_workers or os.cpu_count() or 1
+    
+    # Potongan kecil agar progress halus, tapi cukup besar untuk menekan overhead IPC
+    if chunk_size is None:
+        chunk_size = max(1, min(100, total // (max_workers * 4) or 1))
+    chunks = [items[i:i + chunk_size] for i in range(0, total, chunk_size)]
+    
+    paths = {}
+    failed_items = []
+    done = 0
+    
+    def collect(results):
+        nonlocal done
+        for key, path, error in results:
+            if path:
+                paths[key] = path
+            else:
+                failed_items.append({'barcode_id': key, 'error': error})
+        done += len(results)
+        if progress_callback:
+            progress_callback(done, total)
+    
+    if total < min_parallel_items or max_workers == 1:
+        for chunk in chunks:
+            collect(worker(chunk, *worker_args))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(worker, chunk, *worker_args): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                try:
+                    collect(future.result())
+                except Exception as e:
+                    # Process worker mati: tandai semua item potongan itu gagal
+                    collect([(item_key(item), None, str(e)) for item in futures[future]])
+    
+    return {
+        'success_count': len(paths),
+        'paths': paths,
+        'failed_items': failed_items
+    }
+
 # ==================== FUNGSI QR CODE ====================
 
+def build_qr_payload(barcode_id, product_data=None, fields=QR_DEFAULT_FIELDS):
+    """
+    Buat payload QR ringkas berversi
+    Stok sengaja tidak disertakan karena langsung basi setelah ada penjualan
+    
+    Args:
+        barcode_id: ID barcode produk
+        product_data: Dictionary data produk (untuk field tambahan)
+        fields: Field tambahan dari QR_PAYLOAD_FIELDS (misal ('harga_jual',))
+        
+    Returns:
+        str: Payload, contoh "KS1|BRK001|h=3500"
+    """
+    parts = [f"{QR_PAYLOAD_PREFIX}{QR_PAYLOAD_VERSION}", str(barcode_id)]
+    product_data = product_data or {}
+    
+    for field in fields:
+        value = product_data.get(field)
+        if value is None or value == '':
+            continue
+        if field == 'harga_jual':
+            value = int(value)
+        value = str(value).replace('|', '/')[:QR_TEXT_MAX_LENGTH]
+        parts.append(f"{QR_PAYLOAD_FIELDS[field]}={value}")
+    
+    return "|".join(parts)
+
+def parse_qr_payload(text):
+    """
+    Baca isi QR code: payload ringkas, JSON lama, atau barcode biasa
+    
+    Args:
+        text: Teks hasil scan
+        
+    Returns:
+        dict: barcode_id, version (0 untuk format lama) dan field tambahan
+    """
+    text = str(text).strip()
+    
+    if text.startswith(QR_PAYLOAD_PREFIX) and '|' in text:
+        parts = text.split('|')
+        version = parts[0][len(QR_PAYLOAD_PREFIX):]
+        if version.isdigit():
+            result = {'version': int(version), 'barcode_id': parts[1]}
+            short_names = {short: field for field, short in QR_PAYLOAD_FIELDS.items()}
+            for part in parts[2:]:
+                key, _, value = part.partition('=')
+                if key in short_names:
+                    result[short_names[key]] = int(value) if key == 'h' and value.isdigit() else value
+            return result
+    
+    # QR lama berisi JSON lengkap produk
+    if text.startswith('{'):
+        try:
+            data = json.loads(text)
+            if 'barcode_id' in data:
+                data['version'] = 0
+                return data
+        except ValueError:
+            pass
+    
+    return {'version': 0, 'barcode_id': text}
+
+@lru_cache(maxsize=QRCODE_CACHE_SIZE)
+def _render_qrcode_cached(payload, image_format):
+    """Render QR code ke bytes, payload yang sama tidak dirender ulang"""
+    import qrcode
+    
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    
+    qr.add_data(payload)
+    qr.make(fit=True)
+    
+    if image_format == 'svg':
+        from qrcode.image.svg import SvgPathImage
+        img = qr.make_image(image_factory=SvgPathImage)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+    
+    buffer = io.BytesIO()
+    img.save(buffer)
+    return buffer.getvalue()
+
+def render_qrcode_bytes(barcode_id, product_data, image_format='png'):
+    """
+    Render QR code produk langsung ke memori (tanpa file)
+    
+    Args:
+        barcode_id: ID barcode produk
+        product_data: Dictionary data produk
+        image_format: 'png' atau 'svg'
+        
+    Returns:
+        bytes: Isi gambar, atau None jika gagal
+    """
+    if not QRCODE_AVAILABLE:
+        return None
+    
+    try:
+        return _render_qrcode_cached(build_qr_payload(barcode_id, product_data), image_format)
+    except Exception as e:
+        print(f"Error rendering QR code: {e}")
+        return None
+
 def generate_qrcode(barcode_id, product_data):
     """
-    Generate QR code untuk produk
-    QR berisi data JSON lengkap produk
+    Generate QR code untuk produk dan simpan ke folder qrcodes
+    QR berisi payload ringkas berversi dari build_qr_payload (misal "KS1|BRK001"),
+    bukan JSON produk: stok dan field lain tidak ikut disimpan
     
     Args:
         barcode_id: ID barcode produk
@@ -742,40 +969,20 @@ def generate_qrcode(barcode_id, product_data):
     Returns:
         str: Path file QR code atau None jika gagal
     """
-    if not QRCODE_AVAILABLE:
+    image_bytes = render_qrcode_bytes(barcode_id, product_data)
+    
+    if image_bytes is None:
         return None
     
     try:
         # Create qrcodes folder
-        qr_folder = "qrcodes"
+        qr_folder = QRCODES_FOLDER
         os.makedirs(qr_folder, exist_ok=True)
         
-        # Create QR data (JSON)
-        qr_data = {
-            "barcode_id": barcode_id,
-            "nama_produk": product_data.get('nama_produk', ''),
-            "kategori": product_data.get('kategori', ''),
-            "harga_jual": int(product_data.get('harga_jual', 0)),
-            "stok": int(product_data.get('stok', 0))
-        }
-        
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        
-        qr.add_data(json.dumps(qr_data))
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
         # Save
         qr_path = os.path.join(qr_folder, f"{barcode_id}_qr.png")
-        img.save(qr_path)
+        with open(qr_path, 'wb') as f:
+            f.write(image_bytes)
         
         return qr_path
         
@@ -783,12 +990,41 @@ def generate_qrcode(barcode_id, product_data):
         print(f"Error generating QR code: {e}")
         return None
 
-def generate_batch_qrcodes(products_df):
+def _qr_payload_hash(payload):
+    """Hash payload QR untuk manifest"""
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def _render_qrcode_chunk(items, output_folder):
+    """
+    Worker process pool: render satu potongan QR code ke file
+    
+    Returns:
+        list: Tuple (barcode_id, path atau None, error atau None)
+    """
+    results = []
+    for barcode_id, payload in items:
+        try:
+            qr_path = os.path.join(output_folder, f"{barcode_id}_qr.png")
+            with open(qr_path, 'wb') as f:
+                f.write(_render_qrcode_cached(payload, 'png'))
+            results.append((barcode_id, qr_path, None))
+        except Exception as e:
+            results.append((barcode_id, None, str(e)))
+    return results
+
+def generate_batch_qrcodes(products_df, fields=QR_DEFAULT_FIELDS, force=False, prune=False,
+                           max_workers=None, progress_callback=None):
     """
-    Generate QR codes untuk batch produk
+    Generate QR codes untuk batch produk (paralel, inkremental)
+    Hanya produk yang payload-nya berubah yang dirender ulang
     
     Args:
         products_df: DataFrame produk
+        fields: Field tambahan payload (lihat build_qr_payload)
+        force: Render ulang semua
+        prune: Hapus QR produk yang tidak ada di products_df (harus seluruh katalog)
+        max_workers: Jumlah process
+        progress_callback: Fungsi callback(selesai, total)
         
     Returns:
         dict: Status dan hasil
@@ -800,30 +1036,72 @@ def generate_batch_qrcodes(products_df):
         }
     
     try:
-        success_count = 0
-        failed_items = []
-        
-        for index, row in products_df.iterrows():
-            product_data = {
-                'nama_produk': row['nama_produk'],
-                'kategori': row['kategori'],
-                'harga_jual': row['harga_jual'],
-                'stok': row['stok']
-            }
-            
-            result = generate_qrcode(row['barcode_id'], product_data)
-            
-            if result:
-                success_count += 1
-            else:
-                failed_items.append(row['barcode_id'])
+        os.makedirs(QRCODES_FOLDER, exist_ok=True)
+        manifest_path = os.path.join(QRCODES_FOLDER, QR_MANIFEST_FILE)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        
+        # Satu kali scan folder, bukan os.path.exists per produk
+        with os.scandir(QRCODES_FOLDER) as entries:
+            existing = {e.name[:-len('_qr.png')] for e in entries if e.name.endswith('_qr.png')}
+        
+        payloads = {
+            str(product['barcode_id']): build_qr_payload(product['barcode_id'], product, fields)
+            for product in products_df.to_dict('records')
+        }
+        to_render = [
+            (barcode_id, payload) for barcode_id, payload in payloads.items()
+            if force or barcode_id not in existing or manifest.get(barcode_id) != _qr_payload_hash(payload)
+        ]
+        skipped = len(payloads) - len(to_render)
+        
+        result = run_parallel_chunks(
+            _render_qrcode_chunk, to_render,
+            worker_args=(QRCODES_FOLDER,),
+            item_key=lambda item: item[0],
+            max_workers=max_workers,
+            progress_callback=progress_callback
+        )
+        
+        for barcode_id in result['paths']:
+            manifest[barcode_id] = _qr_payload_hash(payloads[barcode_id])
+        
+        removed = []
+        if prune:
+            for barcode_id in sorted((existing | set(manifest)) - set(payloads)):
+                try:
+                    os.remove(os.path.join(QRCODES_FOLDER, f"{barcode_id}_qr.png"))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Gagal menghapus QR code {barcode_id}: {e}")
+                    continue
+                manifest.pop(barcode_id, None)
+                removed.append(barcode_id)
+        
+        temp_path = manifest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(temp_path, manifest_path)
+        
+        success_count = result['success_count'] + skipped
         
         return {
             'success': True,
             'total': len(products_df),
             'success_count': success_count,
-            'failed_items': failed_items,
-            'message': f"✅ Berhasil generate {success_count} dari {len(products_df)} QR code"
+            'rendered': result['success_count'],
+            'skipped': skipped,
+            'removed': removed,
+            'failed_items': [item['barcode_id'] for item in result['failed_items']],
+            'errors': result['failed_items'],
+            'message': (
+                f"✅ Berhasil generate {success_count} dari {len(products_df)} QR code "
+                f"({result['success_count']} dirender, {skipped} tidak berubah)"
+            )
         }
         
     except Exception as e:
@@ -832,49 +1110,273 @@ def generate_batch_qrcodes(products_df):
             'message': f"❌ Error: {str(e)}"
         }
 
-def export_barcodes_zip():
+# ==================== FUNGSI ZIP ====================
+
+def _zip_compress_type(filename):
+    """PNG/JPEG/ZIP sudah terkompresi: disimpan apa adanya (ZIP_STORED), selain itu deflate"""
+    if filename.lower().endswith(ZIP_STORED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+def write_zip(members, fileobj):
     """
-    Export semua barcode ke ZIP
+    Tulis anggota ZIP satu per satu ke file/buffer
+    
+    Args:
+        members: Iterable tuple (nama_file, bytes atau str)
+        fileobj: Path atau file-like yang bisa ditulis
     
     Returns:
-        dict: Status dan path ZIP
+        int: Jumlah file di dalam ZIP
     """
+    count = 0
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for filename, data in members:
+            zipf.writestr(filename, data, compress_type=_zip_compress_type(filename))
+            count += 1
+    return count
+
+def _remove_file(path):
+    """Hapus file jika ada (file yang sedang dibuka/sudah hilang diabaikan)"""
     try:
-        barcode_folder = "barcodes"
-        
-        if not os.path.exists(barcode_folder):
-            return {
-                'success': False,
-                'message': '❌ Folder barcodes tidak ditemukan'
-            }
+        os.remove(path)
+    except OSError:
+        pass
+
+def _zip_cache_path(key):
+    """Path file ZIP cache untuk kunci (jenis export, hash manifest)"""
+    cache_name, manifest_hash = key
+    return os.path.join(ZIP_EXPORT_CACHE_FOLDER, f"{cache_name}_{manifest_hash[:16]}.zip")
+
+def _zip_cache_get(key):
+    """
+    Ambil entri ZIP dari cache export (LRU kecil)
+    
+    Returns:
+        tuple: (path ZIP, jumlah barcode, jumlah QR) atau None
+    """
+    with _ZIP_EXPORT_CACHE_LOCK:
+        entry = _ZIP_EXPORT_CACHE.get(key)
+        if entry is None:
+            return None
+        if not os.path.exists(entry[0]):
+            del _ZIP_EXPORT_CACHE[key]
+            return None
+        _ZIP_EXPORT_CACHE.move_to_end(key)
+        return entry
+
+def _zip_cache_build(key, members, barcode_count, qr_count):
+    """
+    Tulis ZIP langsung ke file cache (file sementara lalu os.replace), lalu
+    daftarkan ke cache. File entri terlama dan sisa process sebelumnya dihapus
+    
+    Returns:
+        tuple: (path ZIP, jumlah barcode, jumlah QR)
+    """
+    os.makedirs(ZIP_EXPORT_CACHE_FOLDER, exist_ok=True)
+    zip_path = _zip_cache_path(key)
+    temp_path = f"{zip_path}.{os.getpid()}_{threading.get_ident()}.tmp"
+    try:
+        write_zip(members, temp_path)
+    except Exception:
+        _remove_file(temp_path)
+        raise
+    
+    entry = (zip_path, barcode_count, qr_count)
+    with _ZIP_EXPORT_CACHE_LOCK:
+        os.replace(temp_path, zip_path)
+        _ZIP_EXPORT_CACHE[key] = entry
+        _ZIP_EXPORT_CACHE.move_to_end(key)
+        while len(_ZIP_EXPORT_CACHE) > ZIP_EXPORT_CACHE_SIZE:
+            _ZIP_EXPORT_CACHE.popitem(last=False)
+        
+        active = {path for path, _, _ in _ZIP_EXPORT_CACHE.values()}
+        for filename in os.listdir(ZIP_EXPORT_CACHE_FOLDER):
+            path = os.path.join(ZIP_EXPORT_CACHE_FOLDER, filename)
+            if filename.endswith('.zip') and path not in active:
+                _remove_file(path)
+    
+    return entry
+
+def clear_zip_cache():
+    """Kosongkan cache ZIP export beserta file-nya"""
+    with _ZIP_EXPORT_CACHE_LOCK:
+        for path, _, _ in _ZIP_EXPORT_CACHE.values():
+            _remove_file(path)
+        _ZIP_EXPORT_CACHE.clear()
+
+# ==================== FUNGSI EXPORT KODE ====================
+
+def _load_catalog(products_df=None):
+    """Ambil DataFrame produk (dari argumen atau dari file)"""
+    if products_df is None:
+        from modules.data_handler import load_products_data
+        products_df = load_products_data()
+    return products_df
+
+def _code_render_items(products_df, include_barcodes=True, include_qrcodes=False):
+    """Daftar item render (jenis, barcode_id, data produk) sesuai urutan katalog"""
+    items = []
+    for product in products_df.to_dict('records'):
+        barcode_id = str(product['barcode_id'])
+        if include_barcodes:
+            items.append(('barcode', barcode_id, product))
+        if include_qrcodes:
+            items.append(('qrcode', barcode_id, product))
+    return items
+
+def _code_manifest_hash(items):
+    """
+    Hash manifest export: ID + hash label barcode / payload QR setiap item
+    Manifest sama berarti isi ZIP sama, sehingga ZIP dari cache bisa dipakai ulang
+    """
+    digest = hashlib.sha1()
+    if any(kind == 'barcode' for kind, _, _ in items):
+        from modules.barcode_handler import barcode_label_hash
+    for kind, barcode_id, product in items:
+        if kind == 'barcode':
+            content_key = barcode_label_hash(barcode_id, image_format='png')
+        else:
+            content_key = build_qr_payload(barcode_id, product)
+        digest.update(f"{kind}|{barcode_id}|{content_key}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def _render_code_chunk(items):
+    """
+    Worker process pool: render satu potongan barcode/QR ke bytes
+    
+    Returns:
+        list: Tuple ((jenis, barcode_id), bytes atau None, error)
+    """
+    if any(kind == 'barcode' for kind, _, _ in items):
+        from modules.barcode_handler import render_barcode_bytes
+    
+    results = []
+    for kind, barcode_id, product in items:
+        if kind == 'barcode':
+            image_bytes = render_barcode_bytes(barcode_id)
+        else:
+            image_bytes = render_qrcode_bytes(barcode_id, product)
+        results.append(((kind, barcode_id), image_bytes, None if image_bytes else "Render gagal"))
+    return results
+
+def _render_code_images(products_df, include_barcodes=True, include_qrcodes=False, max_workers=None):
+    """
+    Render gambar barcode/QR semua produk secara paralel (cache memori per process)
+    
+    Args:
+        products_df: DataFrame produk
+        include_barcodes: Sertakan barcode
+        include_qrcodes: Sertakan QR code
+        max_workers: Jumlah process (default jumlah CPU)
         
-        barcode_files = [f for f in os.listdir(barcode_folder) if f.endswith('.png')]
+    Returns:
+        tuple: (list (nama_file, bytes) barcode, list (nama_file, bytes) QR code)
+    """
+    items = _code_render_items(products_df, include_barcodes, include_qrcodes)
+    result = run_parallel_chunks(
+        _render_code_chunk,
+        items,
+        item_key=lambda item: (item[0], item[1]),
+        max_workers=max_workers
+    )
+    rendered = result['paths']
+    
+    barcode_images = []
+    qr_images = []
+    
+    # Urutan file di ZIP mengikuti urutan katalog, bukan urutan selesai render
+    for kind, barcode_id, _ in items:
+        image_bytes = rendered.get((kind, barcode_id))
+        if image_bytes is None:
+            continue
+        if kind == 'barcode':
+            barcode_images.append((f"{barcode_id}.png", image_bytes))
+        else:
+            qr_images.append((f"{barcode_id}_qr.png", image_bytes))
+    
+    return barcode_images, qr_images
+
+def _export_code_zip(cache_name, products_df, include_barcodes, include_qrcodes, build_members,
+                     max_workers=None):
+    """
+    Render kode lalu tulis ZIP ke file cache, dengan kunci hash manifest
+    
+    Args:
+        cache_name: Nama jenis export (bagian dari kunci cache dan nama file)
+        products_df: DataFrame produk
+        include_barcodes: Sertakan barcode
+        include_qrcodes: Sertakan QR code
+        build_members: Fungsi (barcode_images, qr_images) -> list (nama_file, bytes)
+        max_workers: Jumlah process render (default jumlah CPU)
+    
+    Returns:
+        dict: zip_path, file_name, barcode_count, qr_count, zip_size_mb, cached
+              (None jika tidak ada gambar)
+    """
+    items = _code_render_items(products_df, include_barcodes, include_qrcodes)
+    if not items:
+        return None
+    
+    cache_key = (cache_name, _code_manifest_hash(items))
+    cached = _zip_cache_get(cache_key)
+    if cached is not None:
+        zip_path, barcode_count, qr_count = cached
+        from_cache = True
+    else:
+        barcode_images, qr_images = _render_code_images(
+            products_df, include_barcodes, include_qrcodes, max_workers=max_workers
+        )
+        if not barcode_images and not qr_images:
+            return None
+        zip_path, barcode_count, qr_count = _zip_cache_build(
+            cache_key, build_members(barcode_images, qr_images), len(barcode_images), len(qr_images)
+        )
+        from_cache = False
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return {
+        'zip_path': zip_path,
+        'file_name': f"{cache_name}_{timestamp}.zip",
+        'barcode_count': barcode_count,
+        'qr_count': qr_count,
+        'zip_size_mb': os.path.getsize(zip_path) / (1024 * 1024),
+        'cached': from_cache
+    }
+
+def export_barcodes_zip(products_df=None, max_workers=None):
+    """
+    Export barcode semua produk ke ZIP (file cache per hash manifest)
+    
+    Args:
+        products_df: DataFrame produk (default semua produk)
+        max_workers: Jumlah process render (default jumlah CPU)
+    
+    Returns:
+        dict: Status, zip_path, file_name, file_count, cached
+    """
+    try:
+        products_df = _load_catalog(products_df)
+        export = _export_code_zip(
+            "barcodes", products_df, True, False,
+            lambda barcode_images, qr_images: barcode_images,
+            max_workers=max_workers
+        )
         
-        if not barcode_files:
+        if export is None:
             return {
                 'success': False,
                 'message': '❌ Tidak ada barcode untuk di-export'
             }
         
-        # Create export folder
-        export_folder = "data/exports"
-        os.makedirs(export_folder, exist_ok=True)
-        
-        # Create ZIP
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        zip_filename = f"barcodes_{timestamp}.zip"
-        zip_path = os.path.join(export_folder, zip_filename)
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for filename in barcode_files:
-                file_path = os.path.join(barcode_folder, filename)
-                zipf.write(file_path, arcname=filename)
-        
         return {
             'success': True,
-            'zip_path': zip_path,
-            'file_count': len(barcode_files),
-            'message': f"✅ Export {len(barcode_files)} barcode berhasil!"
+            'zip_path': export['zip_path'],
+            'file_name': export['file_name'],
+            'file_count': export['barcode_count'],
+            'zip_size_mb': export['zip_size_mb'],
+            'cached': export['cached'],
+            'message': f"✅ Export {export['barcode_count']} barcode berhasil!"
         }
         
     except Exception as e:
@@ -883,49 +1385,45 @@ def export_barcodes_zip():
             'message': f"❌ Error: {str(e)}"
         }
 
-def export_qrcodes_zip():
+def export_qrcodes_zip(products_df=None, max_workers=None):
     """
-    Export semua QR code ke ZIP
+    Export QR code semua produk ke ZIP (file cache per hash manifest)
+    
+    Args:
+        products_df: DataFrame produk (default semua produk)
+        max_workers: Jumlah process render (default jumlah CPU)
     
     Returns:
-        dict: Status dan path ZIP
+        dict: Status, zip_path, file_name, file_count, cached
     """
+    if not QRCODE_AVAILABLE:
+        return {
+            'success': False,
+            'message': '❌ Library qrcode tidak tersedia. Install: pip install qrcode[pil]'
+        }
+    
     try:
-        qr_folder = "qrcodes"
-        
-        if not os.path.exists(qr_folder):
-            return {
-                'success': False,
-                'message': '❌ Folder qrcodes tidak ditemukan'
-            }
-        
-        qr_files = [f for f in os.listdir(qr_folder) if f.endswith('_qr.png')]
+        products_df = _load_catalog(products_df)
+        export = _export_code_zip(
+            "qrcodes", products_df, False, True,
+            lambda barcode_images, qr_images: qr_images,
+            max_workers=max_workers
+        )
         
-        if not qr_files:
+        if export is None:
             return {
                 'success': False,
                 'message': '❌ Tidak ada QR code untuk di-export'
             }
         
-        # Create export folder
-        export_folder = "data/exports"
-        os.makedirs(export_folder, exist_ok=True)
-        
-        # Create ZIP
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        zip_filename = f"qrcodes_{timestamp}.zip"
-        zip_path = os.path.join(export_folder, zip_filename)
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for filename in qr_files:
-                file_path = os.path.join(qr_folder, filename)
-                zipf.write(file_path, arcname=filename)
-        
         return {
             'success': True,
-            'zip_path': zip_path,
-            'file_count': len(qr_files),
-            'message': f"✅ Export {len(qr_files)} QR code berhasil!"
+            'zip_path': export['zip_path'],
+            'file_name': export['file_name'],
+            'file_count': export['qr_count'],
+            'zip_size_mb': export['zip_size_mb'],
+            'cached': export['cached'],
+            'message': f"✅ Export {export['qr_count']} QR code berhasil!"
         }
         
     except Exception as e:
@@ -934,54 +1432,12 @@ def export_qrcodes_zip():
             'message': f"❌ Error: {str(e)}"
         }
 
-def export_both_codes_zip():
-    """
-    Export barcode DAN QR code ke satu ZIP package
+def _complete_codes_members(barcode_files, qr_files):
+    """Anggota ZIP package lengkap: barcodes/, qrcodes/ dan README"""
+    members = [(f"barcodes/{filename}", image_bytes) for filename, image_bytes in barcode_files]
+    members += [(f"qrcodes/{filename}", image_bytes) for filename, image_bytes in qr_files]
     
-    Returns:
-        dict: Status dan path ZIP
-    """
-    try:
-        barcode_folder = "barcodes"
-        qr_folder = "qrcodes"
-        
-        barcode_files = []
-        qr_files = []
-        
-        if os.path.exists(barcode_folder):
-            barcode_files = [f for f in os.listdir(barcode_folder) if f.endswith('.png')]
-        
-        if os.path.exists(qr_folder):
-            qr_files = [f for f in os.listdir(qr_folder) if f.endswith('_qr.png')]
-        
-        if not barcode_files and not qr_files:
-            return {
-                'success': False,
-                'message': '❌ Tidak ada barcode atau QR code untuk di-export'
-            }
-        
-        # Create export folder
-        export_folder = "data/exports"
-        os.makedirs(export_folder, exist_ok=True)
-        
-        # Create ZIP with subfolder structure
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        zip_filename = f"complete_codes_{timestamp}.zip"
-        zip_path = os.path.join(export_folder, zip_filename)
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add barcodes
-            for filename in barcode_files:
-                file_path = os.path.join(barcode_folder, filename)
-                zipf.write(file_path, arcname=f"barcodes/{filename}")
-            
-            # Add QR codes
-            for filename in qr_files:
-                file_path = os.path.join(qr_folder, filename)
-                zipf.write(file_path, arcname=f"qrcodes/{filename}")
-            
-            # Add README
-            readme_content = f"""
+    readme_content = f"""
 ═══════════════════════════════════════════════
     COMPLETE CODES PACKAGE
 ═══════════════════════════════════════════════
@@ -991,7 +1447,7 @@ def export_both_codes_zip():
 │   └── Code128 format barcodes
 │
 └── qrcodes/           ({len(qr_files)} files)
-    └── QR codes with JSON product data
+    └── QR codes (payload KS1|<barcode_id>)
 
 📊 STATISTICS:
 - Total Barcodes: {len(barcode_files)}
@@ -1006,15 +1462,44 @@ def export_both_codes_zip():
 Generated by: Kantin Sekolah Manager v1.0
 ═══════════════════════════════════════════════
             """
-            
-            zipf.writestr("README.txt", readme_content)
+    
+    members.append(("README.txt", readme_content))
+    return members
+
+def export_both_codes_zip(products_df=None, max_workers=None):
+    """
+    Export barcode DAN QR code ke satu ZIP package (file cache per hash manifest)
+    
+    Args:
+        products_df: DataFrame produk (default semua produk)
+        max_workers: Jumlah process render (default jumlah CPU)
+    
+    Returns:
+        dict: Status, zip_path, file_name, barcode_count, qr_count, cached
+    """
+    try:
+        products_df = _load_catalog(products_df)
+        export = _export_code_zip(
+            "complete_codes", products_df, True, QRCODE_AVAILABLE,
+            _complete_codes_members,
+            max_workers=max_workers
+        )
+        
+        if export is None:
+            return {
+                'success': False,
+                'message': '❌ Tidak ada barcode atau QR code untuk di-export'
+            }
         
         return {
             'success': True,
-            'zip_path': zip_path,
-            'barcode_count': len(barcode_files),
-            'qr_count': len(qr_files),
-            'message': f"✅ Export {len(barcode_files)} barcode + {len(qr_files)} QR code berhasil!"
+            'zip_path': export['zip_path'],
+            'file_name': export['file_name'],
+            'barcode_count': export['barcode_count'],
+            'qr_count': export['qr_count'],
+            'zip_size_mb': export['zip_size_mb'],
+            'cached': export['cached'],
+            'message': f"✅ Export {export['barcode_count']} barcode + {export['qr_count']} QR code berhasil!"
         }
         
     except Exception as e: